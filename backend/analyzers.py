@@ -0,0 +1,115 @@
+"""
+Exercise Analyzer Registry
+--------------------------
+Maps exercise names to analyzer objects, so the API dispatches with a dict
+lookup instead of an if/elif chain per endpoint.
+
+An analyzer has:
+    name            - exercise name used in the URL (e.g. "squats")
+    initial_state   - state a client starts from after a reset
+    process(...)    - analyze one frame (same arguments as process_landmarks)
+    reset(...)      - reset a client's counter and stage
+
+The built-in exercises are registered as ModuleAnalyzers, which import their
+exercise module on first use (or when preloaded), so startup doesn't have to pay
+for analyzers nobody calls. Additional exercises can be added at startup with
+register_analyzer.
+"""
+import copy
+import importlib
+import threading
+
+from state import exercise_state
+
+class ModuleAnalyzer:
+    """Analyzer backed by an exercise module exposing process_landmarks"""
+
+    def __init__(self, name, module_name, initial_state):
+        self.name = name
+        self.module_name = module_name
+        self.initial_state = initial_state
+        self._process_landmarks = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._process_landmarks is not None
+
+    def load(self):
+        """Import the exercise module (no-op if it is already loaded)"""
+        if self._process_landmarks is None:
+            with self._lock:
+                if self._process_landmarks is None:
+                    module = importlib.import_module(self.module_name)
+                    self._process_landmarks = module.process_landmarks
+        return self
+
+    def process(self, landmarks, tolerance, session_id=None, client_id=None,
+                timestamp=None, kinematics=None):
+        """Analyze one frame (see the exercise module's process_landmarks)"""
+        if self._process_landmarks is None:
+            self.load()
+        return self._process_landmarks(landmarks, tolerance, session_id, client_id, timestamp, kinematics)
+
+    def reset(self, session_id=None, client_id=None):
+        """Reset the counter and stage of a client (client_id, else session_id)"""
+        exercise_state.reset_exercise(self.name, copy.deepcopy(self.initial_state), client_id or session_id)
+
+# Registered analyzers: exercise name -> analyzer
+ANALYZERS = {}
+
+def register_analyzer(analyzer):
+    """Register (or replace) the analyzer for analyzer.name"""
+    ANALYZERS[analyzer.name] = analyzer
+    return analyzer
+
+def get_analyzer(name):
+    """Return the analyzer for an exercise, or None if the exercise is unknown"""
+    return ANALYZERS.get(name)
+
+def available_exercises():
+    """Names of all registered exercises, sorted"""
+    return tuple(sorted(ANALYZERS))
+
+def preload_analyzers(names=None):
+    """Load the given analyzers (all registered ones by default) ahead of the first request"""
+    for name in names or available_exercises():
+        analyzer = ANALYZERS[name]
+        if hasattr(analyzer, "load"):
+            analyzer.load()
+
+# Built-in exercises
+register_analyzer(ModuleAnalyzer("bicep_curls", "bicep_curls", {
+    "repCount": 0,
+    "stage": "down",
+    "feedback": "Ready to start new set",
+    "prev_shoulders": None
+}))
+register_analyzer(ModuleAnalyzer("deadlifts", "deadlifts", {
+    "repCount": 0,
+    "stage": "up",
+    "feedback": "Ready to start new set"
+}))
+register_analyzer(ModuleAnalyzer("lunges", "lunges", {
+    "counter": 0,
+    "stage": "up",
+    "feedback": "Ready to start new set"
+}))
+register_analyzer(ModuleAnalyzer("pushups", "pushups", {
+    "counter": 0,
+    "stage": "up",
+    "feedback": "Ready to start new set"
+}))
+register_analyzer(ModuleAnalyzer("situps", "situps", {
+    "counter": 0,
+    "stage": "up",
+    "feedback": "Ready to start new set"
+}))
+register_analyzer(ModuleAnalyzer("squats", "squats", {
+    "counter": 0,
+    "stage": "up",
+    "repCounted": False,
+    "currentMinKnee": None,
+    "currentMinTrunk": None,
+    "feedback": "Ready to start new set"
+}))
@@ -0,0 +1,143 @@
+"""
+Batch Video Analysis
+--------------------
+Re-scores many workout videos in parallel across all CPU cores.
+
+Videos are sharded over a process pool. Each worker process loads its own
+MediaPipe pose model and exercise analyzers once, then runs every video it is
+given through the video_analysis pipeline inside a tracking session. The
+per-video session summaries (the same format session_state.end_session returns)
+are collected by the parent and written to a single batch report.
+
+Usage:
+    python batch_video_analysis.py data/video --workers 4 --output batch_report.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+# Per-process pose model, created once by the pool initializer
+_worker_pose = None
+
+def _init_worker(model_complexity):
+    """Load the pose model and every exercise analyzer once per worker process"""
+    global _worker_pose
+    from analyzers import preload_analyzers
+    from video_analysis import create_pose_model
+
+    preload_analyzers()
+    _worker_pose = create_pose_model(model_complexity)
+
+def _analyze_in_worker(video_path, exercise, tolerance, frame_stride, user_id):
+    """Analyze one video inside a session and return its report and session summary"""
+    from session_state import start_session, end_session
+    from video_analysis import analyze_video, guess_exercise
+
+    exercise = exercise or guess_exercise(video_path)
+    session_id = start_session(user_id=user_id, exercise_type=exercise)
+    try:
+        report = analyze_video(
+            video_path, exercise, tolerance, session_id,
+            frame_stride=frame_stride, pose=_worker_pose
+        )
+    finally:
+        # A failed video still closes its session instead of leaking it in the worker
+        summary = end_session(session_id)
+    summary["video"] = str(video_path)
+    return {"video": str(video_path), "report": report, "summary": summary}
+
+def analyze_videos(videos, workers=None, exercise=None, tolerance=10, frame_stride=1,
+                   model_complexity=1, user_id=None):
+    """
+    Analyze many videos in parallel.
+
+    Args:
+        videos: List of video paths
+        workers: Number of worker processes (defaults to the CPU count)
+        exercise: Exercise for all videos (inferred per file name when omitted)
+        tolerance: Tolerance threshold passed to the analyzers
+        frame_stride: Analyze every n-th frame
+        model_complexity: MediaPipe pose model complexity (0, 1 or 2)
+        user_id: Optional user the sessions are recorded for
+
+    Returns:
+        Dictionary with throughput statistics, per-video session summaries and failures
+    """
+    workers = workers or os.cpu_count() or 1
+    start_time = time.time()
+    results = {}
+    failures = []
+
+    # Spawned workers start clean instead of inheriting the parent's MediaPipe/TFLite state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(model_complexity,)) as pool:
+        futures = {
+            pool.submit(_analyze_in_worker, str(video), exercise, tolerance, frame_stride, user_id): str(video)
+            for video in videos
+        }
+        for future in as_completed(futures):
+            video = futures[future]
+            try:
+                results[video] = future.result()
+                summary = results[video]["summary"]
+                print(f"{Path(video).name}: {summary.get('total_reps', 0)} reps, "
+                      f"average score {summary.get('average_score', 0):.1f}")
+            except Exception as e:
+                failures.append({"video": video, "error": str(e)})
+                print(f"{Path(video).name}: failed - {e}")
+
+    elapsed = time.time() - start_time
+    ordered = [results[str(video)] for video in videos if str(video) in results]
+    video_seconds = sum(r["report"]["duration_seconds"] for r in ordered)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "workers": workers,
+        "videos_processed": len(ordered),
+        "videos_failed": len(failures),
+        "elapsed_seconds": round(elapsed, 2),
+        "videos_per_minute": round(len(ordered) / elapsed * 60, 2) if elapsed > 0 else 0,
+        "realtime_factor": round(video_seconds / elapsed, 2) if elapsed > 0 else 0,
+        "sessions": [r["summary"] for r in ordered],
+        "reports": [r["report"] for r in ordered],
+        "failures": failures
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel form analysis of many exercise videos")
+    parser.add_argument("paths", nargs="+", help="Video files or directories of videos")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--exercise", help="Exercise for all videos (inferred from file names by default)")
+    parser.add_argument("--tolerance", type=int, default=10)
+    parser.add_argument("--frame-stride", type=int, default=1, help="Analyze every n-th frame")
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--user-id", help="User the sessions are recorded for")
+    parser.add_argument("--output", default="batch_report.json", help="Where to write the batch report")
+    args = parser.parse_args()
+
+    from video_analysis import find_videos
+
+    videos = find_videos(args.paths)
+    if not videos:
+        parser.error("No videos found")
+
+    print(f"Analyzing {len(videos)} videos...")
+    batch = analyze_videos(
+        videos, args.workers, args.exercise, args.tolerance,
+        args.frame_stride, args.model_complexity, args.user_id
+    )
+
+    with open(args.output, "w") as f:
+        json.dump(batch, f, indent=2)
+    print(f"{batch['videos_processed']} videos in {batch['elapsed_seconds']}s "
+          f"({batch['videos_per_minute']} videos/min, {batch['workers']} workers). "
+          f"Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
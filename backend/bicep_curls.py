@@ -1,17 +1,10 @@
-import numpy as np
+import math
+import time
 from state import exercise_state
+from kinematics import frame_kinematics
+from visibility import not_visible_response, side_values, visible_sides
 from feedback_config import BICEP_CURL_CONFIG, FEEDBACK_TO_JOINTS, JOINT_INDEX_MAP
-
-def calculate_angle(a, b, c):
-    """
-    Calculate the angle (in degrees) at point b given three points a, b, and c.
-    """
-    a, b, c = np.array(a), np.array(b), np.array(c)
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
+from rep_counter import advance_rep_phase
 
 def detect_shoulder_movement(current_shoulder, previous_shoulder):
     """
@@ -22,80 +15,75 @@ def detect_shoulder_movement(current_shoulder, previous_shoulder):
         return 0
     
     # Calculate displacement
-    displacement = np.sqrt((current_shoulder[0] - previous_shoulder[0])**2 + 
-                          (current_shoulder[1] - previous_shoulder[1])**2)
+    displacement = math.hypot(current_shoulder[0] - previous_shoulder[0],
+                              current_shoulder[1] - previous_shoulder[1])
     return displacement
 
-def process_landmarks(landmarks, tolerance=0.0, session_id=None):
+def process_landmarks(landmarks, tolerance=0.0, session_id=None, client_id=None,
+                      timestamp=None, kinematics=None):
     """
     Process landmarks for bicep curl form analysis with enhanced feedback
     
     Args:
-        landmarks: Dictionary of landmark positions
+        landmarks: Landmark list or (33, 4) landmark array
         tolerance: Tolerance threshold
         session_id: Optional session ID for logging
+        client_id: Optional client identifier used to isolate exercise state
+        timestamp: Optional frame capture time in seconds (defaults to now)
+        kinematics: Optional precomputed metrics from kinematics.batch_kinematics
         
     Returns:
         Dictionary with processing results and feedback
     """
-    elbow_angles = []
-    shoulder_positions = []
+    # Joint metrics of the frame, each computed when first read (batches pass them precomputed)
+    if kinematics is not None:
+        kin = kinematics
+    else:
+        try:
+            kin = frame_kinematics(landmarks)
+        except ValueError:
+            return {"error": "Insufficient landmarks data."}
     
-    # Calculate left arm angle and get shoulder position
-    try:
-        left_shoulder = [landmarks[11]['x'], landmarks[11]['y']]
-        left_elbow = [landmarks[13]['x'], landmarks[13]['y']]
-        left_wrist = [landmarks[15]['x'], landmarks[15]['y']]
-        
-        left_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-        elbow_angles.append(left_angle)
-        shoulder_positions.append(left_shoulder)
-    except KeyError:
-        pass
-
-    # Calculate right arm angle and get shoulder position
-    try:
-        right_shoulder = [landmarks[12]['x'], landmarks[12]['y']]
-        right_elbow = [landmarks[14]['x'], landmarks[14]['y']]
-        right_wrist = [landmarks[16]['x'], landmarks[16]['y']]
-        
-        right_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
-        elbow_angles.append(right_angle)
-        shoulder_positions.append(right_shoulder)
-    except KeyError:
-        pass
-
-    if not elbow_angles:
-        return {"error": "Insufficient landmarks data."}
+    # State is kept per client; fall back to the session when no client id is given
+    client_key = client_id or session_id
 
-    # Average the elbow angles
-    avg_elbow_angle = sum(elbow_angles) / len(elbow_angles)
-    
     # Retrieve the current state for bicep_curls
     state = exercise_state.get("bicep_curls", {
         "repCount": 0,
         "stage": "down",
         "feedback": "N/A",
         "prev_shoulders": None
-    })
+    }, client_key)
+
+    # Skip frames whose key joints are occluded; analyze only the better-visible side
+    sides = visible_sides(kin, "bicep_curls")
+    if not sides:
+        return not_visible_response(state, "repCount")
+    
+    # Elbow angle and shoulder position of the analyzed arm
+    elbow_angles = side_values(kin, "elbow_angle", sides)
+    shoulder_positions = {side: [kin[f"{side}_shoulder_x"], kin[f"{side}_shoulder_y"]] for side in sides}
+
+    # Average the elbow angles
+    avg_elbow_angle = sum(elbow_angles) / len(elbow_angles)
     
     stage = state.get("stage", "down")
     counter = state.get("repCount", 0)
     prev_counter = counter  # Store previous counter to detect new reps
     prev_shoulders = state.get("prev_shoulders", None)
     
-    # Calculate shoulder movement if we have previous data
+    # Calculate shoulder movement if we have previous data for the same arm
     shoulder_movement = 0
-    if prev_shoulders and len(prev_shoulders) == len(shoulder_positions):
-        movements = [detect_shoulder_movement(curr, prev) 
-                    for curr, prev in zip(shoulder_positions, prev_shoulders)]
+    if isinstance(prev_shoulders, dict):
+        movements = [detect_shoulder_movement(position, prev_shoulders[side])
+                     for side, position in shoulder_positions.items() if side in prev_shoulders]
         shoulder_movement = max(movements) if movements else 0
 
-    # Bicep curl detection logic
-    if avg_elbow_angle > BICEP_CURL_CONFIG["ELBOW_EXTENSION_MIN"]:  # Arm extended (down)
-        stage = "down"
-    elif avg_elbow_angle < BICEP_CURL_CONFIG["ELBOW_ANGLE_MAX"] + 10 and stage == "down":  # Arm flexed (up)
-        stage = "up"
+    # Bicep curl detection logic: arm extended (down) <-> arm flexed (up) on the elbow angle
+    current_time = timestamp if timestamp is not None else time.time()
+    transition = advance_rep_phase("bicep_curls", avg_elbow_angle, stage, state.get("rep_phase"), current_time)
+    stage = transition["stage"]
+    if transition["rep_completed"]:
         counter += 1
 
     # Generate detailed feedback
@@ -190,6 +178,7 @@ def process_landmarks(landmarks, tolerance=0.0, session_id=None):
     new_state = {
         "repCount": counter,
         "stage": stage,
+        "rep_phase": transition["phase"],
         "feedback": feedback_message,
         "feedback_flags": feedback_flags,
         "avg_angle": avg_elbow_angle,
@@ -203,5 +192,5 @@ def process_landmarks(landmarks, tolerance=0.0, session_id=None):
         "advanced_metrics": advanced_metrics  # Add advanced metrics
     }
     
-    exercise_state["bicep_curls"] = new_state
+    exercise_state.set("bicep_curls", new_state, client_key)
     return new_state
\ No newline at end of file
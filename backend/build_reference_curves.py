@@ -0,0 +1,243 @@
+"""
+Reference Curve Builder
+-----------------------
+Derives the reference joint angle curves from the demonstration videos.
+
+Every video is run through pose extraction once, its joint angles are computed
+with the vectorized kinematics, and the driving joint of the exercise (the first
+entry of CURVE_JOINTS) is segmented into reps. Each rep's movement phase, from
+the rest position to the deepest point, is time-normalized onto STEPS progress
+values, and the mean and variance over all reps of an exercise are stored as a
+compact float32 table of shape (joints, 2, STEPS) in reference_curves/.
+
+The tables are written as one .npy file per exercise plus an index.json rather
+than a single .npz archive: np.load can memory-map .npy files but not arrays
+inside an .npz, and reference_poses maps them at startup without copying.
+
+Only side views are used by default. The angles are measured in the image
+plane, so a front view foreshortens flexion of the knees and hips.
+
+Usage:
+    python build_reference_curves.py
+    python build_reference_curves.py data/video/male-Bodyweight-bodyweight-squat-side.mp4 --steps 128
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from kinematics import compute_kinematics
+from reference_poses import REFERENCE_CURVES_DIR, REFERENCE_CURVES_INDEX
+from video_analysis import create_pose_model, extract_landmarks, find_videos, guess_exercise, is_side_view
+
+DEFAULT_VIDEOS = Path(__file__).resolve().parent / "data" / "video"
+
+CURVE_CONFIG = {
+    "STEPS": 64,              # Progress samples per curve
+    "SMOOTHING_WINDOW": 5,    # Moving-average window (frames) for rep segmentation
+    "MIN_RANGE": 30,          # Driving angle must move at least this much (degrees) to count reps
+    "HYSTERESIS": 0.25,       # Rest / active thresholds, as a fraction of the range in from each end
+    "TOP_TOLERANCE": 0.05,    # A rep starts at the last rest frame this close (fraction of range) to the top
+    "MIN_REP_SECONDS": 0.3,   # Shorter movement phases are treated as noise
+}
+
+# Joints measured per exercise (names as in reference_poses.REFERENCE_ANGLES):
+# joint -> (kinematics metric, how the two sides are combined). The first joint
+# drives rep segmentation; its angle decreases from the rest position to the
+# deepest point of the rep.
+#   "near": the side facing the camera (the one with the larger range of motion)
+#   "min" / "max": the more / less flexed side per frame (front / rear leg of a lunge)
+CURVE_JOINTS = {
+    "squats": {"knee": ("knee_angle", "near"), "hip": ("hip_angle", "near")},
+    "deadlifts": {"hip": ("hip_angle", "near"), "knee": ("knee_angle", "near")},
+    "pushups": {"elbow": ("elbow_angle", "near")},
+    "lunges": {"front_knee": ("knee_angle", "min"), "rear_knee": ("knee_angle", "max")},
+    "situps": {"hip": ("hip_angle", "near")},
+    "bicep_curls": {"elbow": ("elbow_angle", "near")},
+}
+
+def _smooth(values, window):
+    if window <= 1 or len(values) < window:
+        return values
+    padded = np.pad(values, window // 2, mode="edge")
+    return np.convolve(padded, np.ones(window) / window, mode="valid")[:len(values)]
+
+def joint_series(frames, exercise):
+    """
+    Angle series of the CURVE_JOINTS of an exercise.
+
+    Args:
+        frames: (N, 33, 4) landmark frames of one video
+        exercise: Exercise name (key of CURVE_JOINTS)
+
+    Returns:
+        Dictionary mapping joint names to (N,) angle arrays
+    """
+    kin = compute_kinematics(frames)
+    joints = CURVE_JOINTS[exercise]
+
+    # The near side moves through the full range; the far side is partly occluded
+    driver_metric = next(iter(joints.values()))[0]
+    ranges = {
+        side: np.ptp(np.percentile(kin[f"{side}_{driver_metric}"], [10, 90]))
+        for side in ("left", "right")
+    }
+    near = max(ranges, key=ranges.get)
+
+    series = {}
+    for joint, (metric, combine) in joints.items():
+        left, right = kin[f"left_{metric}"], kin[f"right_{metric}"]
+        if combine == "near":
+            series[joint] = kin[f"{near}_{metric}"]
+        elif combine == "min":
+            series[joint] = np.minimum(left, right)
+        else:
+            series[joint] = np.maximum(left, right)
+    return series
+
+def segment_reps(timestamps, driver, config=CURVE_CONFIG):
+    """
+    Find the movement phase of every rep in a driving angle series.
+
+    The thresholds adapt to the video: the range is taken between the 10th and
+    90th percentile, a frame is at rest above (top - HYSTERESIS * range) and in
+    the active phase below (bottom + HYSTERESIS * range). A rep's movement phase
+    runs from the last frame at the top of the rest phase (within TOP_TOLERANCE
+    of its highest angle) to the deepest frame of the active phase that follows.
+
+    Returns:
+        List of (start, end) frame indices (end inclusive)
+    """
+    smoothed = _smooth(np.asarray(driver, dtype=np.float64), config["SMOOTHING_WINDOW"])
+    bottom, top = np.percentile(smoothed, [10, 90])
+    if top - bottom < config["MIN_RANGE"]:
+        return []
+    rest_level = top - config["HYSTERESIS"] * (top - bottom)
+    active_level = bottom + config["HYSTERESIS"] * (top - bottom)
+    top_tolerance = config["TOP_TOLERANCE"] * (top - bottom)
+
+    reps = []
+    rest_start = None     # First frame of the current rest phase
+    active_start = None   # First frame of the current active phase
+    for index, angle in enumerate(smoothed):
+        if active_start is None:
+            if angle >= rest_level:
+                if rest_start is None:
+                    rest_start = index
+            elif angle <= active_level and rest_start is not None:
+                active_start = index
+        elif angle >= rest_level:
+            # Back at rest: the rep runs from the top of the previous rest phase
+            # to the deepest point of the active phase just left
+            rest = smoothed[rest_start:active_start]
+            start = rest_start + int(np.flatnonzero(rest >= rest.max() - top_tolerance)[-1])
+            end = active_start + int(np.argmin(smoothed[active_start:index]))
+            if timestamps[end] - timestamps[start] >= config["MIN_REP_SECONDS"]:
+                reps.append((start, end))
+            active_start = None
+            rest_start = index
+    return reps
+
+def time_normalize(timestamps, values, start, end, steps):
+    """Resample values[start:end + 1] onto steps evenly spaced progress values (by time)"""
+    times = timestamps[start:end + 1]
+    progress = (times - times[0]) / (times[-1] - times[0])
+    return np.interp(np.linspace(0.0, 1.0, steps), progress, values[start:end + 1])
+
+def build_curves(videos, steps=None, model_complexity=1):
+    """
+    Extract, segment and average the reference curves of a set of videos.
+
+    Returns:
+        Dictionary mapping exercise names to {"curves": (joints, 2, steps) float32
+        array of mean and variance, "joints", "reps", "videos"}
+    """
+    steps = steps or CURVE_CONFIG["STEPS"]
+    samples = {}   # exercise -> {joint: [resampled reps]}
+    sources = {}   # exercise -> video names
+    pose = create_pose_model(model_complexity)
+    try:
+        for video in videos:
+            exercise = guess_exercise(video)
+            if exercise not in CURVE_JOINTS:
+                print(f"Skipping {video.name}: unknown exercise")
+                continue
+            timestamps, frames = extract_landmarks(str(video), pose=pose)
+            if len(frames) == 0:
+                print(f"Skipping {video.name}: no pose detected")
+                continue
+
+            series = joint_series(frames, exercise)
+            driver = next(iter(series.values()))
+            reps = segment_reps(timestamps, driver)
+            print(f"{video.name}: {len(frames)} frames, {len(reps)} reps ({exercise})")
+            if not reps:
+                continue
+
+            joint_samples = samples.setdefault(exercise, {joint: [] for joint in CURVE_JOINTS[exercise]})
+            for joint, values in series.items():
+                joint_samples[joint].extend(
+                    time_normalize(timestamps, values, start, end, steps) for start, end in reps
+                )
+            sources.setdefault(exercise, []).append(video.name)
+    finally:
+        pose.close()
+
+    curves = {}
+    for exercise, joint_samples in samples.items():
+        stacked = np.stack([np.stack(reps) for reps in joint_samples.values()])  # (joints, reps, steps)
+        curves[exercise] = {
+            "curves": np.stack([stacked.mean(axis=1), stacked.var(axis=1)], axis=1).astype(np.float32),
+            "joints": list(joint_samples),
+            "reps": stacked.shape[1],
+            "videos": sources[exercise],
+        }
+    return curves
+
+def write_curves(curves, steps, output_dir=REFERENCE_CURVES_DIR):
+    """Write one .npy table per exercise and the index that reference_poses loads"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index = {"steps": steps, "exercises": {}}
+    for exercise, entry in sorted(curves.items()):
+        file_name = f"{exercise}.npy"
+        np.save(output_dir / file_name, entry["curves"])
+        index["exercises"][exercise] = {
+            "file": file_name,
+            "joints": entry["joints"],
+            "reps": entry["reps"],
+            "videos": entry["videos"],
+        }
+    with open(output_dir / REFERENCE_CURVES_INDEX, "w") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Build reference angle curves from exercise videos")
+    parser.add_argument("paths", nargs="*", default=[str(DEFAULT_VIDEOS)],
+                        help="Video files or directories of videos (default: side views in data/video)")
+    parser.add_argument("--steps", type=int, default=CURVE_CONFIG["STEPS"], help="Progress samples per curve")
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--output", default=str(REFERENCE_CURVES_DIR), help="Directory for the curve tables")
+    args = parser.parse_args()
+
+    videos = find_videos(args.paths, is_side_view)
+    if not videos:
+        parser.error("No videos found")
+
+    started = time.perf_counter()
+    curves = build_curves(videos, args.steps, args.model_complexity)
+    write_curves(curves, args.steps, args.output)
+
+    for exercise, entry in sorted(curves.items()):
+        means = entry["curves"][:, 0]
+        ranges = ", ".join(f"{joint} {mean[0]:.0f}->{mean[-1]:.0f}"
+                           for joint, mean in zip(entry["joints"], means))
+        print(f"  {exercise}: {entry['reps']} reps ({ranges})")
+    print(f"{len(curves)} exercises from {len(videos)} videos in "
+          f"{time.perf_counter() - started:.1f}s. Curves saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Calibration Store
+-----------------
+Bounded, persistent storage for user skeleton calibrations.
+
+Calibrations are written to a SQLite database, so they survive restarts and are
+shared by every worker process on the host, and the most recently used ones are
+kept in an in-memory LRU cache (at most max_entries). Calibrations expire ttl
+seconds after they were created; expired rows are purged from the database when
+new calibrations are stored.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+# Next to the backend code by default, independent of the working directory
+CALIBRATION_DB = Path(os.environ.get(
+    "REGENIX_CALIBRATION_DB", Path(__file__).resolve().parent / "calibrations.db"
+))
+
+class CalibrationStore:
+    """SQLite-backed calibration store with an LRU/TTL memory cache"""
+
+    def __init__(self, db_path=CALIBRATION_DB, max_entries=1024, ttl=7 * 24 * 3600):
+        self._db_path = str(db_path)
+        self._entries = OrderedDict()  # calibration_id -> (created, calibration)
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        # Opened on first use; callers hold self._lock
+        if self._db is None:
+            self._db = sqlite3.connect(self._db_path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS calibrations "
+                "(id TEXT PRIMARY KEY, created REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            # put() purges expired rows by creation time on every write
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS calibrations_created ON calibrations (created)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _remember(self, calibration_id, created, calibration):
+        self._entries[calibration_id] = (created, calibration)
+        self._entries.move_to_end(calibration_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, calibration):
+        """Store a calibration and return its new ID"""
+        calibration_id = str(uuid.uuid4())
+        created = time.time()
+        data = json.dumps(calibration)
+        with self._lock:
+            db = self._connection()
+            db.execute("DELETE FROM calibrations WHERE created < ?", (created - self._ttl,))
+            db.execute("INSERT INTO calibrations (id, created, data) VALUES (?, ?, ?)",
+                       (calibration_id, created, data))
+            db.commit()
+            self._remember(calibration_id, created, calibration)
+        return calibration_id
+
+    def get(self, calibration_id):
+        """
+        Return the calibration stored under an ID, or None if it is unknown or expired.
+        The returned dict is shared between callers and must not be modified.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(calibration_id)
+            if entry is None:
+                row = self._connection().execute(
+                    "SELECT created, data FROM calibrations WHERE id = ?", (calibration_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (row[0], json.loads(row[1]))
+            if now - entry[0] > self._ttl:
+                self._entries.pop(calibration_id, None)
+                return None
+            self._remember(calibration_id, *entry)
+            return entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,16 @@
+# conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The backend modules import each other as top-level modules (e.g. "from state import ...")
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Keep session logs and calibrations written by the tests out of the source tree
+_scratch = Path(tempfile.mkdtemp(prefix="regenix-tests-"))
+os.environ.setdefault("REGENIX_SESSION_LOGS", str(_scratch / "session_logs"))
+os.environ.setdefault("REGENIX_CALIBRATION_DB", str(_scratch / "calibrations.db"))
+
+# Manual checks against a running API server (python test_api_feedback.py [url]), not unit tests
+collect_ignore = ["test_api_consistency.py", "test_api_feedback.py"]
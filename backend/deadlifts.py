@@ -1,143 +1,70 @@
-import numpy as np
 import time
 from state import exercise_state
+from kinematics import frame_kinematics
+from visibility import not_visible_response, visible_sides
 from feedback_config import DEADLIFT_CONFIG, DEADLIFT_METRICS, ADVANCED_FEEDBACK, FEEDBACK_TO_JOINTS
 from score_config import calculate_rep_score
+from rep_counter import advance_rep_phase
 
-def calculate_angle(a, b, c):
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0:
-         angle = 360 - angle
-    return angle
-
-def calculate_bar_path_deviation(shoulder, hip, knee, ankle):
-    """Calculate how far the bar (approximated at hip) deviates from mid-foot line"""
-    hip = np.array(hip)
-    ankle = np.array(ankle)
-    
-    # Ideal bar path should be straight down over mid-foot
-    midfoot_x = ankle[0]  # Assume midfoot is at same x as ankle
-    
-    # Calculate deviation as horizontal distance from hip to midfoot line
-    deviation = abs(hip[0] - midfoot_x)
-    
-    # Normalize by height (hip to ankle distance)
-    height = abs(hip[1] - ankle[1]) 
-    if height == 0:  # Avoid division by zero
-        return 0
-        
-    normalized_deviation = deviation / height
-    return normalized_deviation
-
-def process_landmarks(landmarks, tolerance=0.0, session_id=None):
+def process_landmarks(landmarks, tolerance=0.0, session_id=None, client_id=None,
+                      timestamp=None, kinematics=None):
     """
     Process landmarks for deadlift form analysis with enhanced feedback and advanced metrics
     """
-    back_angles = []
-    hip_angles = []
-    bar_path_deviations = []
-    lumbar_curvatures = []  # New metric
+    # Record timestamp for tempo analysis (client capture time when provided)
+    current_time = timestamp if timestamp is not None else time.time()
     
-    # Record timestamp for tempo analysis
-    current_time = time.time()
+    # Joint metrics of the frame, each computed when first read (batches pass them precomputed)
+    if kinematics is not None:
+        kin = kinematics
+    else:
+        try:
+            kin = frame_kinematics(landmarks)
+        except ValueError:
+            return {"error": "Insufficient landmarks data."}
     
-    # Calculate back angle (neck to hips to knees)
-    try:
-        # Neck (upper back): use nose as a proxy if neck isn't reliable
-        neck = [landmarks[0]['x'], landmarks[0]['y']]  # Use nose as a reference point
-        
-        # Mid hip point for better center of mass representation
-        mid_hip = [(landmarks[23]['x'] + landmarks[24]['x'])/2, 
-                   (landmarks[23]['y'] + landmarks[24]['y'])/2]
-        
-        # Mid knee point
-        mid_knee = [(landmarks[25]['x'] + landmarks[26]['x'])/2, 
-                    (landmarks[25]['y'] + landmarks[26]['y'])/2]
-                    
-        # Mid ankle point
-        mid_ankle = [(landmarks[27]['x'] + landmarks[28]['x'])/2, 
-                    (landmarks[27]['y'] + landmarks[28]['y'])/2]
-        
-        # Mid shoulder
-        mid_shoulder = [(landmarks[11]['x'] + landmarks[12]['x'])/2,
-                        (landmarks[11]['y'] + landmarks[12]['y'])/2]
-        
-        # Back angle is the angle from neck through hips to knees
-        back_angle = calculate_angle(neck, mid_hip, mid_knee)
-        back_angles.append(back_angle)
-        
-        # Hip angle (shoulder-hip-knee) for hip hinge depth
-        hip_angle = calculate_angle(mid_shoulder, mid_hip, mid_knee)
-        hip_angles.append(hip_angle)
-        
-        # Calculate bar path deviation (new metric)
-        bar_deviation = calculate_bar_path_deviation(mid_shoulder, mid_hip, mid_knee, mid_ankle)
-        bar_path_deviations.append(bar_deviation)
-        
-        # Approximate lumbar curve by finding mid-point deviation (simplified)
-        # In a real implementation, you would use more spine points if available
-        mid_back_y = (neck[1] + mid_hip[1]) / 2
-        expected_mid_back_x = (neck[0] + mid_hip[0]) / 2
-        
-        # Use a mid-back landmark if available, or approximate
-        if 7 in landmarks:  # If mid-back point is available
-            actual_mid_back = [landmarks[7]['x'], landmarks[7]['y']]
-        else:
-            # Approximate mid-back position
-            actual_mid_back = [expected_mid_back_x, mid_back_y]
-            
-        # Measure curve as horizontal deviation from straight line
-        lumbar_deviation = abs(actual_mid_back[0] - expected_mid_back_x)
-        height = abs(neck[1] - mid_hip[1])
-        lumbar_curvature = (lumbar_deviation / height) * 100 if height > 0 else 0
-        lumbar_curvatures.append(lumbar_curvature)
-        
-    except Exception as e:
-        pass
-
-    if not back_angles:
-        return {"error": "Insufficient landmarks data."}
-
-    # Average the angles and metrics
-    avg_back_angle = sum(back_angles) / len(back_angles)
-    avg_hip_angle = sum(hip_angles) / len(hip_angles) if hip_angles else 180
-    avg_bar_deviation = sum(bar_path_deviations) / len(bar_path_deviations) if bar_path_deviations else 0
-    avg_lumbar_curvature = sum(lumbar_curvatures) / len(lumbar_curvatures) if lumbar_curvatures else 0
+    # State is kept per client; fall back to the session when no client id is given
+    client_key = client_id or session_id
 
     # Retrieve the current state
     state = exercise_state.get("deadlifts", {
         "repCount": 0, 
         "stage": "up", 
-        "feedback": "N/A",
-        "last_stage_time": current_time
-    })
+        "feedback": "N/A"
+    }, client_key)
+
+    # Skip frames whose key joints are occluded; analyze only the better-visible side
+    sides = visible_sides(kin, "deadlifts")
+    if not sides:
+        return not_visible_response(state, "repCount")
+    side = sides[0]
+    
+    # Back angle is the angle from the nose (neck proxy) through the hip to the knee
+    avg_back_angle = kin[f"{side}_back_angle"]
+    
+    # Hip angle (shoulder-hip-knee) for hip hinge depth
+    avg_hip_angle = kin[f"{side}_hip_angle"]
     
-    stage = state.get("stage", "up")
+    # Bar path deviation: hip (bar proxy) distance from the mid-foot line
+    avg_bar_deviation = kin[f"{side}_bar_path_deviation"]
+    
+    # Lumbar curvature would need a mid-spine landmark, which MediaPipe's 33-point
+    # model doesn't provide; the straight-line approximation yields no deviation
+    avg_lumbar_curvature = 0
+
     counter = state.get("repCount", 0)
     prev_counter = counter  # Track for new rep detection
-    last_stage_time = state.get("last_stage_time", current_time)
-    
-    # Calculate phase timing
-    phase_duration = current_time - last_stage_time
 
-    # Deadlift detection logic
-    if avg_back_angle > 160:  # Standing upright
-        if stage == "down":
-            stage = "up"
-            counter += 1
-            # Store concentric phase duration
-            state["concentric_time"] = phase_duration
-            last_stage_time = current_time
-    elif avg_back_angle < DEADLIFT_CONFIG["HIP_HINGE_DEPTH_MIN"]:  # Bent position
-        if stage == "up":
-            stage = "down"
-            # Store eccentric phase duration
-            state["eccentric_time"] = phase_duration
-            last_stage_time = current_time
+    # Deadlift detection: standing (up) <-> hinged (down) on the back angle; a rep counts on lockout
+    transition = advance_rep_phase("deadlifts", avg_back_angle, state.get("stage", "up"),
+                                   state.get("rep_phase"), current_time)
+    stage = transition["stage"]
+    if transition["event"] == "enter":
+        state["eccentric_time"] = transition["duration"]    # Lowering from standing into the hinge
+    elif transition["event"] == "exit":
+        state["concentric_time"] = transition["duration"]   # Lifting from the hinge back to standing
+    if transition["rep_completed"]:
+        counter += 1
 
     # Generate detailed feedback
     feedback_flags = []
@@ -255,7 +182,7 @@ def process_landmarks(landmarks, tolerance=0.0, session_id=None):
         "hipAngle": avg_hip_angle,
         "barDeviation": avg_bar_deviation,
         "lumbarCurvature": avg_lumbar_curvature,
-        "last_stage_time": last_stage_time,
+        "rep_phase": transition["phase"],
         "concentric_time": state.get("concentric_time", 0),
         "eccentric_time": state.get("eccentric_time", 0),
         "feedback": feedback_message.strip(),
@@ -268,5 +195,5 @@ def process_landmarks(landmarks, tolerance=0.0, session_id=None):
         "affected_segments": affected_segments
     }
     
-    exercise_state["deadlifts"] = new_state
+    exercise_state.set("deadlifts", new_state, client_key)
     return new_state
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Exercise Recognition
+--------------------
+Sliding-window exercise recognition with the sequence models from
+ExerciseDecoder.ipynb (LSTM / attention LSTM over 30 frames x 132 features).
+
+Each client gets a SequenceBuffer: a preallocated (30, 132) float32 ring buffer
+that every incoming frame is written into in place, so streaming frames causes
+no per-frame allocation. Once the buffer is full, every STRIDE frames (15, i.e.
+windows overlapping by 15 frames as in training) the current window is put in
+time order and classified. Windows from concurrent clients are batched into one
+model call by a MicroBatcher. The latest detection is kept with the buffer, so
+the API can tell which exercise is being performed. Requests without a client or
+session id get a buffer of their own that is dropped afterwards, so anonymous
+callers never share a window (their frames must then fill one in a single request).
+
+The model is a Keras .h5 file saved by the notebook; TensorFlow is optional and
+only needed when recognition is used. SEQUENCE_MODEL_CONFIG names the file and
+its class labels (the notebook's `actions`, in training order).
+"""
+import os
+import threading
+
+import numpy as np
+
+from form_classifier import MODEL_DIR
+from kinematics import stack_frames
+from landmark_format import NUM_LANDMARKS, VALUES_PER_LANDMARK
+from micro_batcher import MicroBatcher
+from state import exercise_state
+
+SEQUENCE_MODEL_CONFIG = {
+    "MODEL_PATH": os.environ.get("REGENIX_SEQUENCE_MODEL", str(MODEL_DIR / "LSTM_Attention_128HUs.h5")),
+    "LABELS": ("curl", "press", "squat"),   # Model output order
+    "WINDOW": 30,                           # Frames per sequence (1 second at 30 FPS)
+    "STRIDE": 15,                           # Classify every 15 frames (15-frame overlap)
+    "MIN_CONFIDENCE": 0.5,                  # Below this no exercise is reported
+}
+
+# Model labels mapped to the exercise names used by the API (None = no analyzer)
+LABEL_TO_EXERCISE = {
+    "curl": "bicep_curls",
+    "press": None,
+    "squat": "squats",
+    "squats": "squats",
+    "pushups": "pushups",
+    "deadlifts": "deadlifts",
+    "lunges": "lunges",
+    "situps": "situps",
+    "bicep_curls": "bicep_curls",
+}
+
+# Key of the sequence buffer in the per-client exercise state store
+BUFFER_STATE_KEY = "sequence_buffer"
+
+class SequenceBuffer:
+    """Fixed-size ring buffer of the most recent frames, flattened to feature vectors"""
+
+    def __init__(self, window=None, features=NUM_LANDMARKS * VALUES_PER_LANDMARK):
+        self.window = window or SEQUENCE_MODEL_CONFIG["WINDOW"]
+        self.data = np.zeros((self.window, features), dtype=np.float32)
+        self.frames_seen = 0
+        self.last_detection = None
+        # Row order that puts the oldest frame first, per write position
+        self._orders = [np.roll(np.arange(self.window), -start) for start in range(self.window)]
+
+    @property
+    def full(self):
+        return self.frames_seen >= self.window
+
+    def push(self, frame):
+        """Write one (33, 4) frame (or 132 values) over the oldest row"""
+        self.data[self.frames_seen % self.window] = np.ravel(frame)
+        self.frames_seen += 1
+
+    def ordered(self, out=None):
+        """The buffered frames oldest first, as a (window, features) array"""
+        order = self._orders[self.frames_seen % self.window]
+        return np.take(self.data, order, axis=0, out=out)
+
+    def reset(self):
+        self.frames_seen = 0
+        self.last_detection = None
+
+_buffer_lock = threading.Lock()
+
+class ExerciseRecognizer:
+    """Classifies the exercise in each client's sliding window with a Keras sequence model"""
+
+    def __init__(self, model_path=None, labels=None, stride=None, min_confidence=None):
+        self.model_path = model_path or SEQUENCE_MODEL_CONFIG["MODEL_PATH"]
+        self.labels = tuple(labels or SEQUENCE_MODEL_CONFIG["LABELS"])
+        self.stride = stride or SEQUENCE_MODEL_CONFIG["STRIDE"]
+        self.min_confidence = (SEQUENCE_MODEL_CONFIG["MIN_CONFIDENCE"]
+                               if min_confidence is None else min_confidence)
+        self.model = None
+        self.load_error = None
+        self._attempted = False
+        self._lock = threading.Lock()
+        self._batcher = MicroBatcher(self.predict_windows)
+
+    @property
+    def available(self):
+        return self.load() is not None
+
+    def load(self):
+        """Load the model once; returns it, or None if it can't be loaded"""
+        if not self._attempted:
+            with self._lock:
+                if not self._attempted:
+                    try:
+                        from tensorflow.keras.models import load_model
+                        self.model = load_model(self.model_path)
+                    except Exception as e:
+                        self.load_error = f"{type(e).__name__}: {e}"
+                        print(f"Exercise recognition unavailable ({self.load_error})")
+                    self._attempted = True
+        return self.model
+
+    def predict_windows(self, windows):
+        """Classify a list of (window, 132) sequences with one model call"""
+        probabilities = np.asarray(self.model.predict(np.stack(windows), verbose=0))
+        return [self._detection(row) for row in probabilities]
+
+    def _detection(self, probabilities):
+        best = int(probabilities.argmax())
+        confidence = float(probabilities[best])
+        label = self.labels[best]
+        return {
+            "exercise": LABEL_TO_EXERCISE.get(label) if confidence >= self.min_confidence else None,
+            "label": label,
+            "confidence": round(confidence, 3),
+            "probabilities": {name: round(float(p), 3) for name, p in zip(self.labels, probabilities)}
+        }
+
+    def client_buffer(self, client_key):
+        """The client's buffer, created on first use (a new unstored buffer when client_key is None)"""
+        if client_key is None:
+            return SequenceBuffer()
+        with _buffer_lock:
+            buffer = exercise_state.get(BUFFER_STATE_KEY, None, client_key)
+            if not isinstance(buffer, SequenceBuffer):
+                buffer = SequenceBuffer()
+                exercise_state.set(BUFFER_STATE_KEY, buffer, client_key)
+            return buffer
+
+    async def observe(self, frames, client_key=None):
+        """
+        Add frames to the client's window and classify it when a stride boundary is reached.
+
+        Args:
+            frames: One (33, 4) frame or a stack/list of frames, in capture order
+            client_key: Client whose buffer is used (None classifies the frames
+                with a buffer that is not kept)
+
+        Returns:
+            Dictionary with frames_seen and the latest detection (None until the
+            first full window has been classified). Raises ValueError for malformed frames.
+        """
+        frames = stack_frames(frames)
+        buffer = self.client_buffer(client_key)
+        due = False
+        for frame in frames:
+            buffer.push(frame)
+            if buffer.full and (buffer.frames_seen - buffer.window) % self.stride == 0:
+                due = True
+        if due:
+            # Only the newest window matters; the copy keeps it stable while queued
+            buffer.last_detection = await self._batcher.submit(buffer.ordered())
+        return {"frames_seen": buffer.frames_seen, "detection": buffer.last_detection}
+
+    def reset(self, client_key=None):
+        """Start the client's window over (e.g. when a new set begins)"""
+        exercise_state.set(BUFFER_STATE_KEY, None, client_key)
+
+_recognizer = None
+
+def get_recognizer():
+    """Return the shared recognizer if its model can be loaded, else None"""
+    global _recognizer
+    if _recognizer is None:
+        _recognizer = ExerciseRecognizer()
+    return _recognizer if _recognizer.available else None
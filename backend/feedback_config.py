@@ -141,6 +141,67 @@ BICEP_CURL_CONFIG = {
     }
 }
 
+# Rep counting state machines (driven by rep_counter.py)
+# Each rep cycles between a rest stage and an active stage, tracked on one angle:
+# - the active stage is entered when the angle drops below ENTER_ACTIVE
+# - it is left again once the angle rises above EXIT_ACTIVE
+# The gap between the two thresholds is the hysteresis band. A stage must be held
+# for MIN_DWELL seconds or MIN_DWELL_FRAMES frames (whichever comes first) before
+# it can change again, which suppresses flapping around a threshold.
+# COUNT_ON selects whether a rep is counted on entering ("enter") or leaving
+# ("exit") the active stage.
+REP_COUNTING = {
+    "squats": {
+        "REST_STAGE": "up", "ACTIVE_STAGE": "down",            # Knee angle
+        "ENTER_ACTIVE": SQUAT_CONFIG["KNEE_ANGLE_MIN"] + 5, "EXIT_ACTIVE": 160,
+        "COUNT_ON": "enter", "MIN_DWELL": 0.1, "MIN_DWELL_FRAMES": 3
+    },
+    "deadlifts": {
+        "REST_STAGE": "up", "ACTIVE_STAGE": "down",            # Back angle
+        "ENTER_ACTIVE": DEADLIFT_CONFIG["HIP_HINGE_DEPTH_MIN"], "EXIT_ACTIVE": 160,
+        "COUNT_ON": "exit", "MIN_DWELL": 0.1, "MIN_DWELL_FRAMES": 3
+    },
+    "pushups": {
+        "REST_STAGE": "up", "ACTIVE_STAGE": "down",            # Elbow angle
+        "ENTER_ACTIVE": PUSHUP_CONFIG["ELBOW_ANGLE_MIN"] + 10, "EXIT_ACTIVE": 150,
+        "COUNT_ON": "enter", "MIN_DWELL": 0.1, "MIN_DWELL_FRAMES": 3
+    },
+    "lunges": {
+        "REST_STAGE": "up", "ACTIVE_STAGE": "down",            # Front (smaller) knee angle
+        "ENTER_ACTIVE": LUNGE_CONFIG["FRONT_KNEE_ANGLE_MIN"] + 5, "EXIT_ACTIVE": 150,
+        "COUNT_ON": "enter", "MIN_DWELL": 0.1, "MIN_DWELL_FRAMES": 3
+    },
+    "situps": {
+        "REST_STAGE": "down", "ACTIVE_STAGE": "up",            # Hip angle
+        "ENTER_ACTIVE": 120, "EXIT_ACTIVE": 160,
+        "COUNT_ON": "enter", "MIN_DWELL": 0.1, "MIN_DWELL_FRAMES": 3
+    },
+    "bicep_curls": {
+        "REST_STAGE": "down", "ACTIVE_STAGE": "up",            # Elbow angle
+        "ENTER_ACTIVE": BICEP_CURL_CONFIG["ELBOW_ANGLE_MAX"] + 10, "EXIT_ACTIVE": BICEP_CURL_CONFIG["ELBOW_EXTENSION_MIN"],
+        "COUNT_ON": "enter", "MIN_DWELL": 0.1, "MIN_DWELL_FRAMES": 3
+    },
+}
+
+# Visibility gating (applied by visibility.py)
+# Landmarks with visibility below VISIBILITY_THRESHOLD count as missing, the same
+# cut-off used when preparing the training data. A body side is usable when all of
+# the exercise's SIDE_JOINTS are visible on it, and only the better-visible side is
+# analyzed, so side views use the side facing the camera. BOTH_SIDES exercises
+# measure both sides at once (lunges: front and rear leg) and need both sides
+# visible. Frames that don't qualify, or have a missing CENTER_JOINT, are skipped
+# without touching the rep state; the response keeps the current count and stage.
+VISIBILITY_THRESHOLD = 0.5
+
+VISIBILITY_GATING = {
+    "squats": {"SIDE_JOINTS": ["shoulder", "hip", "knee", "ankle"], "CENTER_JOINTS": [], "BOTH_SIDES": False},
+    "deadlifts": {"SIDE_JOINTS": ["shoulder", "hip", "knee"], "CENTER_JOINTS": ["nose"], "BOTH_SIDES": False},
+    "pushups": {"SIDE_JOINTS": ["shoulder", "elbow", "wrist"], "CENTER_JOINTS": [], "BOTH_SIDES": False},
+    "lunges": {"SIDE_JOINTS": ["shoulder", "hip", "knee", "ankle"], "CENTER_JOINTS": [], "BOTH_SIDES": True},
+    "situps": {"SIDE_JOINTS": ["shoulder", "hip", "knee"], "CENTER_JOINTS": ["nose"], "BOTH_SIDES": False},
+    "bicep_curls": {"SIDE_JOINTS": ["shoulder", "elbow", "wrist"], "CENTER_JOINTS": [], "BOTH_SIDES": False},
+}
+
 # Add joint groups for color feedback
 JOINT_GROUPS = {
     "knees": ["left_knee", "right_knee"],
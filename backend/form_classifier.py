@@ -0,0 +1,153 @@
+"""
+Form Classifier
+---------------
+Serves the trained scikit-learn pose classifiers next to the rule-based analysis.
+
+deadlift.pkl is a Pipeline (StandardScaler + RandomForestClassifier) trained on
+the 132 landmark columns x1, y1, z1, v1 ... v33 listed in landmarks.py, which is
+exactly a (33, 4) landmark frame flattened row by row. The model is unpickled
+once, its feature order is checked against those columns, and from then on a
+batch of N frames is one (N, 132) predict_proba call instead of one single-row
+DataFrame per frame. Models fitted with column names get the batch as one
+DataFrame with those names (about 75 us, pandas is needed to train them anyway);
+others get the plain NumPy array. Single frames
+from concurrent requests are pooled into such batches by a MicroBatcher (see
+classify_async).
+
+scikit-learn is optional. Without it, or when the installed version can't load
+the pickle, the classifier reports itself unavailable and the API serves the
+rule-based analysis alone.
+"""
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from kinematics import as_frame
+from landmarks import landmarks as LANDMARK_COLUMNS
+from micro_batcher import MicroBatcher
+
+MODEL_DIR = Path(__file__).resolve().parent
+
+class FormClassifier:
+    """A pickled scikit-learn classifier over flattened (33, 4) landmark frames"""
+
+    def __init__(self, exercise, model_path, feature_columns=LANDMARK_COLUMNS):
+        self.exercise = exercise
+        self.model_path = Path(model_path)
+        self.feature_columns = list(feature_columns)
+        self.model = None
+        self.classes = ()
+        self.named_features = False
+        self.load_error = None
+        self._attempted = False
+        self._lock = threading.Lock()
+        self._batcher = None
+
+    @property
+    def available(self):
+        """True once the model is loaded (loads it on first access)"""
+        return self.load() is not None
+
+    def load(self):
+        """Load the model once; returns it, or None if it can't be loaded"""
+        if not self._attempted:
+            with self._lock:
+                if not self._attempted:
+                    try:
+                        self.model = self._load_model()
+                        self.classes = tuple(str(label) for label in self.model.classes_)
+                    except Exception as e:
+                        self.load_error = f"{type(e).__name__}: {e}"
+                        print(f"Form classifier for {self.exercise} unavailable ({self.load_error})")
+                    self._attempted = True
+        return self.model
+
+    def _load_model(self):
+        import sklearn  # noqa: F401 - fail early with ImportError when scikit-learn is missing
+
+        with open(self.model_path, "rb") as f:
+            model = pickle.load(f)
+
+        # The pipeline was fitted on a DataFrame. Check its column order once; frames
+        # are then passed under the same names.
+        feature_names = getattr(model, "feature_names_in_", None)
+        if feature_names is not None:
+            if list(feature_names) != self.feature_columns:
+                raise ValueError(f"{self.model_path.name} expects different feature columns")
+            import pandas  # noqa: F401 - fail early with ImportError when pandas is missing
+            self.named_features = True
+        if getattr(model, "n_features_in_", len(self.feature_columns)) != len(self.feature_columns):
+            raise ValueError(f"{self.model_path.name} expects {model.n_features_in_} features")
+        return model
+
+    def predict_proba(self, frames):
+        """
+        Class probabilities for a (33, 4) frame or a (N, 33, 4) stack of frames.
+
+        Returns an (N, n_classes) array (columns in self.classes order), or None when
+        the model is unavailable. Raises ValueError for malformed frames.
+        """
+        model = self.load()
+        if model is None:
+            return None
+        frames = as_frame(frames)
+        features = frames.reshape(-1, len(self.feature_columns))
+        if self.named_features:
+            import pandas as pd
+            features = pd.DataFrame(features, columns=self.feature_columns)
+        return model.predict_proba(features)
+
+    def classify(self, frames):
+        """
+        Classify a (33, 4) frame or a (N, 33, 4) stack of frames.
+
+        Returns one {"class", "confidence"} dict per frame, or None when the model
+        is unavailable.
+        """
+        probabilities = self.predict_proba(frames)
+        if probabilities is None:
+            return None
+        best = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(best)), best]
+        return [
+            {"class": self.classes[index], "confidence": round(float(confidence), 3)}
+            for index, confidence in zip(best.tolist(), confidences.tolist())
+        ]
+
+    async def classify_async(self, frame):
+        """
+        Classify one (33, 4) frame from a request handler.
+
+        Frames submitted concurrently (by other requests or connections) are
+        classified together in one batched call. Raises ValueError for a
+        malformed frame.
+        """
+        frame = as_frame(frame)
+        if frame.ndim != 2:
+            raise ValueError("classify_async expects a single (33, 4) frame")
+        if self._batcher is None:
+            self._batcher = MicroBatcher(self._classify_batch)
+        return await self._batcher.submit(frame)
+
+    def _classify_batch(self, frames):
+        results = self.classify(np.stack(frames))
+        return results if results is not None else [None] * len(frames)
+
+# Registered classifiers: exercise name -> classifier
+CLASSIFIERS = {
+    "deadlifts": FormClassifier("deadlifts", MODEL_DIR / "deadlift.pkl"),
+}
+
+def get_classifier(exercise):
+    """Return the classifier for an exercise if one is registered and loadable, else None"""
+    classifier = CLASSIFIERS.get(exercise)
+    if classifier is None or not classifier.available:
+        return None
+    return classifier
+
+def preload_classifiers():
+    """Load all registered models ahead of the first request"""
+    for classifier in CLASSIFIERS.values():
+        classifier.load()
@@ -0,0 +1,70 @@
+"""
+Import-Time Report
+------------------
+Measures how long importing the API (main.py) takes in a fresh interpreter,
+with the exercise analyzers preloaded and with REGENIX_LAZY_IMPORTS=1, and
+lists the modules that dominate startup (from Python's -X importtime output).
+
+Usage:
+    python import_report.py
+    python import_report.py --top 20 --module main
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+def measure_import(module="main", lazy=False):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        (wall_seconds, imports) where imports is a list of
+        (cumulative_us, self_us, depth, name) for every imported module
+    """
+    env = dict(os.environ, REGENIX_LAZY_IMPORTS="1" if lazy else "0")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=Path(__file__).parent, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return wall, imports
+
+def print_report(module="main", top=10):
+    for lazy in (False, True):
+        wall, imports = measure_import(module, lazy)
+        total_ms = sum(cumulative for cumulative, _, depth, _ in imports if depth == 0) / 1000
+        mode = "lazy (REGENIX_LAZY_IMPORTS=1)" if lazy else "preloaded (default)"
+        print(f"\n{mode}: {wall:.2f}s wall, {total_ms:.0f} ms importing {len(imports)} modules")
+
+        # Top-level packages the startup path pulls in, by cumulative time
+        packages = {}
+        for cumulative, _, depth, name in imports:
+            if depth <= 1 and name != module:
+                root = name.split(".")[0]
+                packages[root] = max(packages.get(root, 0), cumulative)
+        for name, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import-time cost of starting the API")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=10, help="Number of packages to list")
+    args = parser.parse_args()
+    print_report(args.module, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Kinematics Core
+---------------
+Vectorized joint-angle and body-geometry computations shared by all exercise modules.
+
+Stacks of frames with shape (N, 33, 4) (x, y, z, visibility) - batch uploads and
+videos - are computed in a single batched NumPy pass: derived points (mid-shoulder,
+mid-hip, ...) are appended to the landmark coordinates and every joint angle is
+evaluated with one arctan2 call over all joint triplets.
+
+A single frame is too small for that to pay off: the fixed cost of the NumPy calls
+dominates. frame_kinematics instead reads the 13 landmarks the metrics use and
+computes each metric with scalar math the first time an analyzer reads it, so a
+frame only pays for the handful of metrics its exercise needs.
+"""
+import math
+
+import numpy as np
+
+from landmark_format import NUM_LANDMARKS, VALUES_PER_LANDMARK, landmarks_to_array
+
+# MediaPipe landmark indices used by the exercise modules
+NOSE = 0
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_ELBOW, RIGHT_ELBOW = 13, 14
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+# Derived points appended after the 33 landmarks
+MID_SHOULDER, MID_HIP, MID_KNEE, MID_ANKLE, NECK, LEFT_NECK, RIGHT_NECK = range(NUM_LANDMARKS, NUM_LANDMARKS + 7)
+
+# Vertical offset used to estimate the neck position above the (mid-)shoulder point
+NECK_OFFSET = 0.05
+
+# Joint angles as (name, first point, vertex, end point)
+ANGLE_TRIPLETS = [
+    ("left_knee_angle", LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    ("right_knee_angle", RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+    ("left_elbow_angle", LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    ("right_elbow_angle", RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    ("left_hip_angle", LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    ("right_hip_angle", RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    ("back_angle", NOSE, MID_HIP, MID_KNEE),              # Nose through hips to knees
+    ("left_back_angle", NOSE, LEFT_HIP, LEFT_KNEE),       # The same on one side (side views)
+    ("right_back_angle", NOSE, RIGHT_HIP, RIGHT_KNEE),
+    ("mid_hip_angle", MID_SHOULDER, MID_HIP, MID_KNEE),   # Hip hinge on the body midline
+    ("neck_angle", NOSE, NECK, MID_SHOULDER),
+    ("left_neck_angle", NOSE, LEFT_NECK, LEFT_SHOULDER),  # The same above one shoulder
+    ("right_neck_angle", NOSE, RIGHT_NECK, RIGHT_SHOULDER),
+]
+
+# Landmarks whose visibility is reported (used for gating, see visibility.py)
+VISIBILITY_LANDMARKS = {
+    "nose": NOSE,
+    "left_shoulder": LEFT_SHOULDER, "right_shoulder": RIGHT_SHOULDER,
+    "left_elbow": LEFT_ELBOW, "right_elbow": RIGHT_ELBOW,
+    "left_wrist": LEFT_WRIST, "right_wrist": RIGHT_WRIST,
+    "left_hip": LEFT_HIP, "right_hip": RIGHT_HIP,
+    "left_knee": LEFT_KNEE, "right_knee": RIGHT_KNEE,
+    "left_ankle": LEFT_ANKLE, "right_ankle": RIGHT_ANKLE,
+}
+
+_ANGLE_NAMES = [t[0] for t in ANGLE_TRIPLETS]
+_ANGLE_A = [t[1] for t in ANGLE_TRIPLETS]
+_ANGLE_B = [t[2] for t in ANGLE_TRIPLETS]
+_ANGLE_C = [t[3] for t in ANGLE_TRIPLETS]
+
+def as_frame(landmarks):
+    """
+    Convert landmarks to a float64 (33, 4) array.
+
+    Accepts a JSON landmark list or an array (e.g. a decoded binary frame).
+    Raises ValueError if the landmarks are incomplete or malformed.
+    """
+    if isinstance(landmarks, np.ndarray):
+        frame = landmarks.astype(np.float64, copy=False)
+    else:
+        try:
+            frame = landmarks_to_array(landmarks, dtype=np.float64)
+        except (TypeError, AttributeError, KeyError) as e:
+            raise ValueError(f"Malformed landmarks: {e}")
+    if frame.shape[-2:] != (NUM_LANDMARKS, VALUES_PER_LANDMARK):
+        raise ValueError(f"Expected landmarks of shape (..., {NUM_LANDMARKS}, {VALUES_PER_LANDMARK}), got {frame.shape}")
+    return frame
+
+def extended_points(frames):
+    """Return (..., 40, 2) xy coordinates: the 33 landmarks followed by the derived points"""
+    xy = frames[..., :2]
+    mid_shoulder = (xy[..., LEFT_SHOULDER, :] + xy[..., RIGHT_SHOULDER, :]) / 2
+    mid_hip = (xy[..., LEFT_HIP, :] + xy[..., RIGHT_HIP, :]) / 2
+    mid_knee = (xy[..., LEFT_KNEE, :] + xy[..., RIGHT_KNEE, :]) / 2
+    mid_ankle = (xy[..., LEFT_ANKLE, :] + xy[..., RIGHT_ANKLE, :]) / 2
+    neck_offset = np.array([0.0, NECK_OFFSET])
+    derived = np.stack([mid_shoulder, mid_hip, mid_knee, mid_ankle, mid_shoulder - neck_offset,
+                        xy[..., LEFT_SHOULDER, :] - neck_offset, xy[..., RIGHT_SHOULDER, :] - neck_offset], axis=-2)
+    return np.concatenate([xy, derived], axis=-2)
+
+def joint_angles(a, b, c):
+    """Angle at b (degrees, 0-180) for arrays of points a, b, c with shape (..., 2)"""
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angle = np.abs(radians * 180.0 / np.pi)
+    return np.where(angle > 180.0, 360.0 - angle, angle)
+
+def torso_angles(shoulder, hip):
+    """Torso angle from vertical (0 degrees is upright, 0 for a degenerate torso)"""
+    torso = shoulder - hip
+    length = np.hypot(torso[..., 0], torso[..., 1])
+    safe_length = np.where(length == 0, 1.0, length)
+    # Dot product with the upward vertical vector (0, -1)
+    cosine = np.clip(-torso[..., 1] / safe_length, -1.0, 1.0)
+    return np.where(length == 0, 0.0, np.degrees(np.arccos(cosine)))
+
+def knee_projections(knee, ankle):
+    """Normalized horizontal component of the ankle-to-knee vector (positive = knee forward)"""
+    shin = knee - ankle
+    length = np.hypot(shin[..., 0], shin[..., 1])
+    return np.where(length == 0, 0.0, shin[..., 0] / np.where(length == 0, 1.0, length))
+
+def knee_valgus(hip, knee, ankle):
+    """
+    Knee valgus angle in the frontal plane.
+    With 2D landmarks only the horizontal components remain after projection, so the
+    angle is 180 when hip and ankle lie on opposite sides of the knee and 0 otherwise.
+    """
+    product = (hip[..., 0] - knee[..., 0]) * (ankle[..., 0] - knee[..., 0])
+    return np.where(product < 0, 180.0, 0.0)
+
+def line_fit_error(p1, p2, p3):
+    """Mean squared error of the least-squares line through three points (0 if vertical)"""
+    x = np.stack([p1[..., 0], p2[..., 0], p3[..., 0]], axis=-1)
+    y = np.stack([p1[..., 1], p2[..., 1], p3[..., 1]], axis=-1)
+    dx = x - x.mean(axis=-1, keepdims=True)
+    dy = y - y.mean(axis=-1, keepdims=True)
+    sxx = (dx * dx).sum(axis=-1)
+    sxy = (dx * dy).sum(axis=-1)
+    slope = sxy / np.where(sxx == 0, 1.0, sxx)
+    residual = dy - slope[..., None] * dx
+    return np.where(sxx == 0, 0.0, (residual * residual).mean(axis=-1))
+
+def compute_kinematics(frames):
+    """
+    Compute every metric the exercise modules need in one pass.
+
+    Args:
+        frames: (33, 4) frame or (N, 33, 4) stack of frames
+
+    Returns:
+        Dictionary of metric name -> array with the frames' leading shape
+    """
+    points = extended_points(frames)
+
+    # All joint angles in a single arctan2 evaluation
+    angles = joint_angles(points[..., _ANGLE_A, :], points[..., _ANGLE_B, :], points[..., _ANGLE_C, :])
+    metrics = {name: angles[..., i] for i, name in enumerate(_ANGLE_NAMES)}
+
+    shoulders = points[..., [LEFT_SHOULDER, RIGHT_SHOULDER], :]
+    hips = points[..., [LEFT_HIP, RIGHT_HIP], :]
+    knees = points[..., [LEFT_KNEE, RIGHT_KNEE], :]
+    ankles = points[..., [LEFT_ANKLE, RIGHT_ANKLE], :]
+
+    torso = torso_angles(shoulders, hips)
+    projection = knee_projections(knees, ankles)
+    valgus = knee_valgus(hips, knees, ankles)
+    metrics["left_torso_angle"], metrics["right_torso_angle"] = torso[..., 0], torso[..., 1]
+    metrics["left_knee_projection"], metrics["right_knee_projection"] = projection[..., 0], projection[..., 1]
+    metrics["left_knee_valgus"], metrics["right_knee_valgus"] = valgus[..., 0], valgus[..., 1]
+
+    # Raw shoulder positions (frame-to-frame movement tracking)
+    metrics["left_shoulder_x"], metrics["left_shoulder_y"] = shoulders[..., 0, 0], shoulders[..., 0, 1]
+    metrics["right_shoulder_x"], metrics["right_shoulder_y"] = shoulders[..., 1, 0], shoulders[..., 1, 1]
+
+    mid_shoulder = points[..., MID_SHOULDER, :]
+    mid_hip = points[..., MID_HIP, :]
+    mid_ankle = points[..., MID_ANKLE, :]
+
+    # Shoulder-hip-ankle straightness and hip height relative to that line (y grows
+    # downward), on the midline and per side
+    shoulder_points = np.stack([mid_shoulder, shoulders[..., 0, :], shoulders[..., 1, :]], axis=-2)
+    hip_points = np.stack([mid_hip, hips[..., 0, :], hips[..., 1, :]], axis=-2)
+    foot_points = np.stack([mid_ankle, ankles[..., 0, :], ankles[..., 1, :]], axis=-2)
+    alignment = line_fit_error(shoulder_points, hip_points, foot_points)
+    hip_offset = hip_points[..., 1] - (shoulder_points[..., 1] + foot_points[..., 1]) / 2
+    metrics["body_alignment"] = alignment[..., 0]
+    metrics["left_body_alignment"], metrics["right_body_alignment"] = alignment[..., 1], alignment[..., 2]
+    metrics["hip_offset"] = hip_offset[..., 0]
+    metrics["left_hip_offset"], metrics["right_hip_offset"] = hip_offset[..., 1], hip_offset[..., 2]
+
+    # Horizontal hip-to-midfoot distance normalized by hip height (bar path proxy),
+    # on the midline and per side
+    height = np.abs(hip_points[..., 1] - foot_points[..., 1])
+    deviation = np.abs(hip_points[..., 0] - foot_points[..., 0])
+    bar_path = np.where(height == 0, 0.0, deviation / np.where(height == 0, 1.0, height))
+    metrics["bar_path_deviation"] = bar_path[..., 0]
+    metrics["left_bar_path_deviation"], metrics["right_bar_path_deviation"] = bar_path[..., 1], bar_path[..., 2]
+
+    # Visibility of the key joints
+    for name, index in VISIBILITY_LANDMARKS.items():
+        metrics[f"{name}_visibility"] = frames[..., index, 3]
+
+    return metrics
+
+# Single-frame metrics: the scalar counterparts of the functions above, on
+# (x, y, visibility) points
+
+def _angle(a, b, c):
+    radians = math.atan2(c[1] - b[1], c[0] - b[0]) - math.atan2(a[1] - b[1], a[0] - b[0])
+    angle = abs(radians * 180.0 / math.pi)
+    return 360.0 - angle if angle > 180.0 else angle
+
+def _torso_angle(shoulder, hip):
+    dx, dy = shoulder[0] - hip[0], shoulder[1] - hip[1]
+    length = math.hypot(dx, dy)
+    return math.degrees(math.acos(max(-1.0, min(1.0, -dy / length)))) if length else 0.0
+
+def _knee_projection(knee, ankle):
+    dx = knee[0] - ankle[0]
+    length = math.hypot(dx, knee[1] - ankle[1])
+    return dx / length if length else 0.0
+
+def _knee_valgus(hip, knee, ankle):
+    return 180.0 if (hip[0] - knee[0]) * (ankle[0] - knee[0]) < 0 else 0.0
+
+def _line_fit_error(p1, p2, p3):
+    mean_x = (p1[0] + p2[0] + p3[0]) / 3
+    mean_y = (p1[1] + p2[1] + p3[1]) / 3
+    dx = [p[0] - mean_x for p in (p1, p2, p3)]
+    dy = [p[1] - mean_y for p in (p1, p2, p3)]
+    sxx = sum(d * d for d in dx)
+    if sxx == 0:
+        return 0.0
+    slope = sum(x * y for x, y in zip(dx, dy)) / sxx
+    return sum((y - slope * x) ** 2 for x, y in zip(dx, dy)) / 3
+
+def _hip_offset(shoulder, hip, ankle):
+    return hip[1] - (shoulder[1] + ankle[1]) / 2
+
+def _bar_path_deviation(hip, ankle):
+    height = abs(hip[1] - ankle[1])
+    return abs(hip[0] - ankle[0]) / height if height else 0.0
+
+# Metric name -> (function, points it is computed from)
+_FRAME_METRICS = {name: (_angle, (a, b, c)) for name, a, b, c in ANGLE_TRIPLETS}
+for _side, (_shoulder, _hip, _knee, _ankle) in {
+    "left": (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    "right": (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+}.items():
+    _FRAME_METRICS[f"{_side}_torso_angle"] = (_torso_angle, (_shoulder, _hip))
+    _FRAME_METRICS[f"{_side}_knee_projection"] = (_knee_projection, (_knee, _ankle))
+    _FRAME_METRICS[f"{_side}_knee_valgus"] = (_knee_valgus, (_hip, _knee, _ankle))
+    _FRAME_METRICS[f"{_side}_shoulder_x"] = (lambda p: p[0], (_shoulder,))
+    _FRAME_METRICS[f"{_side}_shoulder_y"] = (lambda p: p[1], (_shoulder,))
+    _FRAME_METRICS[f"{_side}_bar_path_deviation"] = (_bar_path_deviation, (_hip, _ankle))
+    _FRAME_METRICS[f"{_side}_body_alignment"] = (_line_fit_error, (_shoulder, _hip, _ankle))
+    _FRAME_METRICS[f"{_side}_hip_offset"] = (_hip_offset, (_shoulder, _hip, _ankle))
+_FRAME_METRICS["body_alignment"] = (_line_fit_error, (MID_SHOULDER, MID_HIP, MID_ANKLE))
+_FRAME_METRICS["hip_offset"] = (_hip_offset, (MID_SHOULDER, MID_HIP, MID_ANKLE))
+_FRAME_METRICS["bar_path_deviation"] = (_bar_path_deviation, (MID_HIP, MID_ANKLE))
+
+# Visibility metrics are plain reads and are filled in up front
+_VISIBILITY_NAMES = [f"{name}_visibility" for name in VISIBILITY_LANDMARKS]
+_VISIBILITY_INDICES = list(VISIBILITY_LANDMARKS.values())
+
+# Landmarks read for a single frame, the derived points as the pair they are the
+# midpoint of, and the neck points as the point they are NECK_OFFSET above
+_FRAME_LANDMARKS = sorted(set(VISIBILITY_LANDMARKS.values()))
+_MIDPOINTS = {
+    MID_SHOULDER: (LEFT_SHOULDER, RIGHT_SHOULDER),
+    MID_HIP: (LEFT_HIP, RIGHT_HIP),
+    MID_KNEE: (LEFT_KNEE, RIGHT_KNEE),
+    MID_ANKLE: (LEFT_ANKLE, RIGHT_ANKLE),
+}
+_NECK_BASES = {NECK: MID_SHOULDER, LEFT_NECK: LEFT_SHOULDER, RIGHT_NECK: RIGHT_SHOULDER}
+
+def _frame_points(landmarks):
+    """Read the landmarks used by the metrics as {index: (x, y, visibility)}"""
+    if isinstance(landmarks, np.ndarray):
+        if landmarks.shape != (NUM_LANDMARKS, VALUES_PER_LANDMARK):
+            raise ValueError(f"Expected a single ({NUM_LANDMARKS}, {VALUES_PER_LANDMARK}) frame, got {landmarks.shape}")
+        rows = landmarks[_FRAME_LANDMARKS][:, [0, 1, 3]].tolist()
+        return {index: tuple(row) for index, row in zip(_FRAME_LANDMARKS, rows)}
+    try:
+        if len(landmarks) < NUM_LANDMARKS:
+            raise ValueError(f"Expected {NUM_LANDMARKS} landmarks, got {len(landmarks)}")
+        points = {}
+        for index in _FRAME_LANDMARKS:
+            landmark = landmarks[index]
+            points[index] = (float(landmark.get("x", 0.0)), float(landmark.get("y", 0.0)),
+                             float(landmark.get("visibility", 1.0)))
+        return points
+    except (TypeError, AttributeError, KeyError) as e:
+        raise ValueError(f"Malformed landmarks: {e}")
+
+class FrameKinematics(dict):
+    """
+    Metrics of a single frame, each computed with scalar math when it is first read.
+
+    Behaves like the per-frame dicts of batch_kinematics for kin[name] lookups;
+    besides the visibility scores, only the metrics read so far are stored in it.
+    """
+
+    def __init__(self, points):
+        super().__init__(zip(_VISIBILITY_NAMES, [points[index][2] for index in _VISIBILITY_INDICES]))
+        self._points = points
+
+    def _point(self, index):
+        point = self._points.get(index)
+        if point is None:
+            if index in _NECK_BASES:
+                x, y, _ = self._point(_NECK_BASES[index])
+                point = (x, y - NECK_OFFSET, 0.0)
+            else:
+                left, right = (self._points[i] for i in _MIDPOINTS[index])
+                point = ((left[0] + right[0]) / 2, (left[1] + right[1]) / 2, 0.0)
+            self._points[index] = point
+        return point
+
+    def __missing__(self, name):
+        function, indices = _FRAME_METRICS[name]
+        value = self[name] = function(*[self._point(index) for index in indices])
+        return value
+
+def frame_kinematics(landmarks):
+    """
+    Kinematics of a single frame (JSON landmark list or (33, 4) array).
+
+    The landmarks are validated right away (ValueError if incomplete or
+    malformed); each metric is computed when it is first read.
+    """
+    return FrameKinematics(_frame_points(landmarks))
+
+def stack_frames(frames):
+    """Convert a list of frames (or an array) to a float64 (N, 33, 4) stack"""
+    if not isinstance(frames, np.ndarray):
+        frames = np.stack([as_frame(frame) for frame in frames])
+    frames = as_frame(frames)
+    return frames[None] if frames.ndim == 2 else frames
+
+def batch_kinematics(frames):
+    """Compute kinematics for a (N, 33, 4) stack of frames, returned as a list of per-frame dicts"""
+    frames = stack_frames(frames)
+    metrics = compute_kinematics(frames)
+    names = list(metrics)
+    rows = np.stack([metrics[name] for name in names], axis=-1).tolist()
+    return [dict(zip(names, row)) for row in rows]
@@ -0,0 +1,80 @@
+"""
+Landmark Wire Format
+--------------------
+Conversion between the JSON landmark list and the compact binary frame.
+
+A binary frame is 33 landmarks x (x, y, z, visibility) stored as 132
+little-endian float32 values, in the same x1, y1, z1, v1 ... v33 order as the
+columns in landmarks.py (528 bytes vs ~2.5 KB of JSON).
+"""
+import numpy as np
+
+NUM_LANDMARKS = 33
+VALUES_PER_LANDMARK = 4  # x, y, z, visibility
+FRAME_DTYPE = np.dtype("<f4")
+FRAME_BYTES = NUM_LANDMARKS * VALUES_PER_LANDMARK * FRAME_DTYPE.itemsize
+
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
+_FIELDS = ("x", "y", "z", "visibility")
+_DEFAULTS = (0.0, 0.0, 0.0, 1.0)  # Landmarks sent without visibility are treated as visible
+
+def decode_binary_frame(payload):
+    """
+    Decode a binary frame without copying.
+
+    Args:
+        payload: bytes-like object of exactly FRAME_BYTES bytes
+
+    Returns:
+        Read-only (33, 4) float32 array view over the payload
+    """
+    if len(payload) != FRAME_BYTES:
+        raise ValueError(
+            f"Binary frame must be {FRAME_BYTES} bytes "
+            f"({NUM_LANDMARKS * VALUES_PER_LANDMARK} little-endian float32 values), got {len(payload)}"
+        )
+    return np.frombuffer(payload, dtype=FRAME_DTYPE).reshape(NUM_LANDMARKS, VALUES_PER_LANDMARK)
+
+def encode_binary_frame(landmarks):
+    """Encode a landmark list or (33, 4) array as a binary frame"""
+    frame = landmarks_to_array(landmarks) if not isinstance(landmarks, np.ndarray) else landmarks
+    return np.ascontiguousarray(frame, dtype=FRAME_DTYPE).tobytes()
+
+def landmarks_to_array(landmarks, dtype=FRAME_DTYPE):
+    """Convert a JSON landmark list (dicts with x, y, z, visibility) to a (33, 4) array"""
+    if len(landmarks) < NUM_LANDMARKS:
+        raise ValueError(f"Expected {NUM_LANDMARKS} landmarks, got {len(landmarks)}")
+    return np.array(
+        [[lm.get(field, default) for field, default in zip(_FIELDS, _DEFAULTS)] for lm in landmarks[:NUM_LANDMARKS]],
+        dtype=dtype
+    )
+
+def array_to_landmarks(frame):
+    """Convert a (33, 4) array back to the JSON landmark list format"""
+    return [dict(zip(_FIELDS, row)) for row in frame.tolist()]
+
+def batch_frame_landmarks(frames):
+    """
+    Validate the "frames" list of a batch body and return each frame's landmark list.
+
+    Args:
+        frames: List of {"landmarks": [...], "timestamp": <ms, optional>} objects
+
+    Returns:
+        List of landmark lists (empty for frames without landmarks, which fail
+        later as incomplete). Raises ValueError for any other shape.
+    """
+    if not isinstance(frames, list):
+        raise ValueError("frames must be a list of {\"landmarks\": [...]} objects")
+    for index, frame in enumerate(frames):
+        if not isinstance(frame, dict):
+            raise ValueError(f"Frame {index} must be an object with a landmarks list")
+        timestamp = frame.get("timestamp")
+        if timestamp is not None and (isinstance(timestamp, bool) or not isinstance(timestamp, (int, float))):
+            raise ValueError(f"Frame {index} has a non-numeric timestamp")
+    return [frame.get("landmarks") or [] for frame in frames]
+
+def is_binary_request(content_type):
+    """Check whether a Content-Type header denotes a binary landmark frame"""
+    return bool(content_type) and content_type.split(";")[0].strip().lower() == BINARY_CONTENT_TYPE
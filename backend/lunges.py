@@ -1,124 +1,66 @@
-import numpy as np
+import time
 from state import exercise_state
+from kinematics import frame_kinematics
+from visibility import not_visible_response, side_values, visible_sides
 from feedback_config import LUNGE_CONFIG, FEEDBACK_TO_JOINTS
 from score_config import calculate_rep_score
+from rep_counter import advance_rep_phase
 
-def calculate_angle(a, b, c):
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
-
-def calculate_knee_projection(hip, knee, ankle):
-    """Calculate how far knee extends beyond toes (normalized by limb length)"""
-    # Convert to numpy arrays for vector math
-    hip = np.array(hip)
-    knee = np.array(knee)
-    ankle = np.array(ankle)
-    
-    # Get the ankle-to-knee vector direction
-    ankle_knee_vector = knee - ankle
-    ankle_knee_length = np.linalg.norm(ankle_knee_vector)
-    if ankle_knee_length == 0:  # Avoid division by zero
-        return 0
-    
-    # Project the knee point onto the vertical line from ankle
-    projection = ankle_knee_vector[0] / ankle_knee_length  # Normalized horizontal component
-    
-    return projection  # Positive means knee is forward of ankle
-
-def calculate_torso_angle(shoulder, hip):
-    """Calculate torso angle from vertical (0° is perfectly upright, 180° is inverted)"""
-    # Calculate the angle between the torso and the vertical axis
-    vertical_vector = np.array([0, -1])  # Upward vertical vector
-    torso_vector = np.array([shoulder[0] - hip[0], shoulder[1] - hip[1]])
-    
-    # Normalize the torso vector
-    torso_length = np.linalg.norm(torso_vector)
-    if torso_length == 0:  # Avoid division by zero
-        return 180
-    torso_vector = torso_vector / torso_length
-    
-    # Calculate angle using dot product
-    dot_product = np.dot(vertical_vector, torso_vector)
-    angle = np.arccos(np.clip(dot_product, -1.0, 1.0)) * 180.0 / np.pi
-    
-    # Convert to the 0-180 range where 180 is perfectly upright
-    return 180 - angle
-
-def process_landmarks(landmarks, tolerance, session_id=None):
+def process_landmarks(landmarks, tolerance, session_id=None, client_id=None,
+                      timestamp=None, kinematics=None):
     """
     Process landmarks for lunge form analysis with enhanced feedback
     
     Args:
-        landmarks: Dictionary of landmark positions
+        landmarks: Landmark list or (33, 4) landmark array
         tolerance: Tolerance threshold
         session_id: Optional session ID for logging
+        client_id: Optional client identifier used to isolate exercise state
+        timestamp: Optional frame capture time in seconds (defaults to now)
+        kinematics: Optional precomputed metrics from kinematics.batch_kinematics
         
     Returns:
         Dictionary with processing results and feedback
     """
-    knee_angles = []
-    knee_projections = []
-    torso_angles = []
-    
-    # Extract left side landmarks
-    try:
-        left_shoulder = [landmarks[11]['x'], landmarks[11]['y']]
-        left_hip = [landmarks[23]['x'], landmarks[23]['y']]
-        left_knee = [landmarks[25]['x'], landmarks[25]['y']]
-        left_ankle = [landmarks[27]['x'], landmarks[27]['y']]
-        
-        left_angle = calculate_angle(left_hip, left_knee, left_ankle)
-        left_projection = calculate_knee_projection(left_hip, left_knee, left_ankle)
-        left_torso_angle = calculate_torso_angle(left_shoulder, left_hip)
-        
-        knee_angles.append(left_angle)
-        knee_projections.append(left_projection)
-        torso_angles.append(left_torso_angle)
-    except Exception:
-        pass
-    
-    # Extract right side landmarks
-    try:
-        right_shoulder = [landmarks[12]['x'], landmarks[12]['y']]
-        right_hip = [landmarks[24]['x'], landmarks[24]['y']]
-        right_knee = [landmarks[26]['x'], landmarks[26]['y']]
-        right_ankle = [landmarks[28]['x'], landmarks[28]['y']]
-        
-        right_angle = calculate_angle(right_hip, right_knee, right_ankle)
-        right_projection = calculate_knee_projection(right_hip, right_knee, right_ankle)
-        right_torso_angle = calculate_torso_angle(right_shoulder, right_hip)
-        
-        knee_angles.append(right_angle)
-        knee_projections.append(right_projection)
-        torso_angles.append(right_torso_angle)
-    except Exception:
-        pass
+    # Joint metrics of the frame, each computed when first read (batches pass them precomputed)
+    if kinematics is not None:
+        kin = kinematics
+    else:
+        try:
+            kin = frame_kinematics(landmarks)
+        except ValueError:
+            return {"error": "Insufficient landmarks data."}
+    
+    # State is kept per client; fall back to the session when no client id is given
+    client_key = client_id or session_id
 
-    if not knee_angles:
-        return {"error": "Insufficient landmarks data."}
+    # Retrieve the current state for lunges
+    state = exercise_state.get("lunges", {"counter": 0, "stage": "up", "feedback": "N/A"}, client_key)
+
+    # Skip frames unless both legs are visible (the front and rear knee are compared)
+    sides = visible_sides(kin, "lunges")
+    if not sides:
+        return not_visible_response(state)
+    
+    knee_angles = side_values(kin, "knee_angle", sides)
+    knee_projections = side_values(kin, "knee_projection", sides)
+    # Torso angle on a 0-180 scale where 180 is perfectly upright
+    torso_angles = [180 - angle for angle in side_values(kin, "torso_angle", sides)]
 
     # Calculate averages
     avg_knee_angle = min(knee_angles)  # Use minimum (the most bent knee)
     avg_knee_projection = max(knee_projections)  # Use maximum (worst case)
     avg_torso_angle = sum(torso_angles) / len(torso_angles)
     
-    # Retrieve the current state for lunges
-    state = exercise_state.get("lunges", {"counter": 0, "stage": "up", "feedback": "N/A"})
     stage = state.get("stage", "up")
     counter = state.get("counter", 0)
     prev_counter = state.get("counter", 0)  # Store previous counter to detect rep completion
 
-    # Lunge detection logic
-    if min(knee_angles) > 150:  # Both legs relatively straight
-        stage = "up"
-    elif min(knee_angles) < LUNGE_CONFIG["FRONT_KNEE_ANGLE_MIN"] + 5 and stage == "up":
-        stage = "down"
+    # Lunge detection logic: both legs straight (up) <-> front knee bent (down)
+    current_time = timestamp if timestamp is not None else time.time()
+    transition = advance_rep_phase("lunges", min(knee_angles), stage, state.get("rep_phase"), current_time)
+    stage = transition["stage"]
+    if transition["rep_completed"]:
         counter += 1
 
     # Generate detailed feedback
@@ -211,6 +153,7 @@ def process_landmarks(landmarks, tolerance, session_id=None):
     new_state = {
         "counter": counter,
         "stage": stage,
+        "rep_phase": transition["phase"],
         "kneeAngle": avg_knee_angle,
         "kneeProjection": avg_knee_projection,
         "torsoAngle": avg_torso_angle,
@@ -224,5 +167,5 @@ def process_landmarks(landmarks, tolerance, session_id=None):
         "advanced_metrics": advanced_metrics  # Add advanced metrics
     }
     
-    exercise_state["lunges"] = new_state
+    exercise_state.set("lunges", new_state, client_key)
     return new_state
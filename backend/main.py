@@ -1,16 +1,26 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import json
+import os
 import time
+import uuid
 from typing import Optional
 
-# Import the process_landmarks functions
-from bicep_curls import process_landmarks as process_bicep_curls
-from deadlifts import process_landmarks as process_deadlifts
-from lunges import process_landmarks as process_lunges
-from pushups import process_landmarks as process_pushups
-from situps import process_landmarks as process_situps
-from squats import process_landmarks as process_squats
+from analyzers import get_analyzer, preload_analyzers
+
+# With REGENIX_LAZY_IMPORTS=1 the exercise analyzers and reference poses (and NumPy
+# behind them) are imported on first use, so a fresh worker is ready to serve
+# sooner. By default they are loaded up front so the first request doesn't pay
+# for the imports.
+# `python import_report.py` compares the startup cost of both modes.
+LAZY_IMPORTS = os.environ.get("REGENIX_LAZY_IMPORTS", "0") == "1"
+if not LAZY_IMPORTS:
+    from form_classifier import preload_classifiers
+    import reference_poses  # Used by the reference router's handlers
+    preload_analyzers()
+    preload_classifiers()
 
 # Create the FastAPI app
 app = FastAPI(title="ReGenix: Innovative Exercise Analysis API")
@@ -24,13 +34,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Uncomment the router imports to enable session reporting
+# Session reporting and reference pose routers
 try:
     from routers.session_router import router as session_router
-    # from routers.reference_router import router as reference_router
+    from routers.reference_router import router as reference_router
     # Add routers
     app.include_router(session_router)
-    # app.include_router(reference_router)
+    app.include_router(reference_router)
 except ImportError:
     print("Router modules not available. Basic functionality only.")
 
@@ -43,32 +53,54 @@ async def process_exercise_landmarks(
     exercise_name: str,
     request: Request,
     tolerance: int = 10,
-    session_id: Optional[str] = None
+    session_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    smoothing: bool = True,
+    classify: bool = True
 ):
-    """Process landmarks for exercise analysis"""
+    """
+    Process landmarks for exercise analysis.
+    
+    Accepts either a JSON body {"landmarks": [...]} or, with
+    Content-Type: application/octet-stream, a 528-byte binary frame of
+    33 x (x, y, z, visibility) little-endian float32 values. Unless smoothing
+    is false, the frame passes through the client's One-Euro filter first.
+    For exercises with a trained model (deadlifts), the model's class and
+    confidence are added as "classification" unless classify is false.
+    """
     start_time = time.time()
     
+    analyzer = get_analyzer(exercise_name)
+    if analyzer is None:
+        return JSONResponse({"error": "Exercise not found"}, status_code=404)
+    
     try:
-        data = await request.json()
-        landmarks = data.get("landmarks")
-        if not landmarks:
-            return JSONResponse({"error": "No landmarks provided"}, status_code=400)
+        from landmark_format import decode_binary_frame, is_binary_request
         
-        # Route the processing to the corresponding module
-        if exercise_name == "bicep_curls":
-            result = process_bicep_curls(landmarks, tolerance, session_id)
-        elif exercise_name == "deadlifts":
-            result = process_deadlifts(landmarks, tolerance, session_id)
-        elif exercise_name == "lunges":
-            result = process_lunges(landmarks, tolerance, session_id)
-        elif exercise_name == "pushups":
-            result = process_pushups(landmarks, tolerance, session_id)
-        elif exercise_name == "situps":
-            result = process_situps(landmarks, tolerance, session_id)
-        elif exercise_name == "squats":
-            result = process_squats(landmarks, tolerance, session_id)
+        if is_binary_request(request.headers.get("content-type")):
+            try:
+                landmarks = decode_binary_frame(await request.body())
+            except ValueError as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
         else:
-            return JSONResponse({"error": "Exercise not found"}, status_code=404)
+            data = await request.json()
+            landmarks = data.get("landmarks") if isinstance(data, dict) else None
+            if not landmarks:
+                return JSONResponse({"error": "No landmarks provided"}, status_code=400)
+        
+        raw_landmarks = landmarks
+        if smoothing:
+            from smoothing import smooth_landmarks
+            landmarks = smooth_landmarks(landmarks, client_id or session_id)
+        
+        result = analyzer.process(landmarks, tolerance, session_id, client_id)
+        
+        # The model was trained on unsmoothed landmarks
+        if classify and "error" not in result:
+            from form_classifier import get_classifier
+            classifier = get_classifier(exercise_name)
+            if classifier is not None:
+                result["classification"] = await classifier.classify_async(raw_landmarks)
         
         # Add processing time
         processing_time = time.time() - start_time
@@ -81,51 +113,253 @@ async def process_exercise_landmarks(
             status_code=500
         )
 
+@app.post("/landmarks/{exercise_name}/batch")
+async def process_exercise_landmarks_batch(
+    exercise_name: str,
+    request: Request,
+    tolerance: int = 10,
+    session_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    transitions_only: bool = False,
+    smoothing: bool = True,
+    classify: bool = True
+):
+    """
+    Process a burst of buffered frames in one request.
+    
+    Body: {"frames": [{"landmarks": [...], "timestamp": <client time in ms>}, ...]}
+    Kinematics for all frames are computed in one vectorized pass, then the frames
+    run through the rep state machine in order using their client timestamps.
+    With transitions_only, only frames that change stage, rep count or feedback
+    are returned. Unless smoothing is false, the frames pass through the client's
+    One-Euro filter (using the client timestamps) before the kinematics. For
+    exercises with a trained model, all frames are classified in one call.
+    """
+    start_time = time.time()
+    
+    analyzer = get_analyzer(exercise_name)
+    if analyzer is None:
+        return JSONResponse({"error": "Exercise not found"}, status_code=404)
+    
+    try:
+        data = await request.json()
+        frames = data.get("frames") if isinstance(data, dict) else None
+        if not frames:
+            return JSONResponse({"error": "No frames provided"}, status_code=400)
+        
+        from kinematics import batch_kinematics, stack_frames
+        from landmark_format import batch_frame_landmarks
+        
+        try:
+            raw_frames = stack_frames(batch_frame_landmarks(frames))
+            frame_stack = raw_frames
+            if smoothing:
+                from smoothing import smooth_frames
+                frame_stack = smooth_frames(raw_frames, client_id or session_id, [
+                    frame["timestamp"] / 1000.0 if frame.get("timestamp") is not None else None
+                    for frame in frames
+                ])
+            frame_metrics = batch_kinematics(frame_stack)
+        except ValueError as e:
+            return JSONResponse({"error": f"Invalid frame in batch: {str(e)}"}, status_code=400)
+        
+        # One predict_proba call over the whole (unsmoothed) batch
+        classifications = None
+        if classify:
+            from form_classifier import get_classifier
+            classifier = get_classifier(exercise_name)
+            if classifier is not None:
+                # predict_proba holds the CPU for the whole batch; keep it off the event loop
+                classifications = await asyncio.get_running_loop().run_in_executor(
+                    None, classifier.classify, raw_frames
+                )
+        
+        results = []
+        last_signature = None
+        result = None
+        for index, (frame, kin) in enumerate(zip(frames, frame_metrics)):
+            client_timestamp = frame.get("timestamp")
+            timestamp = client_timestamp / 1000.0 if client_timestamp is not None else None
+            
+            result = analyzer.process(None, tolerance, session_id, client_id, timestamp, kin)
+            
+            signature = (
+                result.get("stage"),
+                result.get("counter", result.get("repCount")),
+                result.get("feedback")
+            )
+            if transitions_only and signature == last_signature:
+                continue
+            last_signature = signature
+            
+            entry = {"frame_index": index, "timestamp": client_timestamp, **result}
+            if classifications is not None and "error" not in result:
+                entry["classification"] = classifications[index]
+            results.append(entry)
+        
+        processing_time = time.time() - start_time
+        return JSONResponse({
+            "exercise": exercise_name,
+            "frames_processed": len(frames),
+            "results": results,
+            "final_state": result,
+            "processing_time_ms": round(processing_time * 1000, 2)
+        })
+    except Exception as e:
+        return JSONResponse(
+            {"error": f"Processing error: {str(e)}"}, 
+            status_code=500
+        )
+
+@app.websocket("/ws/landmarks/{exercise_name}")
+async def stream_exercise_landmarks(
+    websocket: WebSocket,
+    exercise_name: str,
+    tolerance: int = 10,
+    session_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    smoothing: bool = True,
+    classify: bool = True
+):
+    """
+    Stream landmark frames over a single WebSocket connection.
+    
+    Each message is either a JSON object {"landmarks": [...]} or a binary
+    message holding one 528-byte float32 frame. The analyzer state lives
+    for the whole connection and a result is only pushed back when the stage,
+    rep count or feedback changes (errors are always reported). Unless
+    smoothing is false, frames pass through a One-Euro filter first. Pushed
+    results carry the model classification where one exists (see classify).
+    """
+    await websocket.accept()
+    
+    analyzer = get_analyzer(exercise_name)
+    if analyzer is None:
+        await websocket.send_json({"error": "Exercise not found"})
+        await websocket.close(code=1008)
+        return
+    
+    from landmark_format import decode_binary_frame
+    from smoothing import smooth_landmarks
+    from form_classifier import get_classifier
+    
+    classifier = get_classifier(exercise_name) if classify else None
+    
+    # Connections without an explicit identity get their own private state
+    connection_id = client_id or session_id or f"ws-{uuid.uuid4()}"
+    last_signature = None
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            start_time = time.time()
+            
+            if message.get("bytes") is not None:
+                try:
+                    landmarks = decode_binary_frame(message["bytes"])
+                except ValueError as e:
+                    await websocket.send_json({"error": str(e)})
+                    continue
+            else:
+                try:
+                    data = json.loads(message.get("text") or "null")
+                except ValueError:
+                    data = None
+                landmarks = data.get("landmarks") if isinstance(data, dict) else None
+                if not landmarks:
+                    await websocket.send_json({"error": "No landmarks provided"})
+                    continue
+            
+            try:
+                raw_landmarks = landmarks
+                if smoothing:
+                    landmarks = smooth_landmarks(landmarks, connection_id)
+                result = analyzer.process(landmarks, tolerance, session_id, connection_id)
+            except Exception as e:
+                await websocket.send_json({"error": f"Processing error: {str(e)}"})
+                continue
+            
+            if "error" in result:
+                await websocket.send_json(result)
+                continue
+            
+            # Only push results the client can act on
+            signature = (
+                result.get("stage"),
+                result.get("counter", result.get("repCount")),
+                result.get("feedback")
+            )
+            if signature == last_signature:
+                continue
+            last_signature = signature
+            
+            if classifier is not None:
+                result["classification"] = await classifier.classify_async(raw_landmarks)
+            result["processing_time_ms"] = round((time.time() - start_time) * 1000, 2)
+            await websocket.send_json(result)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if connection_id.startswith("ws-"):
+            from state import exercise_state
+            exercise_state.discard_client(connection_id)
+
+@app.post("/detect")
+async def detect_exercise(
+    request: Request,
+    session_id: Optional[str] = None,
+    client_id: Optional[str] = None
+):
+    """
+    Recognize which exercise is being performed.
+    
+    Body: {"landmarks": [...]} for one frame, {"frames": [{"landmarks": [...]}, ...]}
+    for several, or a 528-byte binary frame. Frames are appended to the client's
+    30-frame window, which the sequence model classifies every 15 frames; the
+    response carries the latest detection.
+    """
+    from exercise_recognition import get_recognizer
+    
+    recognizer = get_recognizer()
+    if recognizer is None:
+        return JSONResponse({"error": "Exercise recognition model not available"}, status_code=503)
+    
+    try:
+        from landmark_format import batch_frame_landmarks, decode_binary_frame, is_binary_request
+        
+        if is_binary_request(request.headers.get("content-type")):
+            frames = decode_binary_frame(await request.body())
+        else:
+            data = await request.json()
+            if not isinstance(data, dict):
+                return JSONResponse({"error": "No landmarks provided"}, status_code=400)
+            if data.get("frames"):
+                frames = batch_frame_landmarks(data["frames"])
+            else:
+                frames = [data["landmarks"]] if data.get("landmarks") else None
+            if not frames:
+                return JSONResponse({"error": "No landmarks provided"}, status_code=400)
+        
+        result = await recognizer.observe(frames, client_id or session_id)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": f"Processing error: {str(e)}"}, status_code=500)
+    
+    return JSONResponse(result)
+
 @app.post("/reset/{exercise_name}")
-async def reset_exercise_state(exercise_name: str):
+async def reset_exercise_state(
+    exercise_name: str,
+    session_id: Optional[str] = None,
+    client_id: Optional[str] = None
+):
     """Reset the counter and state for an exercise"""
-    from state import exercise_state
-    
-    if exercise_name == "bicep_curls":
-        exercise_state["bicep_curls"] = {
-            "repCount": 0,
-            "stage": "down",
-            "feedback": "Ready to start new set",
-            "prev_shoulders": None
-        }
-    elif exercise_name == "deadlifts":
-        exercise_state["deadlifts"] = {
-            "repCount": 0, 
-            "stage": "up", 
-            "feedback": "Ready to start new set"
-        }
-    elif exercise_name == "lunges":
-        exercise_state["lunges"] = {
-            "counter": 0, 
-            "stage": "up", 
-            "feedback": "Ready to start new set"
-        }
-    elif exercise_name == "pushups":
-        exercise_state["pushups"] = {
-            "counter": 0, 
-            "stage": "up", 
-            "feedback": "Ready to start new set"
-        }
-    elif exercise_name == "situps":
-        exercise_state["situps"] = {
-            "counter": 0, 
-            "stage": "up", 
-            "feedback": "Ready to start new set"
-        }
-    elif exercise_name == "squats":
-        exercise_state["squats"] = {
-            "counter": 0,
-            "stage": "up",
-            "repCounted": False,
-            "currentMinKnee": None,
-            "currentMinTrunk": None,
-            "feedback": "Ready to start new set"
-        }
+    analyzer = get_analyzer(exercise_name)
+    if analyzer is not None:
+        analyzer.reset(session_id, client_id)
     
     return {"message": f"Reset {exercise_name} state successfully"}
 
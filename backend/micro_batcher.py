@@ -0,0 +1,91 @@
+"""
+Micro-Batching Scheduler
+------------------------
+Collects single-frame model predictions from concurrent requests into batches.
+
+A learned model costs nearly the same for one row as for a few dozen (a random
+forest walks every tree once per call either way), so answering each frame with
+its own call wastes most of the model's throughput. The MicroBatcher queues the
+frames submitted by concurrent requests and WebSocket connections, and runs them
+through one batched prediction when either:
+
+    MAX_BATCH_SIZE frames are waiting, or
+    MAX_WAIT_MS has passed since the first frame of the batch arrived
+
+so a lone frame waits at most MAX_WAIT_MS and the added p99 latency is bounded.
+The prediction runs in a worker thread, so the event loop keeps collecting the
+next batch in the meantime. Each caller's future then gets its own result back.
+"""
+import asyncio
+
+BATCHING_CONFIG = {
+    "MAX_BATCH_SIZE": 32,
+    "MAX_WAIT_MS": 5,
+}
+
+class MicroBatcher:
+    """Batch concurrent single-item predictions on the running event loop"""
+
+    def __init__(self, predict_batch, max_batch_size=None, max_wait_ms=None):
+        """
+        Args:
+            predict_batch: Function mapping a list of items to a list of results (same order)
+            max_batch_size: Flush as soon as this many items are waiting
+            max_wait_ms: Flush at the latest this long after the first waiting item arrived
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size or BATCHING_CONFIG["MAX_BATCH_SIZE"]
+        self.max_wait = (BATCHING_CONFIG["MAX_WAIT_MS"] if max_wait_ms is None else max_wait_ms) / 1000.0
+        self._pending = []   # (item, future) pairs of the batch being collected
+        self._timer = None
+        self._tasks = set()  # Running batches; the event loop only keeps weak references
+        self.batches = 0     # Counters for monitoring the average batch size
+        self.items = 0
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand the collected batch to a worker thread and start a new one"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = list(await asyncio.get_running_loop().run_in_executor(None, self.predict_batch, items))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            # A caller may have been cancelled (e.g. disconnected) in the meantime
+            if not future.done():
+                future.set_result(result)
+        # A short result list must not leave the remaining callers waiting forever
+        if len(results) < len(batch):
+            error = RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} items")
+            for _, future in batch[len(results):]:
+                if not future.done():
+                    future.set_exception(error)
+
+    @property
+    def average_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
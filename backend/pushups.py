@@ -1,81 +1,57 @@
-import numpy as np
-import mediapipe as mp
+import time
 from state import exercise_state
-from feedback_config import PUSHUP_CONFIG, FEEDBACK_TO_JOINTS, ADVANCED_FEEDBACK
+from kinematics import frame_kinematics
+from visibility import not_visible_response, side_values, visible_sides
+from feedback_config import VISIBILITY_THRESHOLD, PUSHUP_CONFIG, FEEDBACK_TO_JOINTS, ADVANCED_FEEDBACK
 from score_config import calculate_rep_score
+from rep_counter import advance_rep_phase
 
-def calculate_angle(a, b, c):
-    a = np.array(a)  # First point (shoulder)
-    b = np.array(b)  # Mid point (elbow)
-    c = np.array(c)  # End point (wrist)
-    
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
-
-def check_body_alignment(shoulder, hip, ankle):
-    """Check if body is in a straight line during pushup"""
-    points = np.array([shoulder, hip, ankle])
-    
-    # Calculate the best-fit line through the points
-    x = points[:, 0]
-    y = points[:, 1]
-    
-    if len(set(x)) <= 1:  # Avoid division by zero if points are vertical
-        return 0  # Perfect alignment
-    
-    # Calculate line of best fit
-    coeffs = np.polyfit(x, y, 1)
-    line_y = np.polyval(coeffs, x)
-    
-    # Calculate mean squared error as a measure of alignment
-    mse = np.mean((y - line_y) ** 2)
-    return mse  # Lower is better (closer to a straight line)
-
-def process_landmarks(landmarks, tolerance, session_id=None):
+def process_landmarks(landmarks, tolerance, session_id=None, client_id=None,
+                      timestamp=None, kinematics=None):
     """
     Process landmarks for pushup form analysis with enhanced feedback
     """
-    try:
-        # Extract landmarks
-        left_shoulder = [landmarks[11]['x'], landmarks[11]['y']]
-        right_shoulder = [landmarks[12]['x'], landmarks[12]['y']]
-        left_elbow = [landmarks[13]['x'], landmarks[13]['y']]
-        right_elbow = [landmarks[14]['x'], landmarks[14]['y']]
-        left_wrist = [landmarks[15]['x'], landmarks[15]['y']]
-        right_wrist = [landmarks[16]['x'], landmarks[16]['y']]
-        left_hip = [landmarks[23]['x'], landmarks[23]['y']]
-        right_hip = [landmarks[24]['x'], landmarks[24]['y']]
-        left_ankle = [landmarks[27]['x'], landmarks[27]['y']]
-        right_ankle = [landmarks[28]['x'], landmarks[28]['y']]
-    except Exception:
-        return {"error": "Insufficient landmarks data."}
+    # Joint metrics of the frame, each computed when first read (batches pass them precomputed)
+    if kinematics is not None:
+        kin = kinematics
+    else:
+        try:
+            kin = frame_kinematics(landmarks)
+        except ValueError:
+            return {"error": "Insufficient landmarks data."}
     
-    # Calculate elbow angles
-    left_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
-    avg_elbow_angle = (left_angle + right_angle) / 2
+    # State is kept per client; fall back to the session when no client id is given
+    client_key = client_id or session_id
+
+    # Retrieve or initialize pushup state
+    state = exercise_state.get("pushups", {"counter": 0, "stage": "up", "feedback": "N/A"}, client_key)
+
+    # Skip frames whose key joints are occluded; analyze only the better-visible side
+    sides = visible_sides(kin, "pushups")
+    if not sides:
+        return not_visible_response(state)
+    
+    side = sides[0]
     
-    # Calculate body alignment (shoulder-hip-ankle)
-    mid_shoulder = [(left_shoulder[0] + right_shoulder[0])/2, (left_shoulder[1] + right_shoulder[1])/2]
-    mid_hip = [(left_hip[0] + right_hip[0])/2, (left_hip[1] + right_hip[1])/2]
-    mid_ankle = [(left_ankle[0] + right_ankle[0])/2, (left_ankle[1] + right_ankle[1])/2]
+    # Calculate elbow angles
+    elbow_angles = side_values(kin, "elbow_angle", sides)
+    avg_elbow_angle = sum(elbow_angles) / len(elbow_angles)
     
-    alignment_score = check_body_alignment(mid_shoulder, mid_hip, mid_ankle)
+    # Body alignment (shoulder-hip-ankle line fit error) on the analyzed side. Reps are
+    # gated on the arm only, so it is checked only when that side's hip and ankle are
+    # visible too (a front view often hides the feet)
+    alignment_score = None
+    if min(kin[f"{side}_hip_visibility"], kin[f"{side}_ankle_visibility"]) >= VISIBILITY_THRESHOLD:
+        alignment_score = kin[f"{side}_body_alignment"]
     
-    # Retrieve or initialize pushup state
-    state = exercise_state.get("pushups", {"counter": 0, "stage": "up", "feedback": "N/A"})
     stage = state.get("stage", "up")
     counter = state.get("counter", 0)
     
-    # Pushup counter logic
-    if avg_elbow_angle > 150:  # Arms extended (up position)
-        stage = "up"
-    elif avg_elbow_angle < PUSHUP_CONFIG["ELBOW_ANGLE_MIN"] + 10 and stage == "up":  # Arms bent (down position)
-        stage = "down"
+    # Pushup counter logic: arms extended (up) <-> arms bent (down) on the elbow angle
+    current_time = timestamp if timestamp is not None else time.time()
+    transition = advance_rep_phase("pushups", avg_elbow_angle, stage, state.get("rep_phase"), current_time)
+    stage = transition["stage"]
+    if transition["rep_completed"]:
         counter += 1
     
     # Generate detailed feedback
@@ -91,9 +67,9 @@ def process_landmarks(landmarks, tolerance, session_id=None):
             feedback_flags.append("GOOD_DEPTH")
     
     # Check body alignment
-    if alignment_score > PUSHUP_CONFIG["ALIGNMENT_THRESHOLD"]:
+    if alignment_score is not None and alignment_score > PUSHUP_CONFIG["ALIGNMENT_THRESHOLD"]:
         # Determine if hips are too high or too low
-        if mid_hip[1] < (mid_shoulder[1] + mid_ankle[1])/2:  # Y increases downward
+        if kin[f"{side}_hip_offset"] < 0:  # Y increases downward
             feedback_flags.append("HIPS_TOO_HIGH")
         else:
             feedback_flags.append("HIPS_TOO_LOW")
@@ -182,6 +158,7 @@ def process_landmarks(landmarks, tolerance, session_id=None):
     new_state = {
         "counter": counter,
         "stage": stage,
+        "rep_phase": transition["phase"],
         "elbowAngle": avg_elbow_angle,
         "bodyAlignment": alignment_score,
         "feedback": feedback_message,
@@ -194,5 +171,5 @@ def process_landmarks(landmarks, tolerance, session_id=None):
         "advanced_metrics": advanced_metrics
     }
     
-    exercise_state["pushups"] = new_state
+    exercise_state.set("pushups", new_state, client_key)
     return new_state
@@ -2,7 +2,21 @@
 Reference Pose System
 -------------------
 Provides reference poses and calibration for skeletal overlays.
+
+The angle curves and skeleton adjusters work on NumPy arrays, so a whole
+trajectory (an array of progress values) is computed in one vectorized pass
+(build_skeleton_trajectory). Where build_reference_curves.py has measured a
+joint's angle curve from the demonstration videos, the mean of that curve is
+used instead of the eased interpolation; the curves are memory-mapped from
+reference_curves/ at import. Reference skeletons are precomputed at import time
+into read-only tables of SKELETON_TABLE_STEPS progress steps per exercise
+(joints in SKELETON_JOINTS order). get_reference_skeleton interpolates between table entries and caches
+the formatted landmarks per (exercise, progress bucket, calibration id), so
+it is cheap enough to call at frame rate.
 """
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from pathlib import Path
 import json
@@ -63,6 +77,41 @@ T_POSE_REFERENCE = {
     "right_ankle": [0.55, 0.9]
 }
 
+# Limbs measured during calibration, as (start joint, end joint) on the left side
+LIMBS = {
+    "torso": ("left_shoulder", "left_hip"),
+    "upper_arm": ("left_shoulder", "left_elbow"),
+    "lower_arm": ("left_elbow", "left_wrist"),
+    "upper_leg": ("left_hip", "left_knee"),
+    "lower_leg": ("left_knee", "left_ankle"),
+}
+
+# Kinematic chain used for calibration: (joint, parent joints, limb). A joint keeps
+# its direction from the (average of its) parents and its distance is scaled by
+# the limb's calibration scale; the hips stay fixed around the mid-hip.
+SKELETON_CHAIN = [
+    ("left_hip", ("left_hip", "right_hip"), None),
+    ("right_hip", ("left_hip", "right_hip"), None),
+    ("left_shoulder", ("left_hip",), "torso"),
+    ("right_shoulder", ("right_hip",), "torso"),
+    ("nose", ("left_shoulder", "right_shoulder"), "torso"),
+    ("left_elbow", ("left_shoulder",), "upper_arm"),
+    ("right_elbow", ("right_shoulder",), "upper_arm"),
+    ("left_wrist", ("left_elbow",), "lower_arm"),
+    ("right_wrist", ("right_elbow",), "lower_arm"),
+    ("left_knee", ("left_hip",), "upper_leg"),
+    ("right_knee", ("right_hip",), "upper_leg"),
+    ("left_ankle", ("left_knee",), "lower_leg"),
+    ("right_ankle", ("right_knee",), "lower_leg"),
+]
+
+# Limb lengths of the T-pose reference skeleton
+REFERENCE_LIMB_LENGTHS = {
+    limb: float(np.hypot(T_POSE_REFERENCE[end][0] - T_POSE_REFERENCE[start][0],
+                         T_POSE_REFERENCE[end][1] - T_POSE_REFERENCE[start][1]))
+    for limb, (start, end) in LIMBS.items()
+}
+
 # MediaPipe landmark indices mapping
 LANDMARK_INDICES = {
     "nose": 0,
@@ -80,6 +129,23 @@ LANDMARK_INDICES = {
     "right_ankle": 28
 }
 
+# Joint order of the precomputed skeleton tables
+SKELETON_JOINTS = tuple(LANDMARK_INDICES)
+
+# Progress resolution of the skeleton tables (entries from progress 0.0 to 1.0)
+SKELETON_TABLE_STEPS = 256
+
+# Progress resolution and size of the formatted skeleton cache
+PROGRESS_BUCKETS = 1024
+SKELETON_CACHE_SIZE = 4096
+
+# Number of per-calibration transform matrices kept in memory
+CALIBRATION_CACHE_SIZE = 1024
+
+# Angle curves measured from the demonstration videos (see build_reference_curves.py)
+REFERENCE_CURVES_DIR = Path(__file__).resolve().parent / "reference_curves"
+REFERENCE_CURVES_INDEX = "index.json"
+
 def interpolate_angle(start_angle, end_angle, progress, mid_ratio=0.5):
     """
     Interpolate between two angles with easing function.
@@ -87,47 +153,100 @@ def interpolate_angle(start_angle, end_angle, progress, mid_ratio=0.5):
     Args:
         start_angle: Starting angle in degrees
         end_angle: Ending angle in degrees
-        progress: Progress from 0.0 to 1.0
-        mid_ratio: Controls the steepness of the easing curve
+        progress: Progress from 0.0 to 1.0 (a number or an array of progress values)
+        mid_ratio: Progress at which the angle is halfway (controls the steepness of the easing curve)
     
     Returns:
-        Interpolated angle
+        Interpolated angle (an array of angles for array input)
     """
+    progress = np.asarray(progress, dtype=np.float64)
+    
     # Use a sigmoid-like easing function for natural movement
-    if progress < mid_ratio:
-        # Scale to [0, 1] within first half
-        t = progress / mid_ratio
-        # Ease-in function
-        factor = t * t * (3.0 - 2.0 * t)
-    else:
-        # Scale to [0, 1] within second half
-        t = (progress - mid_ratio) / (1.0 - mid_ratio)
-        # Ease-out function
-        factor = 1.0 - (1.0 - t) * (1.0 - t)
-    
-    return start_angle + (end_angle - start_angle) * factor
+    # Ease-in function over the first half (start angle -> halfway)
+    t_in = progress / mid_ratio
+    ease_in = 0.5 * t_in * t_in * (3.0 - 2.0 * t_in)
+    # Ease-out function over the second half (halfway -> end angle)
+    t_out = (progress - mid_ratio) / (1.0 - mid_ratio)
+    ease_out = 0.5 + 0.5 * (1.0 - (1.0 - t_out) * (1.0 - t_out))
+    factor = np.where(progress < mid_ratio, ease_in, ease_out)
+    
+    angle = start_angle + (end_angle - start_angle) * factor
+    return angle if angle.ndim else float(angle)
+
+def load_reference_curves(directory=REFERENCE_CURVES_DIR):
+    """
+    Memory-map the measured angle curves written by build_reference_curves.py.
+    
+    Returns:
+        Dictionary of exercise -> joint -> read-only (2, steps) array of the mean
+        and variance of the angle over evenly spaced progress values; empty when
+        no curves have been built
+    """
+    directory = Path(directory)
+    try:
+        with open(directory / REFERENCE_CURVES_INDEX) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    
+    curves = {}
+    for exercise, entry in index.get("exercises", {}).items():
+        try:
+            table = np.load(directory / entry["file"], mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Reference curves for {exercise} unavailable ({type(e).__name__}: {e})")
+            continue
+        curves[exercise] = dict(zip(entry["joints"], table))
+    return curves
+
+def measured_angle(curve, progress):
+    """Mean angle of a measured (2, steps) curve at a progress value or array of values"""
+    mean = curve[0]
+    angle = np.interp(progress, np.linspace(0.0, 1.0, len(mean)), mean)
+    return angle if angle.ndim else float(angle)
 
 def calculate_reference_angles(exercise, progress):
     """
     Calculate reference joint angles for a given exercise at specific progress point.
     
+    Joints with a curve measured from the demonstration videos follow its mean;
+    the others follow the eased REFERENCE_ANGLES interpolation.
+    
     Args:
         exercise: Exercise type string
-        progress: Progress from 0.0 (start) to 1.0 (end)
+        progress: Progress from 0.0 (start) to 1.0 (end), or an array of progress values
     
     Returns:
-        Dictionary of joint angles
+        Dictionary of joint angles (arrays of angles for array input)
     """
     if exercise not in REFERENCE_ANGLES:
         return {}
     
+    curves = REFERENCE_CURVES.get(exercise, {})
     angles = {}
     for joint, params in REFERENCE_ANGLES[exercise].items():
+        if joint in curves:
+            angles[joint] = measured_angle(curves[joint], progress)
+            continue
         start_angle, end_angle, mid_ratio = params
         angles[joint] = interpolate_angle(start_angle, end_angle, progress, mid_ratio)
     
     return angles
 
+def reference_angle_spread(exercise, progress):
+    """
+    Standard deviation of the measured joint angles between reps at a progress point.
+    
+    Returns:
+        Dictionary of joint -> standard deviation in degrees (arrays for array
+        input), for the joints that have a measured curve
+    """
+    spread = {}
+    for joint, curve in REFERENCE_CURVES.get(exercise, {}).items():
+        variance = np.interp(progress, np.linspace(0.0, 1.0, curve.shape[1]), curve[1])
+        spread[joint] = np.sqrt(variance) if variance.ndim else float(np.sqrt(variance))
+    return spread
+
 def calibrate_user_skeleton(landmarks):
     """
     Calibrate skeleton based on user's proportions from T-pose.
@@ -146,11 +265,8 @@ def calibrate_user_skeleton(landmarks):
     
     # Calculate limb lengths
     limb_lengths = {
-        "torso": distance(user_keypoints.get("left_shoulder"), user_keypoints.get("left_hip")),
-        "upper_arm": distance(user_keypoints.get("left_shoulder"), user_keypoints.get("left_elbow")),
-        "lower_arm": distance(user_keypoints.get("left_elbow"), user_keypoints.get("left_wrist")),
-        "upper_leg": distance(user_keypoints.get("left_hip"), user_keypoints.get("left_knee")),
-        "lower_leg": distance(user_keypoints.get("left_knee"), user_keypoints.get("left_ankle"))
+        limb: float(distance(user_keypoints.get(start), user_keypoints.get(end)))
+        for limb, (start, end) in LIMBS.items()
     }
     
     # Calculate central points
@@ -160,51 +276,144 @@ def calibrate_user_skeleton(landmarks):
     # Calculate body scaling factor relative to a "standard" skeleton
     scaling_factor = limb_lengths["torso"] * 2  # Normalize to torso height
     
-    return {
+    calibration = {
         "limb_lengths": limb_lengths,
         "mid_shoulder": mid_shoulder,
         "mid_hip": mid_hip,
         "scaling_factor": scaling_factor,
         "keypoints": user_keypoints
     }
+    # Derive the transforms once here instead of on every skeleton request
+    calibration["transform"] = calibration_transform(calibration)
+    return calibration
 
-def get_reference_skeleton(exercise, progress, calibration=None):
+def calibration_transform(calibration):
     """
-    Get reference skeleton for overlay based on exercise, phase, and calibration.
+    Derive the scales that map the reference skeleton onto the user's proportions.
+    
+    Args:
+        calibration: Calibration data from calibrate_user_skeleton
+        
+    Returns:
+        Dictionary with:
+            scale: Global scale (user torso length / reference torso length)
+            offset: [dx, dy] translation applied after scaling, which moves the
+                reference hips onto the user's hips
+            limb_scales: Per-limb length ratios relative to the global scale
+                (1.0 for limbs that couldn't be measured)
+    """
+    limb_lengths = calibration.get("limb_lengths", {})
+    torso = limb_lengths.get("torso", 0)
+    if not torso:
+        # Without a torso measurement there is nothing to scale against
+        return {"scale": 1.0, "offset": [0.0, 0.0], "limb_scales": {limb: 1.0 for limb in LIMBS}}
+    
+    scale = torso / REFERENCE_LIMB_LENGTHS["torso"]
+    reference_mid_hip = midpoint(T_POSE_REFERENCE["left_hip"], T_POSE_REFERENCE["right_hip"])
+    user_mid_hip = calibration.get("mid_hip") or reference_mid_hip
+    limb_scales = {
+        limb: float(limb_lengths[limb] / REFERENCE_LIMB_LENGTHS[limb] / scale) if limb_lengths.get(limb) else 1.0
+        for limb in LIMBS
+    }
+    return {
+        "scale": float(scale),
+        "offset": [float(user_mid_hip[0] - scale * reference_mid_hip[0]),
+                   float(user_mid_hip[1] - scale * reference_mid_hip[1])],
+        "limb_scales": limb_scales
+    }
+
+def build_skeleton_trajectory(exercise, progress):
+    """
+    Compute (uncalibrated) reference skeletons for an array of progress values in one pass.
     
     Args:
         exercise: Exercise type
-        progress: Exercise progress (0.0 to 1.0)
-        calibration: Optional calibration data from calibrate_user_skeleton
+        progress: Array of N progress values (0.0 to 1.0)
         
     Returns:
-        List of [x,y] coordinates for landmarks to use as overlay
+        (N, joints, 2) array in SKELETON_JOINTS order
     """
-    # Get reference angles
+    progress = np.atleast_1d(np.asarray(progress, dtype=np.float64))
+    
+    # Get reference angle curves
     angles = calculate_reference_angles(exercise, progress)
     
-    # Start with T-pose and adjust
-    skeleton = dict(T_POSE_REFERENCE)
+    # Start with the T-pose for every sample (the adjusters modify points in place)
+    skeleton = {
+        name: np.tile(np.asarray(point, dtype=np.float64), (len(progress), 1))
+        for name, point in T_POSE_REFERENCE.items()
+    }
     
     # Apply exercise-specific adjustments based on angles
-    if exercise == "squats":
-        adjust_squat_skeleton(skeleton, angles, progress)
-    elif exercise == "deadlifts":
-        adjust_deadlift_skeleton(skeleton, angles, progress)
-    elif exercise == "pushups":
-        adjust_pushup_skeleton(skeleton, angles, progress)
-    elif exercise == "lunges":
-        adjust_lunge_skeleton(skeleton, angles, progress)
-    elif exercise == "situps":
-        adjust_situp_skeleton(skeleton, angles, progress)
-    elif exercise == "bicep_curls":
-        adjust_bicep_curl_skeleton(skeleton, angles, progress)
+    adjuster = SKELETON_ADJUSTERS.get(exercise)
+    if adjuster:
+        adjuster(skeleton, angles, progress)
     
-    # Apply user calibration if provided
+    return np.stack([skeleton[name] for name in SKELETON_JOINTS], axis=1)
+
+def build_reference_skeleton(exercise, progress):
+    """
+    Compute an (uncalibrated) reference skeleton from scratch.
+    
+    Args:
+        exercise: Exercise type
+        progress: Exercise progress (0.0 to 1.0)
+        
+    Returns:
+        Dictionary of joint name -> [x, y]
+    """
+    positions = build_skeleton_trajectory(exercise, [progress])[0].tolist()
+    return dict(zip(SKELETON_JOINTS, positions))
+
+def build_skeleton_table(exercise, steps=SKELETON_TABLE_STEPS):
+    """Read-only (steps, joints, 2) array of reference skeletons for evenly spaced progress values"""
+    table = build_skeleton_trajectory(exercise, np.linspace(0.0, 1.0, steps))
+    table.flags.writeable = False
+    return table
+
+def reference_trajectory(exercise, samples=64, calibration=None, calibration_id=None):
+    """
+    Full reference trajectory of one rep, for clients that interpolate locally.
+    
+    Args:
+        exercise: Exercise type (must be in REFERENCE_ANGLES)
+        samples: Number of evenly spaced progress samples from 0.0 to 1.0
+        calibration: Optional calibration data from calibrate_user_skeleton
+        calibration_id: Optional ID to cache the calibration's matrix under
+        
+    Returns:
+        Dictionary with the progress values (N,), the skeletons (N, joints, 2),
+        the angle curves (joint -> (N,) array) and, for measured joints, the
+        angle standard deviation between reps (joint -> (N,) array)
+    """
+    progress = np.linspace(0.0, 1.0, samples)
+    skeleton = build_skeleton_trajectory(exercise, progress)
     if calibration:
-        skeleton = apply_calibration(skeleton, calibration)
+        skeleton = calibrate_points(skeleton, calibration, calibration_id)
+    return {
+        "progress": progress,
+        "skeleton": skeleton,
+        "angles": calculate_reference_angles(exercise, progress),
+        "angle_std": reference_angle_spread(exercise, progress)
+    }
+
+def reference_skeleton_array(exercise, progress):
+    """
+    Reference joint positions at a progress point, interpolated from the exercise's table.
     
-    # Convert to list format expected by frontend
+    Returns:
+        (joints, 2) array in SKELETON_JOINTS order (the T-pose for unknown exercises)
+    """
+    table = SKELETON_TABLES.get(exercise)
+    if table is None:
+        return T_POSE_ARRAY
+    position = min(max(float(progress), 0.0), 1.0) * (len(table) - 1)
+    index = min(int(position), len(table) - 2)
+    fraction = position - index
+    return table[index] + (table[index + 1] - table[index]) * fraction
+
+def skeleton_to_landmarks(skeleton):
+    """Convert a joint name -> [x, y] skeleton to the 33-entry landmark list used by the frontend"""
     reference_landmarks = [None] * 33  # MediaPipe has 33 landmarks
     for name, idx in LANDMARK_INDICES.items():
         if name in skeleton:
@@ -213,9 +422,54 @@ def get_reference_skeleton(exercise, progress, calibration=None):
                 "y": skeleton[name][1],
                 "z": 0  # We're in 2D
             }
-    
     return reference_landmarks
 
+_skeleton_cache = OrderedDict()  # (exercise, progress bucket, calibration id) -> landmarks
+_skeleton_cache_lock = threading.Lock()
+
+def get_reference_skeleton(exercise, progress, calibration=None, calibration_id=None):
+    """
+    Get reference skeleton for overlay based on exercise, phase, and calibration.
+    
+    Args:
+        exercise: Exercise type
+        progress: Exercise progress (0.0 to 1.0)
+        calibration: Optional calibration data from calibrate_user_skeleton
+        calibration_id: ID the calibration is stored under; results are only cached
+            for calibrated skeletons when it is given
+        
+    Returns:
+        List of [x,y] coordinates for landmarks to use as overlay (shared between
+        callers when cached, so don't modify it)
+    """
+    progress = min(max(float(progress), 0.0), 1.0)
+    if calibration and calibration_id is None:
+        return _reference_landmarks(exercise, progress, calibration)
+    
+    bucket = round(progress * PROGRESS_BUCKETS)
+    key = (exercise, bucket, calibration_id if calibration else None)
+    with _skeleton_cache_lock:
+        landmarks = _skeleton_cache.get(key)
+        if landmarks is not None:
+            _skeleton_cache.move_to_end(key)
+            return landmarks
+    
+    landmarks = _reference_landmarks(exercise, bucket / PROGRESS_BUCKETS, calibration, calibration_id)
+    with _skeleton_cache_lock:
+        _skeleton_cache[key] = landmarks
+        if len(_skeleton_cache) > SKELETON_CACHE_SIZE:
+            _skeleton_cache.popitem(last=False)
+    return landmarks
+
+def _reference_landmarks(exercise, progress, calibration=None, calibration_id=None):
+    positions = reference_skeleton_array(exercise, progress)
+    
+    # Apply user calibration if provided
+    if calibration:
+        positions = calibrate_points(positions, calibration, calibration_id)
+    
+    return skeleton_to_landmarks(dict(zip(SKELETON_JOINTS, positions.tolist())))
+
 # Helper functions
 
 def distance(p1, p2):
@@ -231,27 +485,93 @@ def midpoint(p1, p2):
     return [(p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2]
 
 def rotate_point(point, pivot, angle_deg):
-    """Rotate a point around a pivot by given angle in degrees"""
+    """Rotate a point around a pivot by given angle in degrees (works on (..., 2) arrays of points)"""
+    point = np.asarray(point, dtype=np.float64)
+    pivot = np.asarray(pivot, dtype=np.float64)
     angle_rad = np.radians(angle_deg)
     s, c = np.sin(angle_rad), np.cos(angle_rad)
     
     # Translate to origin
-    x, y = point[0] - pivot[0], point[1] - pivot[1]
+    x, y = point[..., 0] - pivot[..., 0], point[..., 1] - pivot[..., 1]
     
     # Rotate
     x_new = x * c - y * s
     y_new = x * s + y * c
     
     # Translate back
-    return [x_new + pivot[0], y_new + pivot[1]]
+    return np.stack([x_new + pivot[..., 0], y_new + pivot[..., 1]], axis=-1)
 
-def apply_calibration(skeleton, calibration):
-    """Apply user calibration to reference skeleton"""
-    # This would be a more complex implementation with proper scaling
-    # For now, returning the original skeleton
-    return skeleton
+def calibration_matrix(transform):
+    """
+    Build the linear map of a calibration transform.
+    
+    Args:
+        transform: Transform from calibration_transform
+        
+    Returns:
+        (matrix, offset): a (joints, joints) matrix that applies the per-limb and
+        global scales along SKELETON_CHAIN, and the [dx, dy] offset added afterwards
+    """
+    index = {name: i for i, name in enumerate(SKELETON_JOINTS)}
+    identity = np.eye(len(SKELETON_JOINTS))
+    limb_scales = transform.get("limb_scales", {})
+    rows = {}
+    for joint, parents, limb in SKELETON_CHAIN:
+        parent_reference = identity[[index[parent] for parent in parents]].mean(axis=0)
+        parent_calibrated = np.mean([rows.get(parent, identity[index[parent]]) for parent in parents], axis=0)
+        limb_scale = limb_scales.get(limb, 1.0) if limb else 1.0
+        rows[joint] = parent_calibrated + limb_scale * (identity[index[joint]] - parent_reference)
+    matrix = np.array([rows[name] for name in SKELETON_JOINTS]) * transform.get("scale", 1.0)
+    return matrix, np.asarray(transform.get("offset", [0.0, 0.0]), dtype=np.float64)
+
+_calibration_matrices = OrderedDict()  # calibration id -> (matrix, offset)
+_calibration_matrices_lock = threading.Lock()
+
+def get_calibration_matrix(calibration, calibration_id=None):
+    """Return calibration_matrix for a calibration, cached per calibration_id"""
+    if calibration_id is not None:
+        with _calibration_matrices_lock:
+            cached = _calibration_matrices.get(calibration_id)
+            if cached is not None:
+                _calibration_matrices.move_to_end(calibration_id)
+                return cached
+    
+    # Calibrations from calibrate_user_skeleton carry their precomputed transform
+    transform = calibration.get("transform") or calibration_transform(calibration)
+    matrix = calibration_matrix(transform)
+    
+    if calibration_id is not None:
+        with _calibration_matrices_lock:
+            _calibration_matrices[calibration_id] = matrix
+            if len(_calibration_matrices) > CALIBRATION_CACHE_SIZE:
+                _calibration_matrices.popitem(last=False)
+    return matrix
+
+def calibrate_points(points, calibration, calibration_id=None):
+    """
+    Map reference joint positions onto the user's proportions.
+    
+    Args:
+        points: (..., joints, 2) array in SKELETON_JOINTS order - one skeleton or a
+            whole (N, joints, 2) trajectory, transformed with a single matrix product
+        calibration: Calibration data from calibrate_user_skeleton
+        calibration_id: Optional ID to cache the calibration's matrix under
+        
+    Returns:
+        Calibrated array of the same shape
+    """
+    matrix, offset = get_calibration_matrix(calibration, calibration_id)
+    return matrix @ np.asarray(points, dtype=np.float64) + offset
+
+def apply_calibration(skeleton, calibration, calibration_id=None):
+    """Apply user calibration to reference skeleton (a joint name -> [x, y] dictionary)"""
+    points = np.array([skeleton[name] for name in SKELETON_JOINTS], dtype=np.float64)
+    calibrated = calibrate_points(points, calibration, calibration_id).tolist()
+    return {**skeleton, **dict(zip(SKELETON_JOINTS, calibrated))}
 
 # Exercise-specific skeleton adjusters (simplified implementations)
+# The skeleton maps joint names to (N, 2) point arrays and the angles are (N,)
+# arrays, so one call adjusts a whole trajectory.
 
 def adjust_squat_skeleton(skeleton, angles, progress):
     """Adjust skeleton for squat position"""
@@ -263,13 +583,11 @@ def adjust_squat_skeleton(skeleton, angles, progress):
     drop_amount = (170 - knee_angle) / 80 * 0.3  # Max drop of 0.3 units
     for part in ["nose", "left_shoulder", "right_shoulder", "left_hip", "right_hip"]:
         if part in skeleton:
-            skeleton[part][1] += drop_amount
+            skeleton[part][..., 1] += drop_amount
     
     # Bend knees
-    left_knee_pos = skeleton["left_knee"]
-    right_knee_pos = skeleton["right_knee"]
-    skeleton["left_ankle"] = [left_knee_pos[0], left_knee_pos[1] + 0.2]
-    skeleton["right_ankle"] = [right_knee_pos[0], right_knee_pos[1] + 0.2]
+    skeleton["left_ankle"] = skeleton["left_knee"] + [0, 0.2]
+    skeleton["right_ankle"] = skeleton["right_knee"] + [0, 0.2]
     
     # Forward lean based on hip angle
     lean_angle = 90 - (175 - hip_angle) * 0.5  # Convert hip angle to forward lean
@@ -309,13 +627,28 @@ def adjust_bicep_curl_skeleton(skeleton, angles, progress):
     left_shoulder = skeleton["left_shoulder"]
     left_elbow = skeleton["left_elbow"]
     # Rotate wrist around elbow by elbow_angle
-    skeleton["left_wrist"] = rotate_point([left_elbow[0] - 0.15, left_elbow[1]], 
-                                         left_elbow, 180 - elbow_angle)
+    skeleton["left_wrist"] = rotate_point(left_elbow - [0.15, 0], left_elbow, 180 - elbow_angle)
     
     # Adjust right arm (mirror of left)
     right_shoulder = skeleton["right_shoulder"]
     right_elbow = skeleton["right_elbow"]
-    skeleton["right_wrist"] = rotate_point([right_elbow[0] + 0.15, right_elbow[1]],
-                                          right_elbow, elbow_angle - 180)
+    skeleton["right_wrist"] = rotate_point(right_elbow + [0.15, 0], right_elbow, elbow_angle - 180)
     
     return skeleton
+
+SKELETON_ADJUSTERS = {
+    "squats": adjust_squat_skeleton,
+    "deadlifts": adjust_deadlift_skeleton,
+    "pushups": adjust_pushup_skeleton,
+    "lunges": adjust_lunge_skeleton,
+    "situps": adjust_situp_skeleton,
+    "bicep_curls": adjust_bicep_curl_skeleton,
+}
+
+# Measured angle curves, memory-mapped at startup (see load_reference_curves)
+REFERENCE_CURVES = load_reference_curves()
+
+# Precomputed reference skeleton tables (see build_skeleton_table)
+T_POSE_ARRAY = np.array([T_POSE_REFERENCE[name] for name in SKELETON_JOINTS])
+T_POSE_ARRAY.flags.writeable = False
+SKELETON_TABLES = {exercise: build_skeleton_table(exercise) for exercise in REFERENCE_ANGLES}
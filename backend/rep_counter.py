@@ -0,0 +1,84 @@
+"""
+Rep Counting State Machine
+--------------------------
+Shared, table-driven stage tracking and rep counting for the exercise modules.
+
+Every exercise alternates between a rest stage and an active stage, driven by
+one angle and configured in feedback_config.REP_COUNTING. Transitions use a
+hysteresis band (separate enter/exit thresholds) and a minimum dwell time, so
+jitter around a threshold can't flap the stage or double count a rep. Phase
+timing is based on frame timestamps, which keeps it correct at low or uneven
+frame rates. Per frame the machine costs a couple of comparisons.
+
+The timing state (stage start, last time at rest, frames in the stage) is a
+small dict the modules keep in their exercise state under "rep_phase".
+"""
+from feedback_config import REP_COUNTING
+
+def advance_rep_phase(exercise, value, stage, phase, now):
+    """
+    Advance an exercise's rep state machine by one frame.
+
+    Args:
+        exercise: Exercise name (key in REP_COUNTING)
+        value: The angle driving the machine for this frame
+        stage: Current stage ("up"/"down"); ignored for a new set
+        phase: Timing state from the previous frame (None for a new set, which
+            starts in the stage of its first frame)
+        now: Frame timestamp in seconds
+
+    Returns:
+        Dictionary with:
+            stage: Stage after this frame
+            phase: Updated timing state to store for the next frame
+            event: "enter" / "exit" when the active stage was entered / left, else None
+            rep_completed: True when this frame completes a rep
+            duration: Length of the phase that just ended (seconds): the movement
+                from rest into the active stage on "enter", the time spent in the
+                active stage on "exit"
+    """
+    config = REP_COUNTING[exercise]
+    rest_stage = config["REST_STAGE"]
+
+    if not phase:
+        # A fresh set starts in whatever stage its first frame is in, without
+        # counting: a client that joins mid-rep must not score a phantom rep
+        stage = config["ACTIVE_STAGE"] if value < config["ENTER_ACTIVE"] else rest_stage
+        return {
+            "stage": stage,
+            "phase": {"stage_start": now, "last_rest_time": now, "stage_frames": 0},
+            "event": None,
+            "rep_completed": False,
+            "duration": 0.0
+        }
+
+    phase = dict(phase)
+    phase["stage_frames"] += 1
+    can_transition = (
+        phase["stage_frames"] >= config["MIN_DWELL_FRAMES"]
+        or now - phase["stage_start"] >= config["MIN_DWELL"]
+    )
+
+    event = None
+    duration = 0.0
+    if value > config["EXIT_ACTIVE"]:
+        if stage != rest_stage and can_transition:
+            event = "exit"
+            duration = now - phase["stage_start"]
+            stage = rest_stage
+            phase["stage_start"], phase["stage_frames"] = now, 0
+        if stage == rest_stage:
+            phase["last_rest_time"] = now
+    elif value < config["ENTER_ACTIVE"] and stage == rest_stage and can_transition:
+        event = "enter"
+        duration = now - phase["last_rest_time"]
+        stage = config["ACTIVE_STAGE"]
+        phase["stage_start"], phase["stage_frames"] = now, 0
+
+    return {
+        "stage": stage,
+        "phase": phase,
+        "event": event,
+        "rep_completed": event is not None and event == config["COUNT_ON"],
+        "duration": duration
+    }
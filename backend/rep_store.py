@@ -0,0 +1,69 @@
+"""
+Rep Log Store
+-------------
+Append-only, line-delimited JSON storage for per-rep session data.
+
+Each session gets its own {session_id}.reps.ndjson file next to the session
+summaries. Reps are appended one line at a time as they are recorded, so
+nothing has to be held in memory or rewritten when a session ends.
+"""
+import json
+from pathlib import Path
+
+REP_LOG_SUFFIX = ".reps.ndjson"
+
+class RepStore:
+    """Append-only NDJSON rep logs, one file per session"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(exist_ok=True)
+
+    def path(self, session_id):
+        return self.directory / f"{session_id}{REP_LOG_SUFFIX}"
+
+    def exists(self, session_id):
+        return self.path(session_id).exists()
+
+    def append(self, session_id, rep_data):
+        """Append one rep as a single line (O_APPEND keeps concurrent lines intact)"""
+        line = json.dumps(rep_data, separators=(",", ":")) + "\n"
+        with open(self.path(session_id), "a") as f:
+            f.write(line)
+
+    def iter_reps(self, session_id, offset=0):
+        """
+        Iterate over the reps of a session starting at a byte offset.
+
+        The offset must be 0 or a value previously yielded by this method
+        (the start of a line); anything else raises ValueError right away.
+
+        Yields:
+            (next_offset, rep_data) tuples; next_offset points just past the rep
+        """
+        try:
+            f = open(self.path(session_id), "rb")
+        except FileNotFoundError:
+            return iter(())
+        if offset > 0:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                f.close()
+                raise ValueError(f"Invalid rep log cursor: {offset}")
+        return self._read_lines(f, offset)
+
+    @staticmethod
+    def _read_lines(f, offset):
+        with f:
+            for line in iter(f.readline, b""):
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    break  # Partially written line; it will be complete on the next read
+                yield offset, json.loads(line)
+
+    def read_reps(self, session_id, exercise=None):
+        """Load all reps of a session, optionally only those of one exercise"""
+        return [
+            rep for _, rep in self.iter_reps(session_id)
+            if exercise is None or rep.get("exercise") == exercise
+        ]
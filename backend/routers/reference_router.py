@@ -2,16 +2,17 @@
 API Router for Reference Poses
 ---------------------------
 Provides endpoints for reference skeleton generation
+
+reference_poses (and NumPy behind it) is imported by the handlers on first use,
+so the router doesn't slow down startup with REGENIX_LAZY_IMPORTS=1.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional, Union
+from functools import lru_cache
 import json
 
-from reference_poses import (
-    calibrate_user_skeleton, get_reference_skeleton, 
-    calculate_reference_angles
-)
+from calibration_store import CalibrationStore
 
 router = APIRouter(prefix="/reference", tags=["reference"])
 
@@ -24,18 +25,18 @@ class ReferenceRequest(BaseModel):
     progress: float
     calibration_id: Optional[str] = None
 
-# Simple in-memory cache for calibrations
-calibration_cache = {}
+# Calibrations are persisted in SQLite (shared across workers) with an LRU/TTL memory cache
+calibration_store = CalibrationStore()
 
 @router.post("/calibrate")
 async def api_calibrate(request: CalibrationRequest):
     """Calibrate the reference skeleton to the user's proportions"""
+    from reference_poses import calibrate_user_skeleton
+
     calibration_data = calibrate_user_skeleton(request.landmarks)
     
-    # Generate ID and cache
-    import uuid
-    calibration_id = str(uuid.uuid4())
-    calibration_cache[calibration_id] = calibration_data
+    # Generate ID and store
+    calibration_id = calibration_store.put(calibration_data)
     
     return {"calibration_id": calibration_id}
 
@@ -46,14 +47,14 @@ async def api_get_reference_skeleton(
     calibration_id: Optional[str] = None
 ):
     """Get reference skeleton for the specified exercise and progress"""
+    from reference_poses import get_reference_skeleton
+
     # Get calibration if specified
-    calibration = None
-    if calibration_id and calibration_id in calibration_cache:
-        calibration = calibration_cache[calibration_id]
+    calibration = calibration_store.get(calibration_id) if calibration_id else None
     
     # Generate reference skeleton
     try:
-        reference = get_reference_skeleton(exercise, progress, calibration)
+        reference = get_reference_skeleton(exercise, progress, calibration, calibration_id)
         return {
             "exercise": exercise,
             "progress": progress,
@@ -65,6 +66,8 @@ async def api_get_reference_skeleton(
 @router.get("/angles/{exercise}")
 async def api_get_reference_angles(exercise: str, progress: float = 0.0):
     """Get reference joint angles for the specified exercise and progress"""
+    from reference_poses import calculate_reference_angles
+
     try:
         angles = calculate_reference_angles(exercise, progress)
         return {
@@ -74,3 +77,70 @@ async def api_get_reference_angles(exercise: str, progress: float = 0.0):
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error calculating angles: {str(e)}")
+
+# Trajectories are cached as rounded float32 arrays (about 130 KB at 1024 samples,
+# a fifteenth of the same data as Python lists) and serialized per request
+@lru_cache(maxsize=128)
+def _trajectory_arrays(exercise, samples, calibration_id=None):
+    import numpy as np
+    from reference_poses import reference_trajectory
+
+    def compact(values, decimals):
+        values = np.round(values, decimals).astype(np.float32)
+        values.setflags(write=False)
+        return values
+
+    calibration = calibration_store.get(calibration_id) if calibration_id else None
+    trajectory = reference_trajectory(exercise, samples, calibration, calibration_id)
+    return {
+        "progress": compact(trajectory["progress"], 4),
+        "skeleton": compact(trajectory["skeleton"], 4),
+        "angles": {joint: compact(curve, 2) for joint, curve in trajectory["angles"].items()},
+        "angle_std": {joint: compact(std, 2) for joint, std in trajectory["angle_std"].items()}
+    }
+
+def _to_list(values, decimals):
+    # Rounding again in float64 gives back the short decimals, not float32 noise
+    import numpy as np
+    return np.round(values.astype(np.float64), decimals).tolist()
+
+def _trajectory_response(exercise, samples, calibration_id=None):
+    from reference_poses import LANDMARK_INDICES, SKELETON_JOINTS
+
+    trajectory = _trajectory_arrays(exercise, samples, calibration_id)
+    return {
+        "exercise": exercise,
+        "samples": samples,
+        "calibration_id": calibration_id,
+        "joints": list(SKELETON_JOINTS),
+        "landmark_indices": [LANDMARK_INDICES[name] for name in SKELETON_JOINTS],
+        "progress": _to_list(trajectory["progress"], 4),
+        "skeleton": _to_list(trajectory["skeleton"], 4),
+        "angles": {joint: _to_list(curve, 2) for joint, curve in trajectory["angles"].items()},
+        "angle_std": {joint: _to_list(std, 2) for joint, std in trajectory["angle_std"].items()}
+    }
+
+@router.get("/trajectory/{exercise}")
+async def api_get_reference_trajectory(
+    exercise: str,
+    samples: int = Query(64, ge=2, le=1024),
+    calibration_id: Optional[str] = None
+):
+    """
+    Get the whole reference trajectory of one rep in a single response.
+    
+    skeleton is samples x joints x [x, y] (joints in the order of "joints", with
+    their MediaPipe indices in "landmark_indices") and angles holds one curve per
+    joint angle, both sampled at the "progress" values. angle_std gives the spread
+    between reps for the joints measured from the demonstration videos. Clients
+    fetch it once per exercise and interpolate between samples locally. With a known calibration_id
+    the skeleton is fitted to the user's proportions.
+    """
+    from reference_poses import REFERENCE_ANGLES
+
+    if exercise not in REFERENCE_ANGLES:
+        raise HTTPException(status_code=404, detail=f"No reference trajectory for exercise: {exercise}")
+    # Unknown or expired calibrations fall back to the generic trajectory
+    if calibration_id and calibration_store.get(calibration_id) is None:
+        calibration_id = None
+    return _trajectory_response(exercise, samples, calibration_id)
@@ -3,18 +3,26 @@ API Router for Session Management
 ------------------------------
 Provides endpoints for managing exercise sessions
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import itertools
+import json
+import math
 import time
 from datetime import datetime
 
 from session_state import (
-    start_session, end_session, get_session, record_rep
+    start_session, end_session, get_session, get_session_reps, iter_session_reps,
+    record_rep, update_metric_stats
 )
 
 router = APIRouter(prefix="/session", tags=["session"])
 
+# Feedback flags that report good form rather than an issue
+POSITIVE_FLAGS = ("GOOD_FORM", "GOOD_CURL", "GOOD_DEPTH")
+
 # Data models
 class SessionRequest(BaseModel):
     user_id: Optional[str] = None
@@ -44,10 +52,17 @@ async def api_record_rep(session_id: str, request: RecordRepRequest):
 
 @router.get("/{session_id}")
 async def api_get_session(session_id: str):
+    """
+    Get a session's state and aggregate metrics.
+    
+    The rep log is not included; fetch it page by page from reps_url
+    (/session/{session_id}/reps with cursor and limit).
+    """
     session = get_session(session_id)
     if "error" in session:
         raise HTTPException(status_code=404, detail=session["error"])
-    return session
+    # The rep log is unbounded; clients page through it with /{session_id}/reps
+    return {**session, "reps_url": f"/session/{session_id}/reps"}
 
 @router.post("/{session_id}/end")
 async def api_end_session(session_id: str, background_tasks: BackgroundTasks):
@@ -104,13 +119,17 @@ async def api_get_session_report(session_id: str):
     return report
 
 @router.get("/{session_id}/exercise/{exercise_name}/report")
-async def api_get_exercise_report(session_id: str, exercise_name: str):
+async def api_get_exercise_report(session_id: str, exercise_name: str, include_reps: bool = False):
     """
     Get a detailed report for a specific exercise within a session.
     
+    The report is built from running aggregates without reading the rep log, so
+    it is cheap enough to poll during a session. Pass include_reps=true to add
+    the rep-by-rep breakdown (or page through /exercise/{exercise_name}/reps).
+    
     Returns:
         - Exercise-specific metrics
-        - Rep-by-rep breakdown
+        - Rep-by-rep breakdown (only with include_reps=true)
         - Form analysis and improvement suggestions
     """
     session = get_session(session_id)
@@ -122,8 +141,15 @@ async def api_get_exercise_report(session_id: str, exercise_name: str):
     if exercise_name not in exercises:
         raise HTTPException(status_code=404, detail=f"Exercise '{exercise_name}' not found in this session")
     
+    # Sessions saved before running aggregates need their reps to build the report
+    exercise_reps = None
+    if include_reps or "metric_stats" not in exercises[exercise_name]:
+        exercise_reps = get_session_reps(session_id, exercise_name)
+    
     # Generate detailed exercise report
-    report = generate_exercise_report(session, exercise_name)
+    report = generate_exercise_report(session, exercise_name, exercise_reps)
+    if not include_reps:
+        report.pop("reps_breakdown")
     return report
 
 @router.get("/{session_id}/exercises")
@@ -152,43 +178,70 @@ async def api_get_session_exercises(session_id: str):
     }
 
 @router.get("/{session_id}/reps")
-async def api_get_session_reps(session_id: str):
+async def api_get_session_reps(
+    session_id: str,
+    cursor: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: bool = False
+):
     """
     Get detailed data for all reps across all exercises in the session.
+    
+    Pass limit to page through the reps (continue with the returned
+    next_cursor), or stream=true to receive them as NDJSON.
     """
     session = get_session(session_id)
     if "error" in session:
         raise HTTPException(status_code=404, detail=session["error"])
     
-    # Return the full rep log for this session
-    return {
-        "session_id": session_id,
-        "rep_count": len(session.get("rep_log", [])),
-        "reps": session.get("rep_log", [])
-    }
+    return rep_log_response(session_id, None, cursor, limit, stream)
 
 @router.get("/{session_id}/exercise/{exercise_name}/reps")
-async def api_get_exercise_reps(session_id: str, exercise_name: str):
+async def api_get_exercise_reps(
+    session_id: str,
+    exercise_name: str,
+    cursor: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: bool = False
+):
     """
     Get detailed data for all reps of a specific exercise.
+    
+    Supports the same cursor, limit and stream parameters as /reps.
     """
     session = get_session(session_id)
     if "error" in session:
         raise HTTPException(status_code=404, detail=session["error"])
     
-    # Filter rep log for the specified exercise
-    rep_log = session.get("rep_log", [])
-    exercise_reps = [rep for rep in rep_log if rep.get("exercise") == exercise_name]
-    
-    return {
-        "session_id": session_id,
-        "exercise": exercise_name,
-        "rep_count": len(exercise_reps),
-        "reps": exercise_reps
-    }
+    return rep_log_response(session_id, exercise_name, cursor, limit, stream)
 
 # Helper functions for generating reports
 
+def rep_log_response(session_id, exercise_name, cursor, limit, stream):
+    """Build a (paginated or streamed) rep log response"""
+    try:
+        reps = iter_session_reps(session_id, exercise_name, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if limit is not None:
+        reps = itertools.islice(reps, limit)
+    
+    if stream:
+        # One rep per line; each carries the cursor to resume after it
+        lines = (json.dumps({"cursor": next_cursor, **rep}) + "\n" for next_cursor, rep in reps)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    
+    page = list(reps)
+    response = {"session_id": session_id}
+    if exercise_name is not None:
+        response["exercise"] = exercise_name
+    response["rep_count"] = len(page)
+    response["reps"] = [rep for _, rep in page]
+    if limit is not None:
+        # A full page may have more reps after it; a short page is the end of the log
+        response["next_cursor"] = page[-1][0] if len(page) == limit else None
+    return response
+
 def generate_session_report(session):
     """Generate a comprehensive report for a session"""
     total_reps = session["metrics"].get("total_reps", 0)
@@ -210,7 +263,7 @@ def generate_session_report(session):
         
         # Add to common issues
         for issue, count in data.get("feedback_counts", {}).items():
-            if issue not in ["GOOD_FORM", "GOOD_CURL", "GOOD_DEPTH"]:
+            if issue not in POSITIVE_FLAGS:
                 if issue not in common_issues:
                     common_issues[issue] = 0
                 common_issues[issue] += count
@@ -240,47 +293,53 @@ def generate_session_report(session):
         "improvement_suggestions": improvements
     }
 
-def generate_exercise_report(session, exercise_name):
-    """Generate a detailed report for a specific exercise"""
+def generate_exercise_report(session, exercise_name, exercise_reps=None):
+    """
+    Generate a detailed report for a specific exercise.
+    
+    Statistics come from the running aggregates kept by record_rep; the logged
+    reps are only needed for the rep-by-rep breakdown (and for sessions saved
+    before the aggregates existed).
+    """
     exercises = session["metrics"].get("exercises", {})
     if exercise_name not in exercises:
         return {"error": f"Exercise '{exercise_name}' not found"}
     
     exercise_data = exercises[exercise_name]
+    exercise_reps = exercise_reps or []
     
-    # Get rep-by-rep data
-    rep_log = session.get("rep_log", [])
-    exercise_reps = [rep for rep in rep_log if rep.get("exercise") == exercise_name]
+    metric_stats = exercise_data.get("metric_stats")
+    last_score = exercise_data.get("last_score")
+    if metric_stats is None:
+        # Rebuild the aggregates of an older session from its reps
+        metric_stats = {}
+        for rep in exercise_reps:
+            update_metric_stats(metric_stats, rep.get("metrics", {}))
+        last_score = exercise_reps[-1].get("score", 0) if exercise_reps else 0
     
     # Analyze progress over time
-    rep_scores = [rep.get("score", 0) for rep in exercise_reps]
-    trend = "improving" if is_improving(rep_scores) else "consistent"
-    if len(rep_scores) >= 3 and rep_scores[-1] < sum(rep_scores[:-1]) / len(rep_scores[:-1]):
+    reps = exercise_data.get("reps", 0)
+    total_score = exercise_data.get("total_score", 0)
+    trend = "improving" if is_improving(reps, total_score, last_score) else "consistent"
+    if reps >= 3 and last_score < (total_score - last_score) / (reps - 1):
         trend = "declining"
     
     # Generate form analysis
-    form_issues = {}
-    for rep in exercise_reps:
-        for flag in rep.get("feedback_flags", []):
-            if flag not in ["GOOD_FORM", "GOOD_CURL", "GOOD_DEPTH"]:
-                if flag not in form_issues:
-                    form_issues[flag] = 0
-                form_issues[flag] += 1
+    form_issues = {
+        flag: count for flag, count in exercise_data.get("feedback_counts", {}).items()
+        if flag not in POSITIVE_FLAGS
+    }
     
     # Analyze metrics
-    metrics_analysis = {}
-    if exercise_reps and exercise_reps[0].get("metrics"):
-        first_rep = exercise_reps[0]
-        metric_keys = first_rep.get("metrics", {}).keys()
-        
-        for key in metric_keys:
-            values = [rep.get("metrics", {}).get(key, 0) for rep in exercise_reps if key in rep.get("metrics", {})]
-            if values:
-                metrics_analysis[key] = {
-                    "average": sum(values) / len(values),
-                    "min": min(values),
-                    "max": max(values)
-                }
+    metrics_analysis = {
+        key: {
+            "average": stats["mean"],
+            "min": stats["min"],
+            "max": stats["max"],
+            "std_dev": math.sqrt(stats["m2"] / stats["count"])
+        }
+        for key, stats in metric_stats.items()
+    }
     
     # Generate improvement suggestions specific to this exercise
     improvements = generate_exercise_improvement_suggestions(exercise_name, form_issues)
@@ -295,7 +354,7 @@ def generate_exercise_report(session, exercise_name):
             "trend": trend
         },
         "reps_breakdown": [{
-            "rep_number": i+1,
+            "rep_number": rep.get("exercise_rep", i+1),
             "score": rep.get("score", 0),
             "timestamp": rep.get("timestamp", ""),
             "feedback": rep.get("feedback_flags", []),
@@ -311,7 +370,7 @@ def generate_exercise_report(session, exercise_name):
 def get_top_issues(issues_dict, limit=3):
     """Extract the top N issues from a dictionary of issue counts"""
     return sorted(
-        [(k, v) for k, v in issues_dict.items() if k not in ["GOOD_FORM", "GOOD_CURL", "GOOD_DEPTH"]],
+        [(k, v) for k, v in issues_dict.items() if k not in POSITIVE_FLAGS],
         key=lambda x: x[1],
         reverse=True
     )[:limit]
@@ -331,14 +390,14 @@ def get_performance_rating(score):
     else:
         return "Poor"
 
-def is_improving(scores):
+def is_improving(rep_count, total_score, last_score):
     """Determine if scores show an improving trend"""
-    if len(scores) < 3:
+    if rep_count < 3:
         return True
     
     # Simple approach: is the last score better than the average of previous scores?
-    prev_avg = sum(scores[:-1]) / len(scores[:-1])
-    return scores[-1] > prev_avg
+    prev_avg = (total_score - last_score) / (rep_count - 1)
+    return last_score > prev_avg
 
 def generate_improvement_suggestions(issues):
     """Generate specific improvement suggestions based on common issues"""
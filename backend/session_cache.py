@@ -0,0 +1,72 @@
+"""
+Completed Session Cache
+-----------------------
+LRU cache of completed sessions parsed from their session_logs/{id}.json files.
+
+Entries are weighted by the size of their file and the least recently used ones
+are evicted once the total exceeds max_bytes. Each lookup stats the file and
+reparses it when its modification time or size changed, so a rewritten file is
+never served stale.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+class CompletedSessionCache:
+    """Size-bounded LRU cache of parsed session files with mtime invalidation"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, session)
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _store(self, path, mtime_ns, size, session):
+        old = self._entries.pop(path, None)
+        if old is not None:
+            self._total_bytes -= old[1]
+        if size > self._max_bytes:
+            return  # Too large to cache at all
+        self._entries[path] = (mtime_ns, size, session)
+        self._total_bytes += size
+        while self._total_bytes > self._max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+
+    def load(self, path):
+        """
+        Return the parsed session stored at path.
+        Raises OSError if the file doesn't exist and ValueError if it isn't valid JSON.
+        The returned dict is shared between callers and must not be modified.
+        """
+        path = str(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(path)
+                return entry[2]
+
+        # Parse outside the lock so a large file doesn't stall other lookups
+        with open(path, "r") as f:
+            session = json.load(f)
+
+        with self._lock:
+            self._store(path, stat.st_mtime_ns, stat.st_size, session)
+        return session
+
+    def put(self, path, session):
+        """Cache a session that was just written to path"""
+        path = str(path)
+        stat = os.stat(path)
+        with self._lock:
+            self._store(path, stat.st_mtime_ns, stat.st_size, session)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
@@ -3,6 +3,7 @@ Session State Management
 ----------------------
 Tracks exercise sessions, logs rep data, and computes aggregate scores.
 """
+import os
 import time
 import uuid
 import json
@@ -10,16 +11,55 @@ from datetime import datetime
 from pathlib import Path
 import threading
 from score_config import calculate_rep_score
+from rep_store import RepStore
+from session_cache import CompletedSessionCache
 
 # Global dictionary to store session data in memory
 active_sessions = {}
 
-# Thread lock to prevent race conditions when updating session data
-session_lock = threading.Lock()
+# Striped locks: each session maps to one of LOCK_STRIPES locks, so updates to
+# different sessions rarely contend. Adding or removing a session is a single
+# dict operation (atomic under the GIL) and needs no lock at all.
+LOCK_STRIPES = 64
+_session_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
 
-# Directory for storing session logs
-LOGS_DIR = Path("session_logs")
-LOGS_DIR.mkdir(exist_ok=True)
+# Directory for storing session logs, next to the backend code by default
+# (independent of the working directory)
+LOGS_DIR = Path(os.environ.get(
+    "REGENIX_SESSION_LOGS", Path(__file__).resolve().parent / "session_logs"
+))
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Per-rep data is appended to {session_id}.reps.ndjson instead of being kept in memory
+rep_store = RepStore(LOGS_DIR)
+
+# Completed sessions parsed from disk, so repeated report/summary requests don't re-read them
+completed_sessions = CompletedSessionCache(max_bytes=64 * 1024 * 1024)
+
+def _session_lock(session_id):
+    """Lock guarding updates to one session's data"""
+    return _session_locks[hash(session_id) % LOCK_STRIPES]
+
+def update_metric_stats(metric_stats, metrics):
+    """
+    Fold one rep's numeric metrics into running per-metric statistics.
+    
+    Keeps count, mean, min and max per metric, plus m2 (sum of squared
+    deviations, Welford's algorithm) for the variance.
+    """
+    for key, value in metrics.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        stats = metric_stats.get(key)
+        if stats is None:
+            metric_stats[key] = {"count": 1, "mean": value, "m2": 0.0, "min": value, "max": value}
+            continue
+        stats["count"] += 1
+        delta = value - stats["mean"]
+        stats["mean"] += delta / stats["count"]
+        stats["m2"] += delta * (value - stats["mean"])
+        stats["min"] = min(stats["min"], value)
+        stats["max"] = max(stats["max"], value)
 
 def generate_session_id():
     """Generate a unique session ID"""
@@ -43,7 +83,6 @@ def start_session(user_id=None, exercise_type=None):
         "user_id": user_id,
         "exercise_type": exercise_type,
         "start_time": datetime.now().isoformat(),
-        "rep_log": [],
         "completed": False,
         "metrics": {
             "total_reps": 0,
@@ -53,8 +92,7 @@ def start_session(user_id=None, exercise_type=None):
         }
     }
     
-    with session_lock:
-        active_sessions[session_id] = session_data
+    active_sessions[session_id] = session_data
     
     return session_id
 
@@ -89,9 +127,10 @@ def record_rep(session_id, exercise, feedback_flags, metrics=None):
     }
     
     # Update session data
-    with session_lock:
-        session = active_sessions[session_id]
-        session["rep_log"].append(rep_data)
+    with _session_lock(session_id):
+        session = active_sessions.get(session_id)
+        if session is None or session["completed"]:
+            return {"error": "Invalid session ID"}
         
         # Update aggregated metrics
         session["metrics"]["total_reps"] += 1
@@ -106,7 +145,9 @@ def record_rep(session_id, exercise, feedback_flags, metrics=None):
                 "reps": 0,
                 "total_score": 0,
                 "average_score": 0,
-                "feedback_counts": {}
+                "last_score": 0,
+                "feedback_counts": {},
+                "metric_stats": {}
             }
         
         exercise_metrics = session["metrics"]["exercises"][exercise]
@@ -115,6 +156,11 @@ def record_rep(session_id, exercise, feedback_flags, metrics=None):
         exercise_metrics["average_score"] = (
             exercise_metrics["total_score"] / exercise_metrics["reps"]
         )
+        exercise_metrics["last_score"] = score
+        rep_data["exercise_rep"] = exercise_metrics["reps"]
+        
+        # Running statistics per metric, so reports don't rescan the rep log
+        update_metric_stats(exercise_metrics["metric_stats"], rep_data["metrics"])
         
         # Count feedback occurrences
         for flag in feedback_flags:
@@ -122,11 +168,17 @@ def record_rep(session_id, exercise, feedback_flags, metrics=None):
                 exercise_metrics["feedback_counts"][flag] = 0
             exercise_metrics["feedback_counts"][flag] += 1
     
+    # Append the rep to the session's log file (outside the lock, so other sessions aren't blocked)
+    rep_store.append(session_id, rep_data)
+    
     return rep_data
 
 def end_session(session_id):
     """
-    End a session and save data to disk.
+    End a session and save its summary to disk.
+    
+    Reps are already on disk in the session's rep log, so only the (small)
+    session record is written and the session is removed from memory.
     
     Args:
         session_id: Session identifier
@@ -134,11 +186,10 @@ def end_session(session_id):
     Returns:
         session_summary: Dictionary with session summary data
     """
-    if session_id not in active_sessions:
-        return {"error": "Invalid session ID"}
-    
-    with session_lock:
-        session = active_sessions[session_id]
+    with _session_lock(session_id):
+        session = active_sessions.get(session_id)
+        if session is None or session["completed"]:
+            return {"error": "Invalid session ID"}
         session["end_time"] = datetime.now().isoformat()
         session["completed"] = True
         
@@ -173,25 +224,69 @@ def end_session(session_id):
                 )[:3]  # Top 3 issues
             }
         
-        # Save to file
-        filename = f"{LOGS_DIR}/{session_id}.json"
-        with open(filename, "w") as f:
-            json.dump(session, f, indent=2)
-            
-        # Optionally remove from memory to save RAM
-        # del active_sessions[session_id]
+        # The session record holds only metadata and aggregates, so this stays small
+        session_record = json.dumps(session)
+    
+    # Save to file outside the lock and only then drop the session from memory,
+    # so get_session always finds it in one of the two places
+    filename = f"{LOGS_DIR}/{session_id}.json"
+    with open(filename, "w") as f:
+        f.write(session_record)
+    completed_sessions.put(filename, session)
+    
+    active_sessions.pop(session_id, None)
         
     return summary
 
 def get_session(session_id):
-    """Retrieve session data"""
-    if session_id in active_sessions:
-        return active_sessions[session_id]
+    """Retrieve session data (completed sessions are shared cache entries; don't modify them)"""
+    session = active_sessions.get(session_id)
+    if session is not None:
+        return session
     
     # Try to load from disk if not in memory
     filename = f"{LOGS_DIR}/{session_id}.json"
     try:
-        with open(filename, "r") as f:
-            return json.load(f)
-    except:
+        return completed_sessions.load(filename)
+    except (OSError, ValueError):
         return {"error": "Session not found"}
+
+
+def iter_session_reps(session_id, exercise=None, cursor=0):
+    """
+    Iterate over the logged reps of a session, resuming from a cursor.
+    
+    Args:
+        session_id: Session identifier
+        exercise: Optional exercise name to filter by
+        cursor: 0 to start at the first rep, or a cursor yielded earlier
+        
+    Yields:
+        (next_cursor, rep) tuples; next_cursor resumes right after the rep.
+        Raises ValueError (before yielding anything) for an invalid cursor.
+    """
+    session = get_session(session_id)
+    
+    # Sessions saved before the rep log store kept their reps inline; their cursor is a list index
+    if "rep_log" in session:
+        reps = enumerate(session["rep_log"][cursor:], cursor + 1)
+    else:
+        reps = rep_store.iter_reps(session_id, cursor)
+    
+    return (
+        (next_cursor, rep) for next_cursor, rep in reps
+        if exercise is None or rep.get("exercise") == exercise
+    )
+
+def get_session_reps(session_id, exercise=None):
+    """
+    Retrieve the logged reps of a session.
+    
+    Args:
+        session_id: Session identifier
+        exercise: Optional exercise name to filter by
+        
+    Returns:
+        List of rep records in the order they were recorded
+    """
+    return [rep for _, rep in iter_session_reps(session_id, exercise)]
@@ -1,83 +1,54 @@
-import numpy as np
+import time
 from state import exercise_state
+from kinematics import frame_kinematics
+from visibility import not_visible_response, side_values, visible_sides
 from feedback_config import SITUP_CONFIG, FEEDBACK_TO_JOINTS, ADVANCED_FEEDBACK
 from score_config import calculate_rep_score
+from rep_counter import advance_rep_phase
 
-def calculate_angle(a, b, c):
-    a, b, c = np.array(a), np.array(b), np.array(c)
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0:
-         angle = 360 - angle
-    return angle
-
-def check_neck_strain(nose, neck, shoulder):
-    """
-    Check if there's excessive neck strain by measuring the angle between
-    nose, neck, and shoulders
-    """
-    if not nose or not neck or not shoulder:
-        return False
-        
-    neck_angle = calculate_angle(nose, neck, shoulder)
-    # If neck is too flexed (looking down too much), it might indicate strain
-    return neck_angle < 150
-
-def process_landmarks(landmarks, tolerance, session_id=None):
+def process_landmarks(landmarks, tolerance, session_id=None, client_id=None,
+                      timestamp=None, kinematics=None):
     """
     Process landmarks for situp form analysis with enhanced feedback
     """
-    hip_angles = []
-    neck_strain_detected = False
-    
-    # Extract left side landmarks for hip angle calculation
-    try:
-        left_shoulder = [landmarks[11]['x'], landmarks[11]['y']]
-        left_hip = [landmarks[23]['x'], landmarks[23]['y']]
-        left_knee = [landmarks[25]['x'], landmarks[25]['y']]
-        
-        left_hip_angle = calculate_angle(left_shoulder, left_hip, left_knee)
-        hip_angles.append(left_hip_angle)
-        
-        # Check for neck strain
-        nose = [landmarks[0]['x'], landmarks[0]['y']]
-        neck = [(landmarks[11]['x'] + landmarks[12]['x'])/2, 
-                (landmarks[11]['y'] + landmarks[12]['y'])/2 - 0.05]  # Estimate neck position
-        mid_shoulder = [(landmarks[11]['x'] + landmarks[12]['x'])/2,
-                       (landmarks[11]['y'] + landmarks[12]['y'])/2]
-        
-        if check_neck_strain(nose, neck, mid_shoulder):
-            neck_strain_detected = True
-    except Exception:
-        pass
+    # Joint metrics of the frame, each computed when first read (batches pass them precomputed)
+    if kinematics is not None:
+        kin = kinematics
+    else:
+        try:
+            kin = frame_kinematics(landmarks)
+        except ValueError:
+            return {"error": "Insufficient landmarks data."}
     
-    # Extract right side landmarks for hip angle calculation
-    try:
-        right_shoulder = [landmarks[12]['x'], landmarks[12]['y']]
-        right_hip = [landmarks[24]['x'], landmarks[24]['y']]
-        right_knee = [landmarks[26]['x'], landmarks[26]['y']]
-        
-        right_hip_angle = calculate_angle(right_shoulder, right_hip, right_knee)
-        hip_angles.append(right_hip_angle)
-    except Exception:
-        pass
+    # State is kept per client; fall back to the session when no client id is given
+    client_key = client_id or session_id
+
+    # Retrieve current state for sit-ups
+    state = exercise_state.get("situps", {"counter": 0, "stage": "up", "feedback": "N/A"}, client_key)
 
-    if not hip_angles:
-        return {"error": "Insufficient landmarks data."}
+    # Skip frames whose key joints are occluded; analyze only the better-visible side
+    sides = visible_sides(kin, "situps")
+    if not sides:
+        return not_visible_response(state)
+    
+    # Hip angles (shoulder-hip-knee) on both sides
+    hip_angles = side_values(kin, "hip_angle", sides)
+    
+    # Neck strain: angle between nose, estimated neck and the analyzed side's shoulder.
+    # If the neck is too flexed (looking down too much), it might indicate strain
+    neck_strain_detected = kin[f"{sides[0]}_neck_angle"] < 150
 
     # Average the hip angles
     avg_hip_angle = sum(hip_angles) / len(hip_angles)
     
-    # Retrieve current state for sit-ups
-    state = exercise_state.get("situps", {"counter": 0, "stage": "up", "feedback": "N/A"})
     stage = state.get("stage", "up")
     counter = state.get("counter", 0)
 
-    # Sit-up detection logic
-    if avg_hip_angle > 160:  # Lying flat
-        stage = "down"
-    elif avg_hip_angle < 120 and stage == "down":  # Sitting up
-        stage = "up"
+    # Sit-up detection logic: lying flat (down) <-> sitting up (up) on the hip angle
+    current_time = timestamp if timestamp is not None else time.time()
+    transition = advance_rep_phase("situps", avg_hip_angle, stage, state.get("rep_phase"), current_time)
+    stage = transition["stage"]
+    if transition["rep_completed"]:
         counter += 1
 
     # Generate detailed feedback
@@ -178,6 +149,7 @@ def process_landmarks(landmarks, tolerance, session_id=None):
     new_state = {
         "counter": counter,
         "stage": stage,
+        "rep_phase": transition["phase"],
         "hipAngle": avg_hip_angle,
         "neckStrain": neck_strain_detected,
         "feedback": feedback_message,
@@ -190,5 +162,5 @@ def process_landmarks(landmarks, tolerance, session_id=None):
         "advanced_metrics": advanced_metrics
     }
     
-    exercise_state["situps"] = new_state
+    exercise_state.set("situps", new_state, client_key)
     return new_state
@@ -0,0 +1,147 @@
+"""
+Landmark Smoothing
+------------------
+One-Euro filter applied to incoming landmark frames before they reach the
+exercise analyzers.
+
+MediaPipe landmarks jitter by a few pixels from frame to frame, which makes
+the analyzers' stage thresholds (e.g. knee angle > 160) flap and double count
+reps. The One-Euro filter is a low-pass filter whose cutoff rises with the
+movement speed: slow or still landmarks are smoothed heavily, fast movements
+pass with little lag. All 33 landmarks are filtered in one vectorized step and
+each client keeps O(1) state (the previous frame, its velocity and timestamp),
+stored next to the client's exercise state. Requests without a client or session
+id have no state of their own: a single frame passes through unfiltered and a
+batch is smoothed with a filter that is discarded afterwards, so anonymous
+clients never blend into each other's landmarks.
+
+Tuning (SMOOTHING_CONFIG):
+    MIN_CUTOFF  - cutoff (Hz) for still landmarks; lower = smoother, more lag
+    BETA        - how fast the cutoff rises with speed; higher = less lag on fast moves
+    D_CUTOFF    - cutoff (Hz) used to smooth the velocity estimate
+"""
+import threading
+import time
+
+import numpy as np
+
+from kinematics import as_frame, stack_frames
+from state import exercise_state
+
+SMOOTHING_CONFIG = {
+    "MIN_CUTOFF": 1.0,
+    "BETA": 10.0,      # Landmarks are normalized (0-1), so speeds are small numbers
+    "D_CUTOFF": 1.0,
+    "DEFAULT_DT": 1 / 30,  # Used when timestamps repeat or go backwards
+}
+
+# Key of the filter state in the per-client exercise state store
+FILTER_STATE_KEY = "landmark_filter"
+
+def _alpha(dt, cutoff):
+    """Smoothing factor of an exponential filter with the given cutoff frequency"""
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    """Vectorized One-Euro filter over the x, y, z columns of a (33, 4) frame"""
+
+    def __init__(self, min_cutoff=None, beta=None, d_cutoff=None):
+        self.min_cutoff = SMOOTHING_CONFIG["MIN_CUTOFF"] if min_cutoff is None else min_cutoff
+        self.beta = SMOOTHING_CONFIG["BETA"] if beta is None else beta
+        self.d_cutoff = SMOOTHING_CONFIG["D_CUTOFF"] if d_cutoff is None else d_cutoff
+        # Serializes concurrent requests of the same client (e.g. overlapping POSTs)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    def __call__(self, frame, timestamp):
+        """Filter one frame (see filter); safe to call from concurrent requests"""
+        with self.lock:
+            return self.filter(frame, timestamp)
+
+    def filter(self, frame, timestamp):
+        """
+        Filter one frame. Callers sharing the filter must hold self.lock.
+
+        Args:
+            frame: (33, 4) float array (visibility is passed through unfiltered)
+            timestamp: Frame time in seconds
+
+        Returns:
+            New (33, 4) float64 array with smoothed coordinates
+        """
+        frame = np.array(frame, dtype=np.float64)
+        x = frame[:, :3]
+        if self.x_prev is None:
+            self.x_prev, self.dx_prev, self.t_prev = x.copy(), np.zeros_like(x), timestamp
+            return frame
+
+        dt = timestamp - self.t_prev
+        if dt <= 0:
+            dt = SMOOTHING_CONFIG["DEFAULT_DT"]
+
+        # Smoothed velocity drives the per-coordinate cutoff
+        dx = (x - self.x_prev) / dt
+        dx_hat = self.dx_prev + _alpha(dt, self.d_cutoff) * (dx - self.dx_prev)
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        x_hat = self.x_prev + _alpha(dt, cutoff) * (x - self.x_prev)
+
+        self.x_prev, self.dx_prev, self.t_prev = x_hat, dx_hat, timestamp
+        frame[:, :3] = x_hat
+        return frame
+
+_filter_lock = threading.Lock()
+
+def _client_filter(client_key):
+    with _filter_lock:
+        landmark_filter = exercise_state.get(FILTER_STATE_KEY, None, client_key)
+        if not isinstance(landmark_filter, OneEuroFilter):
+            landmark_filter = OneEuroFilter()
+            exercise_state.set(FILTER_STATE_KEY, landmark_filter, client_key)
+        return landmark_filter
+
+def smooth_landmarks(landmarks, client_key=None, timestamp=None):
+    """
+    Smooth one frame with the client's filter.
+
+    Malformed landmarks, and frames without a client key (no filter state to
+    continue from), are returned unchanged.
+    """
+    if client_key is None:
+        return landmarks
+    try:
+        frame = as_frame(landmarks)
+    except ValueError:
+        return landmarks
+    if frame.ndim != 2:
+        return landmarks
+    return _client_filter(client_key)(frame, timestamp if timestamp is not None else time.time())
+
+def smooth_frames(frames, client_key=None, timestamps=None):
+    """
+    Smooth a (N, 33, 4) stack of consecutive frames with the client's filter.
+
+    Args:
+        frames: Frame stack or list of frames (raises ValueError if malformed, like as_frame)
+        client_key: Client whose filter state is used and updated (None smooths
+            the batch with a fresh filter that is not kept)
+        timestamps: Per-frame times in seconds (None entries use the current time)
+
+    Returns:
+        Smoothed (N, 33, 4) float64 array
+    """
+    frames = stack_frames(frames)
+    landmark_filter = _client_filter(client_key) if client_key is not None else OneEuroFilter()
+    now = time.time()
+    smoothed = np.empty_like(frames)
+    # Hold the filter for the whole batch so another request can't interleave frames
+    with landmark_filter.lock:
+        for i, frame in enumerate(frames):
+            timestamp = timestamps[i] if timestamps is not None and timestamps[i] is not None else now
+            smoothed[i] = landmark_filter.filter(frame, timestamp)
+    return smoothed
@@ -1,45 +1,89 @@
 # state.py
+import copy
+import threading
 import time
+from collections import OrderedDict
+
+# Key used for callers that don't identify themselves (legacy single-client behaviour)
+ANONYMOUS_CLIENT = None
 
 class ExerciseStateWrapper:
     """
-    Wrapper for the exercise state dictionary.
-    If an exercise hasn’t been updated for more than reset_timeout seconds,
-    its state is reinitialized on next access.
+    Session-keyed store for per-client exercise state.
+
+    Entries are keyed by (client_id, exercise) so concurrent clients never share
+    a counter or stage. Lookups are O(1); entries that have not been touched for
+    more than ttl seconds are evicted, and at most max_entries are kept (least
+    recently used entries are dropped first).
     """
-    def __init__(self, reset_timeout=10):
-        self._state = {}        # Internal state storage.
-        self._last_reset = {}   # Timestamps for last reset per exercise.
-        self._reset_timeout = reset_timeout
+    def __init__(self, ttl=300, max_entries=10000):
+        self._state = OrderedDict()  # (client_id, exercise) -> [state, last_access]
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        # Entries are kept in access order, so expired ones are always at the front
+        while self._state:
+            key, (_, last_access) = next(iter(self._state.items()))
+            if now - last_access <= self._ttl and len(self._state) <= self._max_entries:
+                break
+            self._state.popitem(last=False)
 
-    def get(self, key, default=None):
+    def get(self, key, default=None, client_id=ANONYMOUS_CLIENT):
+        """
+        Return the state for an exercise of a given client.
+        If the entry is missing or has expired, a copy of default is stored and returned.
+        """
         now = time.time()
-        # If this exercise has never been seen or it was last reset too long ago,
-        # reinitialize its state.
-        if key not in self._state or (now - self._last_reset.get(key, 0)) > self._reset_timeout:
-            self._state[key] = {"repCount": 0, "stage": "down", "feedback": "N/A"}
-            self._last_reset[key] = now
-        return self._state.get(key, default)
+        store_key = (client_id, key)
+        with self._lock:
+            entry = self._state.get(store_key)
+            if entry is None or now - entry[1] > self._ttl:
+                value = copy.deepcopy(default) if default is not None else {}
+                entry = [value, now]
+                self._state[store_key] = entry
+            else:
+                entry[1] = now
+            self._state.move_to_end(store_key)
+            self._evict(now)
+            return entry[0]
+
+    def set(self, key, value, client_id=ANONYMOUS_CLIENT):
+        """Store the state for an exercise of a given client."""
+        now = time.time()
+        store_key = (client_id, key)
+        with self._lock:
+            self._state[store_key] = [value, now]
+            self._state.move_to_end(store_key)
+            self._evict(now)
 
     def __getitem__(self, key):
         return self.get(key)
 
     def __setitem__(self, key, value):
-        self._state[key] = value
-        self._last_reset[key] = time.time()
+        self.set(key, value)
 
-    def reset_exercise(self, key):
+    def __len__(self):
+        return len(self._state)
+
+    def reset_exercise(self, key, initial_state=None, client_id=ANONYMOUS_CLIENT):
         """
         Force a reset of the state for a given exercise.
         This can be called when a page loads.
         """
-        self._state[key] = {"repCount": 0, "stage": "down", "feedback": "N/A"}
-        self._last_reset[key] = time.time()
+        self.set(key, copy.deepcopy(initial_state) if initial_state else {}, client_id)
+
+    def discard_client(self, client_id):
+        """Drop every exercise state held for a client (e.g. when a session ends)."""
+        with self._lock:
+            for store_key in [k for k in self._state if k[0] == client_id]:
+                del self._state[store_key]
 
     def clear(self):
-        self._state.clear()
-        self._last_reset.clear()
+        with self._lock:
+            self._state.clear()
 
-# Global dictionary to hold real-time exercise state.
-# Using our wrapper, which behaves like a normal dict for existing code.
+# Global store holding real-time exercise state for every connected client.
+# Idle clients are evicted after 5 minutes; at most 10k (client, exercise) entries are kept.
 exercise_state = ExerciseStateWrapper()
@@ -0,0 +1,67 @@
+# test_analyzers.py
+import pytest
+
+from analyzers import ANALYZERS, ModuleAnalyzer, available_exercises, get_analyzer, register_analyzer
+from state import exercise_state
+
+CLIENT = "test-analyzers"
+
+@pytest.fixture(autouse=True)
+def clean_client():
+    exercise_state.discard_client(CLIENT)
+    yield
+    exercise_state.discard_client(CLIENT)
+
+class EchoAnalyzer:
+    """A plugin analyzer that counts the frames it is given"""
+
+    name = "test_echo"
+    initial_state = {"counter": 0, "stage": "idle"}
+
+    def process(self, landmarks, tolerance, session_id=None, client_id=None, timestamp=None, kinematics=None):
+        state = exercise_state.get(self.name, dict(self.initial_state), client_id or session_id)
+        state["counter"] += 1
+        return {"counter": state["counter"], "stage": "moving", "feedback": f"{len(landmarks)} landmarks"}
+
+    def reset(self, session_id=None, client_id=None):
+        exercise_state.reset_exercise(self.name, dict(self.initial_state), client_id or session_id)
+
+def test_built_in_exercises_are_registered():
+    assert available_exercises() == ("bicep_curls", "deadlifts", "lunges", "pushups", "situps", "squats")
+    assert get_analyzer("jumping_jacks") is None
+
+def test_module_analyzer_imports_on_first_use():
+    analyzer = ModuleAnalyzer("squats", "squats", {"counter": 0})
+    assert not analyzer.loaded
+    result = analyzer.process([], 10, client_id=CLIENT)
+    assert analyzer.loaded
+    assert result == {"error": "Insufficient landmarks data."}
+
+def test_reset_restores_a_copy_of_the_initial_state():
+    analyzer = get_analyzer("squats")
+    analyzer.reset(client_id=CLIENT)
+    state = exercise_state.get("squats", None, CLIENT)
+    assert state == analyzer.initial_state and state is not analyzer.initial_state
+    state["counter"] = 5
+    analyzer.reset(client_id=CLIENT)
+    assert exercise_state.get("squats", None, CLIENT)["counter"] == 0
+    assert analyzer.initial_state["counter"] == 0
+
+def test_registered_plugin_is_served_by_the_api(monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setitem(ANALYZERS, EchoAnalyzer.name, EchoAnalyzer())
+    client = TestClient(main.app)
+    url = f"/landmarks/test_echo?client_id={CLIENT}&smoothing=false"
+    landmarks = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0}] * 33
+    assert client.post(url, json={"landmarks": landmarks}).json()["counter"] == 1
+    assert client.post(url, json={"landmarks": landmarks}).json()["counter"] == 2
+    client.post(f"/reset/test_echo?client_id={CLIENT}")
+    body = client.post(url, json={"landmarks": landmarks}).json()
+    assert body["counter"] == 1 and body["feedback"] == "33 landmarks"
+
+def test_register_analyzer_replaces_by_name(monkeypatch):
+    monkeypatch.setitem(ANALYZERS, "squats", ANALYZERS["squats"])
+    replacement = register_analyzer(ModuleAnalyzer("squats", "squats", {"counter": 0}))
+    assert get_analyzer("squats") is replacement
@@ -0,0 +1,28 @@
+# test_batch_video_analysis.py
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("cv2")
+
+import batch_video_analysis
+import session_state
+
+class NoPose:
+    """Stands in for the worker's MediaPipe model: never detects a pose"""
+
+    def reset(self):
+        pass
+
+    def process(self, rgb):
+        return SimpleNamespace(pose_landmarks=None)
+
+def test_failed_video_still_ends_its_session(monkeypatch):
+    monkeypatch.setattr(batch_video_analysis, "_worker_pose", NoPose())
+    sessions = set(session_state.active_sessions)
+    with pytest.raises(IOError):
+        batch_video_analysis._analyze_in_worker("missing.mp4", "squats", 10, 1, "test-batch")
+    assert set(session_state.active_sessions) == sessions
+    logs = [path for path in session_state.LOGS_DIR.glob("*.json")
+            if session_state.get_session(path.stem).get("user_id") == "test-batch"]
+    assert len(logs) == 1
@@ -0,0 +1,65 @@
+# test_build_reference_curves.py
+import numpy as np
+import pytest
+
+from build_reference_curves import CURVE_CONFIG, segment_reps, time_normalize, write_curves
+from reference_poses import (
+    REFERENCE_ANGLES, REFERENCE_CURVES, calculate_reference_angles, interpolate_angle,
+    load_reference_curves, measured_angle, reference_angle_spread,
+)
+
+FPS = 30
+
+def rep_signal(reps, top=170.0, bottom=80.0, rest_frames=20, rep_frames=40):
+    """Driving angle of a set: rest at the top, then reps x (down and up again, rest)"""
+    down_up = (top + bottom) / 2 + (top - bottom) / 2 * np.cos(np.linspace(0, 2 * np.pi, rep_frames))
+    values = np.concatenate([np.full(rest_frames, top)] + [np.r_[down_up, np.full(rest_frames, top)]] * reps)
+    return np.arange(len(values)) / FPS, values
+
+def test_reps_run_from_the_top_to_the_deepest_point():
+    timestamps, driver = rep_signal(reps=3)
+    reps = segment_reps(timestamps, driver)
+    assert len(reps) == 3
+    # The start is the last frame near the top, within TOP_TOLERANCE of the range
+    tolerance = CURVE_CONFIG["TOP_TOLERANCE"] * (170.0 - 80.0)
+    for start, end in reps:
+        assert driver[start] >= 170.0 - tolerance
+        assert driver[start + 1] < driver[start]
+        assert driver[end] == pytest.approx(80.0, abs=1.0)
+
+def test_small_movements_are_not_reps():
+    timestamps, driver = rep_signal(reps=3, top=170.0, bottom=155.0)
+    assert segment_reps(timestamps, driver) == []
+
+def test_time_normalize_resamples_by_time():
+    timestamps = np.array([0.0, 0.1, 0.2, 0.6, 1.0])
+    values = timestamps * 100.0
+    assert time_normalize(timestamps, values, 0, 4, 5) == pytest.approx([0.0, 25.0, 50.0, 75.0, 100.0])
+    assert time_normalize(timestamps, values, 1, 3, 3) == pytest.approx([10.0, 35.0, 60.0])
+
+def test_written_curves_are_memory_mapped(tmp_path):
+    table = np.stack([np.linspace(170, 90, 8), np.full(8, 4.0)]).astype(np.float32)
+    write_curves({"squats": {"curves": table[None], "joints": ["knee"], "reps": 3, "videos": ["a.mp4"]}},
+                 steps=8, output_dir=tmp_path)
+    curves = load_reference_curves(tmp_path)
+    knee = curves["squats"]["knee"]
+    assert isinstance(knee, np.memmap)
+    assert not knee.flags.writeable
+    assert measured_angle(knee, 0.0) == pytest.approx(170.0)
+    assert measured_angle(knee, np.array([0.5, 1.0])) == pytest.approx([130.0, 90.0])
+
+def test_missing_curves_load_as_empty(tmp_path):
+    assert load_reference_curves(tmp_path) == {}
+
+def test_measured_joints_follow_the_bundled_curves():
+    if "squats" not in REFERENCE_CURVES:
+        pytest.skip("reference curves not built")
+    knee = REFERENCE_CURVES["squats"]["knee"]
+    progress = np.linspace(0.0, 1.0, knee.shape[1])
+    assert calculate_reference_angles("squats", progress)["knee"] == pytest.approx(knee[0])
+    assert reference_angle_spread("squats", progress)["knee"] == pytest.approx(np.sqrt(knee[1]))
+    # Joints without a measured curve keep the eased start/end angles
+    assert "back" not in REFERENCE_CURVES["squats"]
+    start, end, mid_ratio = REFERENCE_ANGLES["squats"]["back"]
+    assert calculate_reference_angles("squats", progress)["back"] == pytest.approx(
+        interpolate_angle(start, end, progress, mid_ratio))
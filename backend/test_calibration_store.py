@@ -0,0 +1,61 @@
+# test_calibration_store.py
+import sqlite3
+
+import pytest
+
+import calibration_store
+from calibration_store import CalibrationStore
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "calibrations.db"
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(calibration_store.time, "time", lambda: clock["now"])
+    return clock
+
+def test_put_and_get(db_path):
+    store = CalibrationStore(db_path)
+    calibration_id = store.put({"scaling_factor": 0.5})
+    assert store.get(calibration_id) == {"scaling_factor": 0.5}
+    assert store.get("unknown") is None
+    store.close()
+
+def test_calibrations_survive_restarts(db_path):
+    store = CalibrationStore(db_path)
+    calibration_id = store.put({"scaling_factor": 0.5})
+    store.close()
+    reopened = CalibrationStore(db_path)
+    assert reopened.get(calibration_id) == {"scaling_factor": 0.5}
+    reopened.close()
+
+def test_memory_cache_is_bounded(db_path):
+    store = CalibrationStore(db_path, max_entries=2)
+    ids = [store.put({"n": n}) for n in range(5)]
+    assert len(store) == 2
+    # Evicted entries are still read back from the database
+    assert store.get(ids[0]) == {"n": 0}
+    assert len(store) == 2
+    store.close()
+
+def test_calibrations_expire(db_path, clock):
+    store = CalibrationStore(db_path, ttl=60)
+    calibration_id = store.put({"n": 0})
+    clock["now"] += 30
+    assert store.get(calibration_id) == {"n": 0}
+    clock["now"] += 31
+    assert store.get(calibration_id) is None
+    store.close()
+
+def test_expired_rows_are_purged_on_write(db_path, clock):
+    store = CalibrationStore(db_path, ttl=60)
+    store.put({"n": 0})
+    clock["now"] += 61
+    store.put({"n": 1})
+    store.close()
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("SELECT COUNT(*) FROM calibrations").fetchone()[0] == 1
+        indexes = [row[1] for row in db.execute("PRAGMA index_list(calibrations)")]
+    assert "calibrations_created" in indexes
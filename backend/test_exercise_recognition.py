@@ -0,0 +1,78 @@
+# test_exercise_recognition.py
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from exercise_recognition import ExerciseRecognizer, SequenceBuffer
+from state import exercise_state
+
+CLIENT = "test-recognition"
+
+class WindowModel:
+    """Stands in for the Keras model: scores each window by the value of its newest frame"""
+
+    def __init__(self):
+        self.windows = []
+
+    def predict(self, windows, verbose=0):
+        self.windows.extend(windows)
+        newest = windows[:, -1, 0]
+        return np.stack([newest, 1 - newest, np.zeros_like(newest)], axis=1)
+
+@pytest.fixture
+def recognizer():
+    exercise_state.discard_client(CLIENT)
+    recognizer = ExerciseRecognizer(labels=("curl", "press", "squat"), stride=15)
+    recognizer.model = WindowModel()
+    recognizer._attempted = True
+    yield recognizer
+    exercise_state.discard_client(CLIENT)
+
+def frames(values):
+    return np.repeat(np.asarray(values, dtype=np.float64)[:, None, None], 33, axis=1).repeat(4, axis=2)
+
+def observe(recognizer, batch, client_key):
+    return asyncio.run(recognizer.observe(batch, client_key))
+
+def test_ring_buffer_keeps_newest_frames_in_order():
+    buffer = SequenceBuffer(window=4)
+    for value in range(6):
+        buffer.push(np.full((33, 4), value))
+    assert buffer.full
+    assert buffer.ordered()[:, 0].tolist() == [2, 3, 4, 5]
+
+def test_window_is_classified_every_stride(recognizer):
+    result = observe(recognizer, frames([0.0] * 29), CLIENT)
+    assert result == {"frames_seen": 29, "detection": None}
+    result = observe(recognizer, frames([0.0] * 14 + [1.0]), CLIENT)
+    # The first window (frames 0-29) was due at frame 30
+    assert len(recognizer.model.windows) == 1
+    assert result["frames_seen"] == 44
+    result = observe(recognizer, frames([1.0]), CLIENT)
+    assert len(recognizer.model.windows) == 2
+    assert result["detection"]["label"] == "curl"
+    assert result["detection"]["exercise"] == "bicep_curls"
+
+def test_anonymous_requests_do_not_share_a_window(recognizer):
+    stored = len(exercise_state)
+    assert observe(recognizer, frames([1.0] * 20), None) == {"frames_seen": 20, "detection": None}
+    # Another anonymous caller starts from an empty window
+    result = observe(recognizer, frames([0.0] * 30), None)
+    assert result["frames_seen"] == 30
+    assert result["detection"]["label"] == "press"
+    assert len(exercise_state) == stored
+
+def test_concurrent_first_requests_share_one_buffer(recognizer):
+    buffers = []
+    barrier = threading.Barrier(8)
+    def first_request():
+        barrier.wait()
+        buffers.append(recognizer.client_buffer(CLIENT))
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(buffer is buffers[0] for buffer in buffers)
@@ -0,0 +1,103 @@
+# test_form_classifier.py
+import asyncio
+import pickle
+import warnings
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pd = pytest.importorskip("pandas")
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from form_classifier import FormClassifier
+from landmarks import landmarks as LANDMARK_COLUMNS
+
+def frames(count, seed=0):
+    return np.random.default_rng(seed).random((count, 33, 4))
+
+def save_model(path, feature_names=LANDMARK_COLUMNS):
+    """A pipeline like deadlift.pkl: fitted on a DataFrame of landmark columns"""
+    stack = frames(40)
+    labels = np.where(stack[:, 0, 0] > 0.5, "up", "down")
+    model = make_pipeline(StandardScaler(), RandomForestClassifier(n_estimators=5, random_state=0))
+    model.fit(pd.DataFrame(stack.reshape(40, -1), columns=feature_names), labels)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return model
+
+def test_frames_are_classified_in_one_call(tmp_path):
+    model = save_model(tmp_path / "model.pkl")
+    classifier = FormClassifier("deadlifts", tmp_path / "model.pkl")
+    stack = frames(6, seed=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # No "X does not have valid feature names"
+        results = classifier.classify(stack)
+    expected = model.predict(pd.DataFrame(stack.reshape(6, -1), columns=LANDMARK_COLUMNS))
+    assert [result["class"] for result in results] == expected.tolist()
+    assert all(0.5 <= result["confidence"] <= 1.0 for result in results)
+    assert classifier.classify(stack[0]) == results[:1]
+    # The loaded model keeps the feature names it was fitted with
+    assert list(classifier.model.feature_names_in_) == LANDMARK_COLUMNS
+
+def test_model_with_other_columns_is_unavailable(tmp_path):
+    save_model(tmp_path / "model.pkl", feature_names=LANDMARK_COLUMNS[::-1])
+    classifier = FormClassifier("deadlifts", tmp_path / "model.pkl")
+    assert not classifier.available
+    assert "feature columns" in classifier.load_error
+    assert classifier.classify(frames(2)) is None
+
+def test_missing_model_is_unavailable(tmp_path):
+    classifier = FormClassifier("deadlifts", tmp_path / "missing.pkl")
+    assert classifier.classify(frames(2)) is None
+    assert classifier.load_error.startswith("FileNotFoundError")
+
+def test_concurrent_frames_share_a_batch(tmp_path):
+    save_model(tmp_path / "model.pkl")
+    classifier = FormClassifier("deadlifts", tmp_path / "model.pkl")
+    calls = []
+    classify = classifier.classify
+    classifier.classify = lambda stack: calls.append(len(stack)) or classify(stack)
+    stack = frames(4, seed=2)
+
+    async def run():
+        return await asyncio.gather(*(classifier.classify_async(frame) for frame in stack))
+
+    assert asyncio.run(run()) == classify(stack)
+    assert calls == [4]
+
+def on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def test_batch_endpoint_classifies_off_the_event_loop(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import form_classifier
+    import main
+    from state import exercise_state
+
+    save_model(tmp_path / "model.pkl")
+    classifier = FormClassifier("deadlifts", tmp_path / "model.pkl")
+    calls = []
+    classify = classifier.classify
+    classifier.classify = lambda stack: calls.append(on_event_loop()) or classify(stack)
+    monkeypatch.setitem(form_classifier.CLASSIFIERS, "deadlifts", classifier)
+
+    stack = frames(3, seed=3)
+    stack[:, :, 3] = 1.0
+    body = {"frames": [
+        {"landmarks": [{"x": x, "y": y, "z": z, "visibility": v} for x, y, z, v in frame.tolist()],
+         "timestamp": 1000 + 33 * i}
+        for i, frame in enumerate(stack)
+    ]}
+    response = TestClient(main.app).post("/landmarks/deadlifts/batch?client_id=test-classifier", json=body)
+    exercise_state.discard_client("test-classifier")
+    assert response.status_code == 200
+    classes = [entry["classification"]["class"] for entry in response.json()["results"]]
+    assert classes == [result["class"] for result in classify(stack)]
+    assert calls == [False]
@@ -0,0 +1,132 @@
+# test_kinematics.py
+import numpy as np
+import pytest
+
+from kinematics import (
+    LEFT_ANKLE, LEFT_ELBOW, LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER, LEFT_WRIST,
+    RIGHT_ANKLE, RIGHT_ELBOW, RIGHT_HIP, RIGHT_KNEE, RIGHT_SHOULDER, RIGHT_WRIST,
+    NOSE, as_frame, batch_kinematics, compute_kinematics, frame_kinematics,
+)
+
+# Scalar helpers as the exercise modules computed them before kinematics.py
+def calculate_angle(a, b, c):
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+    if angle > 180.0:
+        angle = 360 - angle
+    return angle
+
+def calculate_torso_angle(shoulder, hip):
+    vertical_vector = np.array([0, -1])
+    torso_vector = np.array([shoulder[0] - hip[0], shoulder[1] - hip[1]])
+    torso_length = np.linalg.norm(torso_vector)
+    if torso_length == 0:
+        return 0
+    torso_vector = torso_vector / torso_length
+    return np.arccos(np.clip(np.dot(vertical_vector, torso_vector), -1.0, 1.0)) * 180.0 / np.pi
+
+def calculate_knee_projection(knee, ankle):
+    ankle_knee_vector = np.array(knee) - np.array(ankle)
+    ankle_knee_length = np.linalg.norm(ankle_knee_vector)
+    if ankle_knee_length == 0:
+        return 0
+    return ankle_knee_vector[0] / ankle_knee_length
+
+def calculate_bar_path_deviation(hip, ankle):
+    height = abs(hip[1] - ankle[1])
+    if height == 0:
+        return 0
+    return abs(hip[0] - ankle[0]) / height
+
+def random_frames(count, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = rng.random((count, 33, 4))
+    # A few exact degenerate cases: coincident joints and straight limbs
+    frames[0, LEFT_KNEE, :2] = frames[0, LEFT_HIP, :2]
+    frames[1, LEFT_SHOULDER, :2] = frames[1, LEFT_HIP, :2]
+    frames[2, LEFT_ANKLE, :2] = frames[2, LEFT_KNEE, :2]
+    frames[3, RIGHT_ELBOW, :2] = (frames[3, RIGHT_SHOULDER, :2] + frames[3, RIGHT_WRIST, :2]) / 2
+    return frames
+
+def point(frame, index):
+    return frame[index, :2].tolist()
+
+def mid(frame, a, b):
+    return ((frame[a, :2] + frame[b, :2]) / 2).tolist()
+
+def old_metrics(frame):
+    """The metrics of one frame from the scalar helpers"""
+    mid_hip = mid(frame, LEFT_HIP, RIGHT_HIP)
+    mid_knee = mid(frame, LEFT_KNEE, RIGHT_KNEE)
+    mid_ankle = mid(frame, LEFT_ANKLE, RIGHT_ANKLE)
+    mid_shoulder = mid(frame, LEFT_SHOULDER, RIGHT_SHOULDER)
+    metrics = {
+        "back_angle": calculate_angle(point(frame, NOSE), mid_hip, mid_knee),
+        "mid_hip_angle": calculate_angle(mid_shoulder, mid_hip, mid_knee),
+        "bar_path_deviation": calculate_bar_path_deviation(mid_hip, mid_ankle),
+    }
+    sides = {
+        "left": (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+        "right": (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+    }
+    for side, (shoulder, elbow, wrist, hip, knee, ankle) in sides.items():
+        s, e, w, h, k, a = (point(frame, i) for i in (shoulder, elbow, wrist, hip, knee, ankle))
+        metrics[f"{side}_knee_angle"] = calculate_angle(h, k, a)
+        metrics[f"{side}_elbow_angle"] = calculate_angle(s, e, w)
+        metrics[f"{side}_hip_angle"] = calculate_angle(s, h, k)
+        metrics[f"{side}_back_angle"] = calculate_angle(point(frame, NOSE), h, k)
+        metrics[f"{side}_torso_angle"] = calculate_torso_angle(s, h)
+        metrics[f"{side}_knee_projection"] = calculate_knee_projection(k, a)
+        metrics[f"{side}_bar_path_deviation"] = calculate_bar_path_deviation(h, a)
+    return metrics
+
+def to_landmarks(frame):
+    return [{"x": x, "y": y, "z": z, "visibility": v} for x, y, z, v in frame.tolist()]
+
+def test_batch_matches_scalar_helpers():
+    frames = random_frames(200)
+    kin = compute_kinematics(frames)
+    for i, frame in enumerate(frames):
+        for name, expected in old_metrics(frame).items():
+            assert kin[name][i] == pytest.approx(expected, abs=1e-9), (i, name)
+
+def test_frame_kinematics_matches_scalar_helpers():
+    for frame in random_frames(20, seed=1):
+        kin = frame_kinematics(to_landmarks(frame))
+        for name, expected in old_metrics(frame).items():
+            assert kin[name] == pytest.approx(expected, abs=1e-9), name
+        assert kin["left_knee_visibility"] == frame[LEFT_KNEE, 3]
+
+def test_single_frame_path_matches_vectorized_path():
+    frames = random_frames(50, seed=2)
+    batch = batch_kinematics(frames)
+    assert len(batch) == len(frames)
+    for row, frame in zip(batch, frames):
+        for kin in (frame_kinematics(frame), frame_kinematics(to_landmarks(frame))):
+            for name, expected in row.items():
+                assert kin[name] == pytest.approx(expected, abs=1e-9), name
+
+def test_frame_kinematics_computes_metrics_on_first_read():
+    kin = frame_kinematics(random_frames(5)[4])
+    assert "left_knee_angle" not in kin
+    computed = len(kin)
+    kin["left_knee_angle"]
+    assert "left_knee_angle" in kin and len(kin) == computed + 1
+    with pytest.raises(KeyError):
+        kin["unknown_metric"]
+
+@pytest.mark.parametrize("convert", [as_frame, frame_kinematics])
+def test_malformed_landmarks_are_rejected(convert):
+    with pytest.raises(ValueError):
+        convert([{"x": 0.5, "y": 0.5}] * 10)
+    with pytest.raises(ValueError):
+        convert([None] * 33)
+    with pytest.raises(ValueError):
+        convert([{"x": "left", "y": 0.5}] * 33)
+
+def test_frame_kinematics_rejects_frame_stacks():
+    with pytest.raises(ValueError):
+        frame_kinematics(np.zeros((2, 33, 4)))
@@ -0,0 +1,40 @@
+# test_landmark_format.py
+import numpy as np
+import pytest
+
+from landmark_format import (
+    FRAME_BYTES, array_to_landmarks, decode_binary_frame, encode_binary_frame,
+    is_binary_request, landmarks_to_array,
+)
+
+def test_binary_frame_round_trip():
+    frame = np.random.default_rng(0).random((33, 4)).astype(np.float32)
+    payload = encode_binary_frame(array_to_landmarks(frame))
+    assert len(payload) == FRAME_BYTES == 528
+    decoded = decode_binary_frame(payload)
+    assert decoded.shape == (33, 4) and decoded.dtype == np.dtype("<f4")
+    assert np.array_equal(decoded, frame)
+    assert not decoded.flags.writeable  # A view over the request body, not a copy
+
+def test_binary_layout_matches_landmark_columns():
+    # x1, y1, z1, v1, x2, ... as in landmarks.py
+    values = np.arange(132, dtype="<f4")
+    frame = decode_binary_frame(values.tobytes())
+    assert frame[1].tolist() == [4.0, 5.0, 6.0, 7.0]
+
+def test_wrong_sized_frames_are_rejected():
+    with pytest.raises(ValueError, match="528 bytes"):
+        decode_binary_frame(b"\x00" * 527)
+
+def test_missing_visibility_counts_as_visible():
+    frame = landmarks_to_array([{"x": 0.1, "y": 0.2, "z": 0.3}] * 33)
+    assert frame[0].tolist() == pytest.approx([0.1, 0.2, 0.3, 1.0])
+
+@pytest.mark.parametrize("content_type, expected", [
+    ("application/octet-stream", True),
+    ("Application/Octet-Stream; charset=binary", True),
+    ("application/json", False),
+    (None, False),
+])
+def test_binary_content_type(content_type, expected):
+    assert is_binary_request(content_type) is expected
@@ -0,0 +1,164 @@
+# test_main.py
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from kinematics import (
+    LEFT_ANKLE, LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER, NOSE,
+    RIGHT_ANKLE, RIGHT_HIP, RIGHT_KNEE, RIGHT_SHOULDER,
+)
+from state import exercise_state
+
+CLIENT = "test-main"
+STANDING, SQUATTING = 175, 70  # Knee angles
+
+@pytest.fixture
+def client():
+    exercise_state.discard_client(CLIENT)
+    yield TestClient(main.app)
+    exercise_state.discard_client(CLIENT)
+
+def squat_landmarks(knee_angle):
+    """A side-on squatter with the given knee angle and an upright torso"""
+    landmarks = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    radians = math.radians(knee_angle)
+    for ankle, knee, hip, shoulder in ((LEFT_ANKLE, LEFT_KNEE, LEFT_HIP, LEFT_SHOULDER),
+                                       (RIGHT_ANKLE, RIGHT_KNEE, RIGHT_HIP, RIGHT_SHOULDER)):
+        hip_x, hip_y = 0.5 - 0.2 * math.sin(radians), 0.7 + 0.2 * math.cos(radians)
+        landmarks[ankle].update(x=0.5, y=0.9)
+        landmarks[knee].update(x=0.5, y=0.7)
+        landmarks[hip].update(x=hip_x, y=hip_y)
+        landmarks[shoulder].update(x=hip_x, y=hip_y - 0.3)
+    landmarks[NOSE].update(x=landmarks[LEFT_SHOULDER]["x"], y=landmarks[LEFT_SHOULDER]["y"] - 0.1)
+    return landmarks
+
+def squat_set(reps, frames_per_stage=5):
+    """Knee angles of a set: standing, then reps x (squat, stand)"""
+    return [STANDING] * frames_per_stage + ([SQUATTING] * frames_per_stage + [STANDING] * frames_per_stage) * reps
+
+def stream(websocket, messages):
+    """Send frames, then an empty message whose error reply marks the end of the pushed results"""
+    for message in messages:
+        if isinstance(message, bytes):
+            websocket.send_bytes(message)
+        else:
+            websocket.send_json(message)
+    websocket.send_json({})
+    results = []
+    while True:
+        result = websocket.receive_json()
+        if result.get("error") == "No landmarks provided":
+            return results
+        results.append(result)
+
+def test_websocket_pushes_only_changes(client):
+    frames = [{"landmarks": squat_landmarks(angle)} for angle in squat_set(reps=2)]
+    with client.websocket_connect(f"/ws/landmarks/squats?client_id={CLIENT}&smoothing=false") as websocket:
+        results = stream(websocket, frames)
+    assert len(results) < len(frames)
+    assert [result["counter"] for result in results][-1] == 2
+    signatures = [(result["stage"], result["counter"], result["feedback"]) for result in results]
+    assert all(a != b for a, b in zip(signatures, signatures[1:]))
+
+def test_websocket_state_lasts_for_the_connection(client):
+    url = f"/ws/landmarks/squats?client_id={CLIENT}&smoothing=false"
+    with client.websocket_connect(url) as websocket:
+        stream(websocket, [{"landmarks": squat_landmarks(angle)} for angle in squat_set(reps=1)])
+        results = stream(websocket, [{"landmarks": squat_landmarks(angle)} for angle in squat_set(reps=1)[5:]])
+    assert results[-1]["counter"] == 2
+
+def test_websocket_reports_bad_messages_and_unknown_exercises(client):
+    with client.websocket_connect("/ws/landmarks/squats") as websocket:
+        websocket.send_text("not json")
+        assert websocket.receive_json() == {"error": "No landmarks provided"}
+        websocket.send_bytes(b"\x00" * 10)
+        assert "528 bytes" in websocket.receive_json()["error"]
+    with client.websocket_connect("/ws/landmarks/jumping_jacks") as websocket:
+        assert websocket.receive_json() == {"error": "Exercise not found"}
+
+def test_binary_frames_match_json_frames(client):
+    from landmark_format import encode_binary_frame
+
+    def post(angle, binary):
+        url = f"/landmarks/squats?client_id={CLIENT}&smoothing=false"
+        if binary:
+            return client.post(url, content=encode_binary_frame(squat_landmarks(angle)),
+                               headers={"Content-Type": "application/octet-stream"}).json()
+        return client.post(url, json={"landmarks": squat_landmarks(angle)}).json()
+
+    def run_set(binary):
+        results = [post(angle, binary) for angle in squat_set(reps=1)]
+        client.post(f"/reset/squats?client_id={CLIENT}")
+        return [(result["stage"], result["counter"], result["feedback"]) for result in results]
+
+    results = run_set(binary=True)
+    assert results == run_set(binary=False)
+    assert results[-1][1] == 1
+
+def test_binary_frame_of_the_wrong_size_is_rejected(client):
+    response = client.post("/landmarks/squats", content=b"\x00" * 100,
+                           headers={"Content-Type": "application/octet-stream"})
+    assert response.status_code == 400
+    assert "528 bytes" in response.json()["error"]
+
+def test_websocket_accepts_binary_frames(client):
+    from landmark_format import encode_binary_frame
+
+    frames = [encode_binary_frame(squat_landmarks(angle)) for angle in squat_set(reps=2)]
+    with client.websocket_connect(f"/ws/landmarks/squats?client_id={CLIENT}&smoothing=false") as websocket:
+        results = stream(websocket, frames)
+    assert results[-1]["counter"] == 2
+
+def batch_body(angles, start_ms=1000, interval_ms=33):
+    return {"frames": [
+        {"landmarks": squat_landmarks(angle), "timestamp": start_ms + i * interval_ms}
+        for i, angle in enumerate(angles)
+    ]}
+
+def test_batch_runs_frames_through_the_rep_counter_in_order(client):
+    angles = squat_set(reps=2)
+    body = client.post(f"/landmarks/squats/batch?client_id={CLIENT}&smoothing=false",
+                       json=batch_body(angles)).json()
+    assert body["frames_processed"] == len(angles)
+    assert [entry["frame_index"] for entry in body["results"]] == list(range(len(angles)))
+    assert [entry["timestamp"] for entry in body["results"]][:2] == [1000, 1033]
+    assert body["final_state"]["counter"] == 2
+
+    # The same frames one at a time reach the same stages and counts
+    client.post(f"/reset/squats?client_id={CLIENT}")
+    single = [client.post(f"/landmarks/squats?client_id={CLIENT}&smoothing=false",
+                          json={"landmarks": squat_landmarks(angle)}).json() for angle in angles]
+    assert [(entry["stage"], entry["counter"]) for entry in body["results"]] == \
+        [(result["stage"], result["counter"]) for result in single]
+
+def test_batch_can_return_transitions_only(client):
+    angles = squat_set(reps=2)
+    body = client.post(f"/landmarks/squats/batch?client_id={CLIENT}&smoothing=false&transitions_only=true",
+                       json=batch_body(angles)).json()
+    results = body["results"]
+    assert len(results) < len(angles)
+    signatures = [(entry["stage"], entry["counter"], entry["feedback"]) for entry in results]
+    assert all(a != b for a, b in zip(signatures, signatures[1:]))
+    assert body["final_state"]["counter"] == 2
+
+def test_batch_state_continues_across_requests(client):
+    url = f"/landmarks/squats/batch?client_id={CLIENT}&smoothing=false"
+    angles = squat_set(reps=1)
+    client.post(url, json=batch_body(angles))
+    body = client.post(url, json=batch_body(angles[5:], start_ms=5000)).json()
+    assert body["final_state"]["counter"] == 2
+
+@pytest.mark.parametrize("body, status", [
+    ({}, 400),
+    ({"frames": []}, 400),
+    ({"frames": "frames"}, 400),
+    ({"frames": [{"landmarks": [{"x": 0.5, "y": 0.5}] * 10}]}, 400),
+    ({"frames": [{"landmarks": squat_landmarks(STANDING), "timestamp": "soon"}]}, 400),
+])
+def test_malformed_batches_are_rejected(client, body, status):
+    assert client.post(f"/landmarks/squats/batch?client_id={CLIENT}", json=body).status_code == status
+
+def test_batch_for_unknown_exercise(client):
+    assert client.post("/landmarks/jumping_jacks/batch", json=batch_body([STANDING])).status_code == 404
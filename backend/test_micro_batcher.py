@@ -0,0 +1,35 @@
+# test_micro_batcher.py
+import asyncio
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+def submit_all(batcher, items):
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    return asyncio.run(run())
+
+def test_concurrent_items_are_batched_in_order():
+    calls = []
+    def predict(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=50)
+    assert submit_all(batcher, range(10)) == [item * 10 for item in range(10)]
+    assert calls == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert batcher.average_batch_size == pytest.approx(10 / 3)
+
+def test_prediction_errors_reach_every_caller():
+    def predict(items):
+        raise ValueError("model failed")
+
+    results = submit_all(MicroBatcher(predict, max_wait_ms=1), range(3))
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_short_result_list_fails_the_remaining_callers():
+    batcher = MicroBatcher(lambda items: iter(items[:2]), max_wait_ms=1)
+    results = submit_all(batcher, range(4))
+    assert results[:2] == [0, 1]
+    assert all(isinstance(result, RuntimeError) for result in results[2:])
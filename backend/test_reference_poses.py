@@ -0,0 +1,89 @@
+# test_reference_poses.py
+import numpy as np
+import pytest
+
+from reference_poses import (
+    LANDMARK_INDICES, PROGRESS_BUCKETS, SKELETON_JOINTS, SKELETON_TABLE_STEPS, SKELETON_TABLES,
+    T_POSE_ARRAY, T_POSE_REFERENCE, apply_calibration, build_reference_skeleton,
+    build_skeleton_trajectory, calibrate_points, calibrate_user_skeleton, get_calibration_matrix,
+    get_reference_skeleton, reference_skeleton_array,
+)
+
+def t_pose_landmarks(keypoints):
+    landmarks = [{"x": 0.0, "y": 0.0, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    for name, (x, y) in keypoints.items():
+        landmarks[LANDMARK_INDICES[name]] = {"x": x, "y": y, "z": 0.0, "visibility": 1.0}
+    return landmarks
+
+def user_keypoints(scale=1.0, offset=(0.0, 0.0), lower_arm=1.0):
+    """The reference T-pose scaled, moved, and with the forearms stretched by lower_arm"""
+    keypoints = {name: np.array(point) for name, point in T_POSE_REFERENCE.items()}
+    for side in ("left", "right"):
+        elbow = keypoints[f"{side}_elbow"]
+        keypoints[f"{side}_wrist"] = elbow + lower_arm * (keypoints[f"{side}_wrist"] - elbow)
+    return {name: (scale * point + offset).tolist() for name, point in keypoints.items()}
+
+def as_array(keypoints):
+    return np.array([keypoints[name] for name in SKELETON_JOINTS])
+
+@pytest.mark.parametrize("scale, offset, lower_arm", [
+    (1.0, (0.0, 0.0), 1.0),
+    (0.6, (0.1, 0.25), 1.0),
+    (1.0, (0.0, 0.0), 1.5),
+    (0.8, (-0.05, 0.1), 0.7),
+])
+def test_calibrated_t_pose_matches_user(scale, offset, lower_arm):
+    keypoints = user_keypoints(scale, offset, lower_arm)
+    calibration = calibrate_user_skeleton(t_pose_landmarks(keypoints))
+    assert calibrate_points(T_POSE_ARRAY, calibration) == pytest.approx(as_array(keypoints))
+
+def test_trajectory_calibration_matches_single_skeletons():
+    calibration = calibrate_user_skeleton(t_pose_landmarks(user_keypoints(0.7, (0.1, 0.1), 1.2)))
+    progress = np.linspace(0.0, 1.0, 9)
+    trajectory = calibrate_points(build_skeleton_trajectory("squats", progress), calibration)
+    for p, calibrated in zip(progress, trajectory):
+        skeleton = apply_calibration(build_reference_skeleton("squats", p), calibration)
+        assert calibrated == pytest.approx(as_array(skeleton))
+
+def test_calibration_matrix_is_cached_per_id():
+    calibration = calibrate_user_skeleton(t_pose_landmarks(user_keypoints(0.7)))
+    matrix = get_calibration_matrix(calibration, "test-calibration")
+    assert get_calibration_matrix(calibration, "test-calibration") is matrix
+    assert get_calibration_matrix(calibration) is not matrix
+
+def test_skeleton_tables_are_read_only_samples_of_the_rep():
+    table = SKELETON_TABLES["squats"]
+    assert table.shape == (SKELETON_TABLE_STEPS, len(SKELETON_JOINTS), 2)
+    assert not table.flags.writeable
+    for step in (0, 100, SKELETON_TABLE_STEPS - 1):
+        skeleton = build_reference_skeleton("squats", step / (SKELETON_TABLE_STEPS - 1))
+        assert table[step] == pytest.approx(as_array(skeleton))
+
+@pytest.mark.parametrize("exercise", sorted(SKELETON_TABLES))
+def test_table_lookup_matches_direct_computation(exercise):
+    for progress in np.linspace(0.0, 1.0, 37):
+        expected = as_array(build_reference_skeleton(exercise, progress))
+        assert reference_skeleton_array(exercise, progress) == pytest.approx(expected, abs=2e-3)
+
+def test_building_skeletons_leaves_the_t_pose_alone():
+    t_pose = {name: list(point) for name, point in T_POSE_REFERENCE.items()}
+    for exercise in SKELETON_TABLES:
+        build_reference_skeleton(exercise, 0.5)
+    assert T_POSE_REFERENCE == t_pose
+
+def test_reference_skeletons_are_cached_per_progress_bucket():
+    landmarks = get_reference_skeleton("lunges", 0.25)
+    assert get_reference_skeleton("lunges", 0.25 + 0.1 / PROGRESS_BUCKETS) is landmarks
+    assert get_reference_skeleton("lunges", 0.5) is not landmarks
+    nose = landmarks[LANDMARK_INDICES["nose"]]
+    assert [nose["x"], nose["y"]] == pytest.approx(reference_skeleton_array("lunges", 0.25)[0])
+
+    calibration = calibrate_user_skeleton(t_pose_landmarks(user_keypoints(0.7)))
+    calibrated = get_reference_skeleton("lunges", 0.25, calibration, "test-skeleton-cache")
+    assert calibrated is not landmarks
+    assert get_reference_skeleton("lunges", 0.25, calibration, "test-skeleton-cache") is calibrated
+    # Without an ID a calibrated skeleton can't be cached
+    assert get_reference_skeleton("lunges", 0.25, calibration) is not calibrated
+
+def test_unknown_exercise_gets_the_t_pose():
+    assert reference_skeleton_array("jumping_jacks", 0.5) is T_POSE_ARRAY
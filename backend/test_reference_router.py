@@ -0,0 +1,58 @@
+# test_reference_router.py
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from calibration_store import CalibrationStore
+from reference_poses import (
+    LANDMARK_INDICES, SKELETON_JOINTS, T_POSE_REFERENCE, calibrate_points, reference_trajectory,
+)
+from routers import reference_router
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(reference_router, "calibration_store", CalibrationStore(tmp_path / "calibrations.db"))
+    reference_router._trajectory_arrays.cache_clear()
+    app = FastAPI()
+    app.include_router(reference_router.router)
+    yield TestClient(app)
+    reference_router._trajectory_arrays.cache_clear()
+
+def test_trajectory_covers_one_rep(client):
+    body = client.get("/reference/trajectory/squats?samples=5").json()
+    assert body["joints"] == list(SKELETON_JOINTS)
+    assert body["progress"] == [0.0, 0.25, 0.5, 0.75, 1.0]
+    assert np.shape(body["skeleton"]) == (5, len(SKELETON_JOINTS), 2)
+    expected = reference_trajectory("squats", 5)
+    assert body["skeleton"] == np.round(expected["skeleton"], 4).tolist()
+    assert body["angles"].keys() == expected["angles"].keys()
+
+def test_trajectory_rejects_unknown_exercise_and_sample_counts(client):
+    assert client.get("/reference/trajectory/jumping_jacks").status_code == 404
+    assert client.get("/reference/trajectory/squats?samples=1").status_code == 422
+    assert client.get("/reference/trajectory/squats?samples=5000").status_code == 422
+
+def test_trajectory_is_cached_as_read_only_arrays(client):
+    first = client.get("/reference/trajectory/lunges?samples=16").json()
+    assert client.get("/reference/trajectory/lunges?samples=16").json() == first
+    assert reference_router._trajectory_arrays.cache_info().hits == 1
+    cached = reference_router._trajectory_arrays("lunges", 16)
+    assert cached["skeleton"].dtype == np.float32 and not cached["skeleton"].flags.writeable
+
+def test_trajectory_fits_a_known_calibration(client):
+    landmarks = [{"x": 0.0, "y": 0.0, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    for name, (x, y) in T_POSE_REFERENCE.items():
+        landmarks[LANDMARK_INDICES[name]] = {"x": 0.8 * x + 0.1, "y": 0.8 * y, "z": 0.0, "visibility": 1.0}
+    calibration_id = client.post("/reference/calibrate", json={"landmarks": landmarks}).json()["calibration_id"]
+
+    body = client.get(f"/reference/trajectory/squats?samples=3&calibration_id={calibration_id}").json()
+    assert body["calibration_id"] == calibration_id
+    calibration = reference_router.calibration_store.get(calibration_id)
+    expected = calibrate_points(reference_trajectory("squats", 3)["skeleton"], calibration)
+    assert np.array(body["skeleton"]) == pytest.approx(expected, abs=1e-4)
+
+    # Unknown calibrations fall back to the generic trajectory
+    generic = client.get("/reference/trajectory/squats?samples=3&calibration_id=missing").json()
+    assert generic["calibration_id"] is None
+    assert generic["skeleton"] == client.get("/reference/trajectory/squats?samples=3").json()["skeleton"]
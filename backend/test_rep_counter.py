@@ -0,0 +1,108 @@
+# test_rep_counter.py
+import numpy as np
+import pytest
+
+from feedback_config import REP_COUNTING
+from rep_counter import advance_rep_phase
+
+FPS = 30
+
+def rest_value(config):
+    return config["EXIT_ACTIVE"] + 10
+
+def active_value(config):
+    return config["ENTER_ACTIVE"] - 10
+
+def run(exercise, values, stage=None, phase=None, start=0.0):
+    """Feed one value per frame; return the final stage and the frame indices that completed a rep"""
+    reps = []
+    for i, value in enumerate(values):
+        result = advance_rep_phase(exercise, value, stage, phase, start + i / FPS)
+        stage, phase = result["stage"], result["phase"]
+        if result["rep_completed"]:
+            reps.append(i)
+    return stage, reps
+
+@pytest.mark.parametrize("exercise", sorted(REP_COUNTING))
+def test_fresh_set_starts_in_first_frame_stage(exercise):
+    config = REP_COUNTING[exercise]
+    for value, expected in ((rest_value(config), config["REST_STAGE"]),
+                            (active_value(config), config["ACTIVE_STAGE"])):
+        result = advance_rep_phase(exercise, value, "ignored", None, 10.0)
+        assert result["stage"] == expected
+        assert result["event"] is None
+        assert not result["rep_completed"]
+
+@pytest.mark.parametrize("exercise", sorted(REP_COUNTING))
+def test_joining_in_active_stage_counts_no_phantom_rep(exercise):
+    config = REP_COUNTING[exercise]
+    # Client joins at the bottom of a rep and holds it, then comes back up
+    stage, reps = run(exercise, [active_value(config)] * 10 + [rest_value(config)] * 10)
+    assert stage == config["REST_STAGE"]
+    # Reps counted on entering the active stage never saw an entry; those counted
+    # on leaving it finish the partial rep the client joined in
+    assert reps == ([10] if config["COUNT_ON"] == "exit" else [])
+
+@pytest.mark.parametrize("exercise", sorted(REP_COUNTING))
+def test_full_rep_counts_once(exercise):
+    config = REP_COUNTING[exercise]
+    values = [rest_value(config)] * 10 + [active_value(config)] * 10 + [rest_value(config)] * 10
+    stage, reps = run(exercise, values)
+    assert stage == config["REST_STAGE"]
+    assert reps == [10 if config["COUNT_ON"] == "enter" else 20]
+
+@pytest.mark.parametrize("exercise", sorted(REP_COUNTING))
+def test_jitter_inside_hysteresis_band_does_not_flap(exercise):
+    config = REP_COUNTING[exercise]
+    inside = (config["ENTER_ACTIVE"] + config["EXIT_ACTIVE"]) / 2
+    values = [rest_value(config)] * 10 + [active_value(config)] * 10
+    values += [inside, active_value(config)] * 10 + [rest_value(config)] * 10
+    _, reps = run(exercise, values)
+    assert len(reps) == 1
+
+def test_dwell_suppresses_single_frame_spikes():
+    config = REP_COUNTING["squats"]
+    # Stage changes one frame after the last one are ignored until MIN_DWELL_FRAMES have passed
+    values = [rest_value(config)] * 10 + [active_value(config), rest_value(config), active_value(config)]
+    stage, reps = run("squats", values)
+    assert reps == [10]
+    assert stage == config["ACTIVE_STAGE"]
+
+def test_enter_duration_measures_descent_from_last_rest_frame():
+    config = REP_COUNTING["squats"]
+    middle = (config["ENTER_ACTIVE"] + config["EXIT_ACTIVE"]) / 2
+    stage, phase = None, None
+    values = [rest_value(config)] * 5 + [middle] * 15 + [active_value(config)]
+    for i, value in enumerate(values):
+        result = advance_rep_phase("squats", value, stage, phase, i / FPS)
+        stage, phase = result["stage"], result["phase"]
+    assert result["event"] == "enter"
+    assert result["duration"] == pytest.approx(16 / FPS)
+
+def squat_frame(knee_angle):
+    """Landmarks of a side-on squatter with both knees bent to knee_angle (degrees)"""
+    frame = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    shin = np.radians(180 - knee_angle)
+    for shoulder, hip, knee, ankle in ((11, 23, 25, 27), (12, 24, 26, 28)):
+        frame[shoulder].update(x=0.5, y=0.2)
+        frame[hip].update(x=0.5, y=0.5)
+        frame[knee].update(x=0.5, y=0.7)
+        frame[ankle].update(x=0.5 + 0.2 * np.sin(shin), y=0.7 + 0.2 * np.cos(shin))
+    return frame
+
+def test_squat_analyzer_joining_at_bottom_counts_no_phantom_rep():
+    import squats
+    from state import exercise_state
+
+    client = "test-phantom-rep"
+    exercise_state.discard_client(client)
+    try:
+        counters = []
+        for i, angle in enumerate([70] * 5 + [175] * 10 + [70] * 5):
+            result = squats.process_landmarks(squat_frame(angle), 0.0, client_id=client, timestamp=i / FPS)
+            counters.append(result["counter"])
+        # Nothing for the rep the client joined in; one for the full rep that follows
+        assert counters[14] == 0
+        assert counters[-1] == 1
+    finally:
+        exercise_state.discard_client(client)
@@ -0,0 +1,54 @@
+# test_rep_store.py
+import pytest
+
+from rep_store import RepStore
+
+def test_append_and_read(tmp_path):
+    store = RepStore(tmp_path)
+    assert not store.exists("s1")
+    assert store.read_reps("s1") == []
+    store.append("s1", {"exercise": "squats", "rep": 1})
+    store.append("s1", {"exercise": "pushups", "rep": 1})
+    store.append("s2", {"exercise": "squats", "rep": 1})
+    assert store.exists("s1")
+    assert [rep["exercise"] for rep in store.read_reps("s1")] == ["squats", "pushups"]
+    assert store.read_reps("s1", exercise="pushups") == [{"exercise": "pushups", "rep": 1}]
+
+def test_cursor_resumes_after_last_rep(tmp_path):
+    store = RepStore(tmp_path)
+    for rep in range(5):
+        store.append("s1", {"rep": rep})
+
+    # Page through two reps at a time, resuming from the last yielded cursor
+    pages, offset = [], 0
+    while True:
+        page = []
+        for offset, rep in store.iter_reps("s1", offset):
+            page.append(rep["rep"])
+            if len(page) == 2:
+                break
+        if not page:
+            break
+        pages.append(page)
+    assert pages == [[0, 1], [2, 3], [4]]
+
+    # Reps appended later are picked up from the final cursor
+    store.append("s1", {"rep": 5})
+    assert [rep for _, rep in store.iter_reps("s1", offset)] == [{"rep": 5}]
+
+def test_cursor_inside_a_line_is_rejected(tmp_path):
+    store = RepStore(tmp_path)
+    store.append("s1", {"rep": 0})
+    store.append("s1", {"rep": 1})
+    (offset, _), _ = store.iter_reps("s1")
+    with pytest.raises(ValueError):
+        store.iter_reps("s1", offset - 1)
+    with pytest.raises(ValueError):
+        store.iter_reps("s1", offset + 1)
+
+def test_partial_last_line_is_skipped(tmp_path):
+    store = RepStore(tmp_path)
+    store.append("s1", {"rep": 0})
+    with open(store.path("s1"), "a") as f:
+        f.write('{"rep": 1')
+    assert store.read_reps("s1") == [{"rep": 0}]
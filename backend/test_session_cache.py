@@ -0,0 +1,72 @@
+# test_session_cache.py
+import json
+import os
+
+import pytest
+
+from session_cache import CompletedSessionCache
+
+def write(path, session, mtime_ns=None):
+    path.write_text(json.dumps(session))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+def test_repeated_loads_are_served_from_memory(tmp_path):
+    cache = CompletedSessionCache()
+    path = write(tmp_path / "s1.json", {"session_id": "s1"})
+    first = cache.load(path)
+    assert first == {"session_id": "s1"}
+    assert cache.load(path) is first
+    assert len(cache) == 1
+
+def test_rewritten_file_is_reparsed(tmp_path):
+    cache = CompletedSessionCache()
+    path = write(tmp_path / "s1.json", {"reps": 1}, mtime_ns=1_000_000_000)
+    assert cache.load(path) == {"reps": 1}
+    # Same size, newer modification time
+    write(path, {"reps": 2}, mtime_ns=2_000_000_000)
+    assert cache.load(path) == {"reps": 2}
+
+def test_least_recently_used_sessions_are_evicted_by_size(tmp_path):
+    paths = [write(tmp_path / f"s{i}.json", {"session_id": f"s{i}", "pad": "x" * 100}) for i in range(3)]
+    size = paths[0].stat().st_size
+    cache = CompletedSessionCache(max_bytes=2 * size)
+    first = cache.load(paths[0])
+    cache.load(paths[1])
+    cache.load(paths[0])  # s1 is now the least recently used
+    cache.load(paths[2])
+    assert len(cache) == 2
+    assert cache.load(paths[0]) is first
+
+def test_oversized_sessions_are_not_cached(tmp_path):
+    cache = CompletedSessionCache(max_bytes=10)
+    path = write(tmp_path / "big.json", {"pad": "x" * 100})
+    assert cache.load(path) == {"pad": "x" * 100}
+    assert len(cache) == 0
+
+def test_put_caches_a_just_written_session(tmp_path):
+    cache = CompletedSessionCache()
+    session = {"session_id": "s1"}
+    path = write(tmp_path / "s1.json", session)
+    cache.put(path, session)
+    assert cache.load(path) is session
+
+def test_missing_and_invalid_files_raise(tmp_path):
+    cache = CompletedSessionCache()
+    with pytest.raises(OSError):
+        cache.load(tmp_path / "missing.json")
+    (tmp_path / "bad.json").write_text("{")
+    with pytest.raises(ValueError):
+        cache.load(tmp_path / "bad.json")
+
+def test_completed_sessions_are_loaded_once():
+    from session_state import completed_sessions, end_session, get_session, start_session
+
+    session_id = start_session(user_id="test-session-cache")
+    end_session(session_id)
+    completed_sessions.clear()
+    session = get_session(session_id)
+    assert session["completed"]
+    assert get_session(session_id) is session
+    assert get_session("missing-session") == {"error": "Session not found"}
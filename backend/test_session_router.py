@@ -0,0 +1,66 @@
+# test_session_router.py
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers.session_router import router
+from session_state import active_sessions
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+@pytest.fixture
+def session_id(client):
+    session_id = client.post("/session/start", json={"user_id": "test-session-router"}).json()["session_id"]
+    for rep in range(7):
+        exercise = "pushups" if rep % 3 == 2 else "squats"
+        client.post(f"/session/{session_id}/record",
+                    json={"exercise": exercise, "feedback_flags": [], "metrics": {"rep": rep}})
+    yield session_id
+    active_sessions.pop(session_id, None)
+
+def pages(client, url, limit):
+    """Follow next_cursor through a paginated rep log"""
+    result, cursor = [], 0
+    while cursor is not None:
+        body = client.get(url, params={"cursor": cursor, "limit": limit}).json()
+        assert body["rep_count"] <= limit
+        result.append([rep["metrics"]["rep"] for rep in body["reps"]])
+        cursor = body["next_cursor"]
+    return result
+
+def test_whole_rep_log_without_limit(client, session_id):
+    body = client.get(f"/session/{session_id}/reps").json()
+    assert body["rep_count"] == 7
+    assert [rep["metrics"]["rep"] for rep in body["reps"]] == list(range(7))
+    assert "next_cursor" not in body
+
+def test_cursor_pagination(client, session_id):
+    assert pages(client, f"/session/{session_id}/reps", 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert pages(client, f"/session/{session_id}/exercise/squats/reps", 2) == [[0, 1], [3, 4], [6]]
+    # A last page that is exactly full is followed by an empty one
+    assert pages(client, f"/session/{session_id}/exercise/pushups/reps", 2) == [[2, 5], []]
+
+def test_ndjson_stream_resumes_from_any_line(client, session_id):
+    response = client.get(f"/session/{session_id}/reps", params={"stream": "true"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["metrics"]["rep"] for line in lines] == list(range(7))
+    resumed = client.get(f"/session/{session_id}/reps",
+                         params={"stream": "true", "cursor": lines[3]["cursor"], "limit": 2})
+    assert [json.loads(line)["metrics"]["rep"] for line in resumed.text.splitlines()] == [4, 5]
+
+def test_rep_log_survives_the_end_of_the_session(client, session_id):
+    client.post(f"/session/{session_id}/end")
+    assert session_id not in active_sessions
+    assert pages(client, f"/session/{session_id}/reps", 4) == [[0, 1, 2, 3], [4, 5, 6]]
+
+def test_invalid_cursor_and_unknown_session(client, session_id):
+    assert client.get(f"/session/{session_id}/reps", params={"cursor": 5}).status_code == 400
+    assert client.get(f"/session/{session_id}/reps", params={"limit": 0}).status_code == 422
+    assert client.get("/session/missing/reps").status_code == 404
@@ -0,0 +1,59 @@
+# test_session_state.py
+import math
+
+import numpy as np
+import pytest
+
+from routers.session_router import generate_exercise_report
+from session_state import active_sessions, end_session, get_session, get_session_reps, record_rep, start_session
+
+REPS = [
+    ("squats", ["GOOD_FORM"], {"knee_angle": 92.0, "torso_angle": 20.0, "valgus": True}),
+    ("squats", ["DEPTH_TOO_SHALLOW"], {"knee_angle": 118.5, "torso_angle": 24.0}),
+    ("pushups", ["HIPS_TOO_HIGH"], {"elbow_angle": 95.0}),
+    ("squats", ["DEPTH_TOO_SHALLOW", "BACK_TOO_BENT"], {"knee_angle": 121.0, "torso_angle": 41.5, "side": "left"}),
+]
+
+@pytest.fixture
+def session_id():
+    session_id = start_session(user_id="test-session-state")
+    for exercise, flags, metrics in REPS:
+        record_rep(session_id, exercise, flags, metrics)
+    yield session_id
+    active_sessions.pop(session_id, None)
+
+def test_aggregates_are_updated_per_rep(session_id):
+    squats = get_session(session_id)["metrics"]["exercises"]["squats"]
+    assert squats["reps"] == 3
+    assert squats["feedback_counts"] == {"GOOD_FORM": 1, "DEPTH_TOO_SHALLOW": 2, "BACK_TOO_BENT": 1}
+    knee = squats["metric_stats"]["knee_angle"]
+    values = [92.0, 118.5, 121.0]
+    assert (knee["count"], knee["min"], knee["max"]) == (3, 92.0, 121.0)
+    assert knee["mean"] == pytest.approx(np.mean(values))
+    assert math.sqrt(knee["m2"] / knee["count"]) == pytest.approx(np.std(values))
+    # Only numeric metrics are aggregated
+    assert set(squats["metric_stats"]) == {"knee_angle", "torso_angle"}
+    assert [rep["exercise_rep"] for rep in get_session_reps(session_id, "squats")] == [1, 2, 3]
+
+def test_report_from_aggregates_matches_report_from_reps(session_id):
+    session = get_session(session_id)
+    report = generate_exercise_report(session, "squats")
+    # A session saved before the aggregates existed: rebuilt from its logged reps
+    legacy = {**session, "metrics": {**session["metrics"], "exercises": {
+        "squats": {key: value for key, value in session["metrics"]["exercises"]["squats"].items()
+                   if key not in ("metric_stats", "last_score")}
+    }}}
+    rebuilt = generate_exercise_report(legacy, "squats", get_session_reps(session_id, "squats"))
+    assert report["form_analysis"] == rebuilt["form_analysis"]
+    assert report["summary"] == rebuilt["summary"]
+    assert report["summary"]["trend"] == "declining"
+    assert ("GOOD_FORM", 1) not in report["form_analysis"]["common_issues"]
+
+def test_ended_session_keeps_its_aggregates(session_id):
+    summary = end_session(session_id)
+    assert summary["total_reps"] == 4
+    assert session_id not in active_sessions
+    session = get_session(session_id)
+    assert session["completed"]
+    assert session["metrics"]["exercises"]["squats"]["metric_stats"]["knee_angle"]["max"] == 121.0
+    assert record_rep(session_id, "squats", [], {}) == {"error": "Invalid session ID"}
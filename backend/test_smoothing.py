@@ -0,0 +1,69 @@
+# test_smoothing.py
+import numpy as np
+import pytest
+
+from smoothing import OneEuroFilter, smooth_frames, smooth_landmarks
+from state import exercise_state
+
+CLIENTS = ("test-smoothing-a", "test-smoothing-b")
+
+@pytest.fixture(autouse=True)
+def clean_clients():
+    for client in CLIENTS:
+        exercise_state.discard_client(client)
+    yield
+    for client in CLIENTS:
+        exercise_state.discard_client(client)
+
+def frame(value):
+    result = np.full((33, 4), value, dtype=np.float64)
+    result[:, 3] = 0.9
+    return result
+
+def test_first_frame_passes_through():
+    assert np.array_equal(OneEuroFilter()(frame(0.3), 0.0), frame(0.3))
+
+def test_still_landmarks_stay_put():
+    landmark_filter = OneEuroFilter()
+    for i in range(10):
+        result = landmark_filter(frame(0.3), i / 30)
+    assert np.allclose(result, frame(0.3))
+
+def test_jump_is_smoothed_and_visibility_kept():
+    landmark_filter = OneEuroFilter()
+    landmark_filter(frame(0.3), 0.0)
+    result = landmark_filter(frame(0.4), 1 / 30)
+    assert np.all((result[:, :3] > 0.3) & (result[:, :3] < 0.4))
+    assert np.all(result[:, 3] == 0.9)
+
+def test_anonymous_frames_are_not_filtered():
+    smooth_landmarks(frame(0.3), None, 0.0)
+    landmarks = frame(0.5)
+    assert smooth_landmarks(landmarks, None, 1 / 30) is landmarks
+
+def test_clients_have_separate_filters():
+    smooth_landmarks(frame(0.3), CLIENTS[0], 0.0)
+    # Another client's first frame is not blended with the first client's landmarks
+    assert np.array_equal(smooth_landmarks(frame(0.7), CLIENTS[1], 1 / 30), frame(0.7))
+    result = smooth_landmarks(frame(0.4), CLIENTS[0], 1 / 30)
+    assert np.all((result[:, :3] > 0.3) & (result[:, :3] < 0.4))
+
+def test_client_batches_continue_the_stream():
+    frames = [frame(0.3), frame(0.4), frame(0.5), frame(0.6)]
+    timestamps = [i / 30 for i in range(len(frames))]
+    whole = smooth_frames(frames, CLIENTS[0], timestamps)
+    first = smooth_frames(frames[:2], CLIENTS[1], timestamps[:2])
+    second = smooth_frames(frames[2:], CLIENTS[1], timestamps[2:])
+    assert np.allclose(whole, np.concatenate([first, second]))
+
+def test_anonymous_batches_do_not_share_state():
+    timestamps = [0.0, 1 / 30]
+    first = smooth_frames([frame(0.3), frame(0.4)], None, timestamps)
+    second = smooth_frames([frame(0.3), frame(0.4)], None, timestamps)
+    assert np.array_equal(first, second)
+
+def test_malformed_frames():
+    malformed = [{"x": 0.5}] * 3
+    assert smooth_landmarks(malformed, CLIENTS[0]) is malformed
+    with pytest.raises(ValueError):
+        smooth_frames([malformed], CLIENTS[0])
@@ -0,0 +1,64 @@
+# test_state.py
+import state
+from state import ExerciseStateWrapper
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_store(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(state.time, "time", clock)
+    return ExerciseStateWrapper(**kwargs), clock
+
+def test_clients_are_isolated():
+    store = ExerciseStateWrapper()
+    store.set("squats", {"counter": 3}, client_id="a")
+    assert store.get("squats", {"counter": 0}, client_id="b") == {"counter": 0}
+    assert store.get("squats", client_id="a") == {"counter": 3}
+
+def test_default_is_copied():
+    store = ExerciseStateWrapper()
+    default = {"counter": 0, "reps": []}
+    store.get("squats", default, client_id="a")["reps"].append(1)
+    assert default == {"counter": 0, "reps": []}
+    assert store.get("squats", default, client_id="b") == {"counter": 0, "reps": []}
+
+def test_entries_expire_after_ttl(monkeypatch):
+    store, clock = make_store(monkeypatch, ttl=10)
+    store.set("squats", {"counter": 3}, client_id="a")
+    clock.now += 5
+    assert store.get("squats", client_id="a") == {"counter": 3}   # Refreshes the entry
+    clock.now += 7
+    assert store.get("squats", client_id="a") == {"counter": 3}
+    clock.now += 11
+    assert store.get("squats", {"counter": 0}, client_id="a") == {"counter": 0}
+
+def test_expired_entries_of_idle_clients_are_evicted(monkeypatch):
+    store, clock = make_store(monkeypatch, ttl=10)
+    store.set("squats", {}, client_id="idle")
+    clock.now += 11
+    store.set("squats", {}, client_id="active")
+    assert len(store) == 1
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    store, clock = make_store(monkeypatch, max_entries=2)
+    store.set("squats", {"counter": 1}, client_id="a")
+    store.set("squats", {"counter": 2}, client_id="b")
+    store.get("squats", client_id="a")   # "b" is now the least recently used
+    store.set("squats", {"counter": 3}, client_id="c")
+    assert len(store) == 2
+    assert store.get("squats", {"counter": 0}, client_id="b") == {"counter": 0}
+    assert store.get("squats", client_id="c") == {"counter": 3}
+
+def test_discard_client_drops_all_its_exercises():
+    store = ExerciseStateWrapper()
+    store.set("squats", {"counter": 1}, client_id="a")
+    store.set("pushups", {"counter": 2}, client_id="a")
+    store.set("squats", {"counter": 5}, client_id="b")
+    store.discard_client("a")
+    assert len(store) == 1
+    assert store.get("squats", client_id="b") == {"counter": 5}
@@ -0,0 +1,39 @@
+# test_video_analysis.py
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from video_analysis import stream_poses
+
+CLIP = Path(__file__).parent / "data" / "video" / "male-Bodyweight-bodyweight-squat-side.mp4"
+
+class NoPose:
+    """Stands in for the MediaPipe model: never detects a pose"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def reset(self):
+        pass
+
+    def process(self, rgb):
+        self.frames += 1
+        return SimpleNamespace(pose_landmarks=None)
+
+def test_missing_video_raises():
+    with pytest.raises(IOError):
+        list(stream_poses("missing.mp4", pose=NoPose()))
+
+@pytest.mark.skipif(not CLIP.exists(), reason="demo clip not available")
+def test_stopping_early_shuts_the_pipeline_down():
+    threads = threading.active_count()
+    poses = stream_poses(CLIP, frame_stride=2, pose=NoPose())
+    first = [next(poses) for _ in range(3)]
+    poses.close()
+    assert [index for index, _, _ in first] == [0, 2, 4]
+    assert all(landmarks is None for _, _, landmarks in first)
+    assert threading.active_count() == threads
@@ -0,0 +1,68 @@
+# test_visibility.py
+import importlib
+
+import numpy as np
+import pytest
+
+from kinematics import (
+    LEFT_ANKLE, LEFT_ELBOW, LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER, LEFT_WRIST,
+    VISIBILITY_LANDMARKS, batch_kinematics,
+)
+from state import exercise_state
+from visibility import NOT_VISIBLE_ERROR, not_visible_response, visible_sides
+
+CLIENT = "test-visibility"
+
+def visibility(default=1.0, **scores):
+    kin = {f"{name}_visibility": default for name in VISIBILITY_LANDMARKS}
+    kin.update({f"{name}_visibility": score for name, score in scores.items()})
+    return kin
+
+def test_better_visible_side_is_analyzed():
+    # Side view: the far side is scored above the threshold but worse than the near one
+    kin = visibility(left_knee=0.6, left_ankle=0.55)
+    assert visible_sides(kin, "squats") == ("right",)
+    assert visible_sides(visibility(right_hip=0.7), "squats") == ("left",)
+
+def test_side_is_judged_by_its_least_visible_joint():
+    kin = visibility(left_shoulder=1.0, left_knee=0.9, right_shoulder=0.95, right_knee=0.95)
+    assert visible_sides(kin, "squats") == ("right",)
+
+def test_frame_is_skipped_without_a_visible_side():
+    kin = visibility(left_ankle=0.3, right_knee=0.2)
+    assert visible_sides(kin, "squats") == ()
+
+def test_missing_center_joint_skips_frame():
+    assert visible_sides(visibility(nose=0.1), "deadlifts") == ()
+
+def test_lunges_need_both_sides():
+    assert visible_sides(visibility(), "lunges") == ("left", "right")
+    assert visible_sides(visibility(left_ankle=0.3), "lunges") == ()
+
+def test_not_visible_response_keeps_count_and_stage():
+    response = not_visible_response({"repCount": 4, "stage": "down"}, "repCount")
+    assert response["repCount"] == 4 and response["stage"] == "down"
+    assert response["visible"] is False
+    assert response["error"] == response["feedback"] == NOT_VISIBLE_ERROR
+
+def test_skipped_frame_leaves_rep_state_alone():
+    import squats
+    state = exercise_state.get("squats", {"counter": 3, "stage": "down"}, CLIENT)
+    response = squats.process_landmarks(None, 0, client_id=CLIENT, kinematics=visibility(0.1))
+    assert response["counter"] == 3 and response["stage"] == "down"
+    assert response["visible"] is False
+    assert exercise_state.get("squats", None, CLIENT) == state == {"counter": 3, "stage": "down"}
+    exercise_state.discard_client(CLIENT)
+
+@pytest.mark.parametrize("exercise", ["squats", "deadlifts", "pushups", "situps", "bicep_curls"])
+def test_analyzers_read_only_the_visible_side(exercise):
+    module = importlib.import_module(exercise)
+    frame = np.random.default_rng(3).random((33, 4))
+    frame[:, 3] = 1.0
+    frame[[LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE], 3] = 0.1
+    # Only the right side's metrics (and every visibility score) are available
+    kin = {name: value for name, value in batch_kinematics(frame[None])[0].items()
+           if name.startswith("right_") or name.endswith("_visibility")}
+    response = module.process_landmarks(None, 0, client_id=CLIENT, kinematics=kin)
+    exercise_state.discard_client(CLIENT)
+    assert "error" not in response
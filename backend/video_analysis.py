@@ -0,0 +1,339 @@
+"""
+Offline Video Analysis
+----------------------
+Runs recorded exercise videos (e.g. the clips in data/video/) through pose
+extraction and the exercise analyzers to produce a rep-by-rep report.
+
+Frame decoding (OpenCV), pose inference (MediaPipe) and form analysis run as a
+three-stage pipeline connected by bounded queues (stream_poses). OpenCV and
+MediaPipe release the GIL while they work, so decoding the next frames overlaps
+with inference on the current one. Pose inference still dominates, so whether a
+clip is processed faster than real time depends on the machine and the model
+complexity; each report includes the measured realtime_factor.
+
+Usage:
+    python video_analysis.py data/video/male-Bodyweight-bodyweight-squat-side.mp4
+    python video_analysis.py clip.mp4 --exercise squats --output report.json
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from analyzers import available_exercises, get_analyzer
+from smoothing import smooth_landmarks
+
+# Keywords in the demo video file names mapped to exercise modules
+VIDEO_EXERCISE_KEYWORDS = {
+    "squat": "squats",
+    "deadlift": "deadlifts",
+    "lunge": "lunges",
+    "push-up": "pushups",
+    "pushup": "pushups",
+    "situp": "situps",
+    "sit-up": "situps",
+    "curl": "bicep_curls",
+}
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+# Bounded queues keep memory flat when one stage is slower than the others
+QUEUE_SIZE = 64
+
+_END = object()  # Sentinel marking the end of a stage's output
+
+def guess_exercise(video_path):
+    """Infer the exercise from a video file name (None if it can't be inferred)"""
+    name = Path(video_path).stem.lower()
+    for keyword, exercise in VIDEO_EXERCISE_KEYWORDS.items():
+        if keyword in name:
+            return exercise
+    return None
+
+def is_side_view(video_path):
+    """True for the side-view demo clips (file names ending in "-side")"""
+    return Path(video_path).stem.lower().endswith("-side")
+
+def find_videos(paths, video_filter=None):
+    """
+    Expand directories into the video files they contain.
+
+    Args:
+        paths: Video files or directories of videos
+        video_filter: Optional predicate selecting which files found in a
+            directory are used (e.g. is_side_view); files named directly are always used
+    """
+    videos = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            videos.extend(sorted(
+                p for p in path.iterdir()
+                if p.suffix.lower() in VIDEO_EXTENSIONS and (video_filter is None or video_filter(p))
+            ))
+        else:
+            videos.append(path)
+    return videos
+
+def pose_landmarks_to_array(pose_landmarks):
+    """Convert MediaPipe pose landmarks to a (33, 4) float32 array"""
+    return np.array(
+        [[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks.landmark],
+        dtype=np.float32
+    )
+
+def _decode_frames(video_path, frame_queue, errors, frame_stride=1):
+    """Stage 1: decode video frames and hand them over as RGB images with their timestamps"""
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        index = 0
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if index % frame_stride == 0:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                frame_queue.put((index, index / fps, rgb))
+            index += 1
+    except Exception as e:
+        errors.append(e)
+    finally:
+        cap.release()
+        frame_queue.put(_END)
+
+def create_pose_model(model_complexity=1):
+    """Create a MediaPipe pose model in video (tracking) mode"""
+    import mediapipe as mp
+
+    return mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=model_complexity,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+def _extract_poses(frame_queue, pose_queue, errors, pose):
+    """Stage 2: run MediaPipe pose estimation on each decoded frame"""
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is _END:
+                break
+            index, timestamp, rgb = item
+            results = pose.process(rgb)
+            landmarks = None
+            if results.pose_landmarks:
+                landmarks = pose_landmarks_to_array(results.pose_landmarks)
+            pose_queue.put((index, timestamp, landmarks))
+    except Exception as e:
+        errors.append(e)
+        # Drain the decoder so it isn't left blocked on a full queue
+        while frame_queue.get() is not _END:
+            pass
+    finally:
+        pose_queue.put(_END)
+
+def stream_poses(video_path, frame_stride=1, model_complexity=1, pose=None):
+    """
+    Yield the pose of each decoded video frame, in frame order.
+
+    Decoding and pose inference run in their own threads (stages 1 and 2); the
+    caller consuming this generator is the last stage. Closing the generator
+    early stops the pipeline cleanly.
+
+    Args:
+        video_path: Path to the video file
+        frame_stride: Use every n-th frame (1 = every frame)
+        model_complexity: MediaPipe pose model complexity (0, 1 or 2)
+        pose: Optional pose model to reuse across videos (see create_pose_model)
+
+    Yields:
+        (index, timestamp, landmarks): frame index, seconds into the video and a
+        (33, 4) float32 array, or None when no pose was detected
+    """
+    # Tracking mode relies on frames arriving in order, so one model serves one video at a time
+    owns_pose = pose is None
+    if owns_pose:
+        pose = create_pose_model(model_complexity)
+    else:
+        pose.reset()
+
+    frame_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    pose_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    errors = []
+    stages = [
+        threading.Thread(target=_decode_frames, args=(video_path, frame_queue, errors, frame_stride), daemon=True),
+        threading.Thread(target=_extract_poses, args=(frame_queue, pose_queue, errors, pose), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    finished = False
+    try:
+        while True:
+            item = pose_queue.get()
+            if item is _END:
+                finished = True
+                break
+            yield item
+    finally:
+        # Unblock the upstream stages if the consumer stopped early
+        while not finished:
+            finished = pose_queue.get() is _END
+        for stage in stages:
+            stage.join()
+        if owns_pose:
+            pose.close()
+
+    if errors:
+        raise errors[0]
+
+def extract_landmarks(video_path, frame_stride=1, model_complexity=1, pose=None):
+    """
+    Extract the pose landmarks of a video without analyzing them.
+
+    Args:
+        video_path: Path to the video file
+        frame_stride: Use every n-th frame (1 = every frame)
+        model_complexity: MediaPipe pose model complexity (0, 1 or 2)
+        pose: Optional pose model to reuse across videos (see create_pose_model)
+
+    Returns:
+        (timestamps, frames): (N,) float64 seconds and (N, 33, 4) float32 landmarks
+        of the frames where a pose was detected
+    """
+    timestamps = []
+    frames = []
+    for _, timestamp, landmarks in stream_poses(video_path, frame_stride, model_complexity, pose):
+        if landmarks is not None:
+            timestamps.append(timestamp)
+            frames.append(landmarks)
+
+    frames = np.stack(frames) if frames else np.zeros((0, 33, 4), dtype=np.float32)
+    return np.array(timestamps, dtype=np.float64), frames
+
+def analyze_video(video_path, exercise=None, tolerance=10, session_id=None,
+                  frame_stride=1, model_complexity=1, pose=None, smoothing=True):
+    """
+    Analyze a recorded exercise video.
+
+    Args:
+        video_path: Path to the video file
+        exercise: Exercise name (inferred from the file name when omitted)
+        tolerance: Tolerance threshold passed to the analyzer
+        session_id: Optional session ID; reps are then also logged to the session
+        frame_stride: Analyze every n-th frame (1 = every frame)
+        model_complexity: MediaPipe pose model complexity (0, 1 or 2)
+        pose: Optional pose model to reuse across videos (see create_pose_model)
+        smoothing: Pass the landmarks through a One-Euro filter before analysis
+
+    Returns:
+        Dictionary with video statistics and a rep-by-rep breakdown
+    """
+    exercise = exercise or guess_exercise(video_path)
+    analyzer = get_analyzer(exercise)
+    if analyzer is None:
+        raise ValueError(f"Unknown exercise for video {video_path}: {exercise}")
+
+    # Each video gets its own analyzer state
+    client_id = f"video-{uuid.uuid4()}"
+
+    start_time = time.time()
+
+    # Stage 3: feed poses through the analyzer in frame order
+    frames_analyzed = 0
+    frames_with_pose = 0
+    last_timestamp = 0.0
+    rep_count = 0
+    reps = []
+    poses = stream_poses(video_path, frame_stride, model_complexity, pose)
+    try:
+        for index, timestamp, landmarks in poses:
+            frames_analyzed += 1
+            last_timestamp = timestamp
+            if landmarks is None:
+                continue
+            frames_with_pose += 1
+
+            if smoothing:
+                landmarks = smooth_landmarks(landmarks, client_id, timestamp)
+            result = analyzer.process(landmarks, tolerance, session_id, client_id, timestamp)
+            if "error" in result:
+                continue
+
+            counter = result.get("counter", result.get("repCount", 0))
+            if counter > rep_count:
+                rep_count = counter
+                reps.append({
+                    "rep_number": counter,
+                    "frame_index": index,
+                    "timestamp": round(timestamp, 3),
+                    "feedback_flags": result.get("feedback_flags", []),
+                    "feedback": result.get("feedback", ""),
+                    "score": result.get("rep_score", 0),
+                    "score_label": result.get("score_label", ""),
+                    "metrics": result.get("advanced_metrics", {})
+                })
+    finally:
+        poses.close()
+        from state import exercise_state
+        exercise_state.discard_client(client_id)
+
+    processing_seconds = time.time() - start_time
+    return {
+        "video": str(video_path),
+        "exercise": exercise,
+        "frames_analyzed": frames_analyzed,
+        "frames_with_pose": frames_with_pose,
+        "duration_seconds": round(last_timestamp, 3),
+        "processing_seconds": round(processing_seconds, 3),
+        "realtime_factor": round(last_timestamp / processing_seconds, 2) if processing_seconds > 0 else 0,
+        "total_reps": len(reps),
+        "average_score": sum(rep["score"] for rep in reps) / len(reps) if reps else 0,
+        "reps": reps
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Rep-by-rep form analysis of recorded exercise videos")
+    parser.add_argument("videos", nargs="+", help="Video files to analyze")
+    parser.add_argument("--exercise", choices=available_exercises(),
+                        help="Exercise performed (inferred from the file name by default)")
+    parser.add_argument("--tolerance", type=int, default=10)
+    parser.add_argument("--frame-stride", type=int, default=1, help="Analyze every n-th frame")
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--no-smoothing", action="store_true", help="Analyze the raw, unfiltered landmarks")
+    parser.add_argument("--output", help="Write the reports as JSON to this file")
+    args = parser.parse_args()
+
+    reports = []
+    for video in args.videos:
+        report = analyze_video(
+            video, args.exercise, args.tolerance,
+            frame_stride=args.frame_stride, model_complexity=args.model_complexity,
+            smoothing=not args.no_smoothing
+        )
+        reports.append(report)
+        print(f"{Path(video).name}: {report['exercise']} - {report['total_reps']} reps, "
+              f"average score {report['average_score']:.1f} "
+              f"({report['duration_seconds']:.1f}s of video in {report['processing_seconds']:.1f}s, "
+              f"{report['realtime_factor']}x real time)")
+        for rep in report["reps"]:
+            print(f"  Rep {rep['rep_number']} @ {rep['timestamp']:.2f}s: {rep['score']} "
+                  f"({rep['score_label']}) {', '.join(rep['feedback_flags'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"Saved reports to {args.output}")
+
+if __name__ == "__main__":
+    main()
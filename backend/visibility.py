@@ -0,0 +1,73 @@
+"""
+Visibility Gating
+-----------------
+Decides which body sides of a frame can be trusted, based on the landmark
+visibility scores MediaPipe reports.
+
+Angles computed from occluded joints (e.g. the far leg in a side-view squat)
+are guesses and cause false feedback, and MediaPipe often still scores the far
+limb above the threshold. Using the per-exercise requirements in
+feedback_config.VISIBILITY_GATING, each frame is reduced to the better-visible
+side (the one whose least visible joint scores highest). Exercises that measure
+both sides at once (BOTH_SIDES, e.g. the front and rear leg of a lunge) need
+both sides visible instead. When the requirement isn't met the analyzers skip
+the frame before doing any further work and answer with not_visible_response,
+which keeps the client's current count and stage on screen.
+
+Every metric an analyzer reads must come from the joints it gates on: from the
+selected side's joints (e.g. "left_body_alignment", not the midline
+"body_alignment"), plus the CENTER_JOINTS.
+"""
+from feedback_config import VISIBILITY_THRESHOLD, VISIBILITY_GATING
+
+SIDES = ("left", "right")
+
+NOT_VISIBLE_ERROR = "Key joints are not visible - make sure your whole body is in the camera frame."
+
+# Kinematics keys checked per exercise: (center keys, {side: side keys})
+_REQUIRED_KEYS = {
+    exercise: (
+        [f"{joint}_visibility" for joint in gating["CENTER_JOINTS"]],
+        {side: [f"{side}_{joint}_visibility" for joint in gating["SIDE_JOINTS"]] for side in SIDES}
+    )
+    for exercise, gating in VISIBILITY_GATING.items()
+}
+
+def side_visibility(kin, exercise):
+    """Visibility of each body side: the score of its least visible required joint"""
+    _, side_keys = _REQUIRED_KEYS[exercise]
+    return {side: min(map(kin.__getitem__, side_keys[side])) for side in SIDES}
+
+def visible_sides(kin, exercise, threshold=VISIBILITY_THRESHOLD):
+    """
+    Return the body sides ("left", "right") to analyze for an exercise in this frame.
+
+    That is the better-visible side, or both sides for BOTH_SIDES exercises. An
+    empty tuple means a required joint is missing and the frame should be skipped.
+    """
+    center_keys, _ = _REQUIRED_KEYS[exercise]
+    for key in center_keys:
+        if kin[key] < threshold:
+            return ()
+    visibility = side_visibility(kin, exercise)
+    if VISIBILITY_GATING[exercise]["BOTH_SIDES"]:
+        return SIDES if min(visibility.values()) >= threshold else ()
+    best = max(SIDES, key=visibility.get)
+    return (best,) if visibility[best] >= threshold else ()
+
+def side_values(kin, name, sides):
+    """Values of a per-side metric (e.g. "knee_angle") for the given sides"""
+    return [kin[f"{side}_{name}"] for side in sides]
+
+def not_visible_response(state, counter_key="counter"):
+    """
+    Response for a skipped frame: the client's current rep count and stage from
+    its exercise state (so rep displays don't drop to 0), flagged as not visible.
+    """
+    return {
+        counter_key: state.get(counter_key, 0),
+        "stage": state.get("stage"),
+        "feedback": NOT_VISIBLE_ERROR,
+        "visible": False,
+        "error": NOT_VISIBLE_ERROR
+    }